@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+# Модуль не импортирует PyQt — только расчётную часть
+from structures import Beam
+from serialization import load_beam_from_file
+
+METHODS = ('auto', 'symbolic', 'numeric', 'sparse', 'stiffness')
+FORMATS = ('jsonl', 'csv')
+CSV_FIELDS = ('file', 'status', 'load_time', 'solve_time', 'error', 'message', 'reaction', 'value')
+
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    # Шаблоны раскрываются сами, чтобы не зависеть от оболочки (в том числе '**')
+    files = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for filename in matches:
+            if os.path.isdir(filename):
+                continue
+            if filename not in seen:
+                seen.add(filename)
+                files.append(filename)
+    return files
+
+
+def solve_file(filename: str, method: str = 'auto') -> dict:
+    result = {'file': filename, 'status': 'ok', 'load_time': 0.0, 'solve_time': 0.0}
+    stage = 'load_time'
+    start = time.perf_counter()
+    try:
+        # Новая балка нумерует элементы из файла в собственном реестре
+        beam = Beam()
+        load_beam_from_file(filename, beam)
+        result['load_time'] = time.perf_counter() - start
+
+        stage = 'solve_time'
+        start = time.perf_counter()
+        # Символьное решение печатает подбалки — в потоке результатов это не нужно
+        with contextlib.redirect_stdout(io.StringIO()):
+            answer = beam.solve(method)
+        result['solve_time'] = time.perf_counter() - start
+        result['answer'] = answer
+    except Exception as e:
+        # Любая ошибка в одном файле не должна прерывать расчёт остальных
+        result[stage] = time.perf_counter() - start
+        result['status'] = 'error'
+        result['error'] = type(e).__name__
+        result['message'] = str(e)
+    return result
+
+
+def _solve_task(task: tuple[str, str]) -> dict:
+    return solve_file(*task)
+
+
+def solve_files(files: list[str], method: str = 'auto', workers: int | None = None):
+    # Результаты отдаются по мере готовности, а не в порядке файлов
+    tasks = [(filename, method) for filename in files]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(_solve_task, tasks)
+        return
+
+    chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+    with Pool(min(workers, len(tasks))) as pool:
+        yield from pool.imap_unordered(_solve_task, tasks, chunksize=chunksize)
+
+
+class JsonLinesWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, result: dict):
+        self.stream.write(json.dumps(result, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+class CsvWriter:
+    # Одна строка на реакцию; для файла с ошибкой — одна строка без реакции
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, result: dict):
+        row = {field: result.get(field, '') for field in CSV_FIELDS[:6]}
+        answer = result.get('answer')
+        if answer:
+            self.writer.writerows({**row, 'reaction': name, 'value': value} for name, value in answer.items())
+        else:
+            self.writer.writerow(row)
+        self.stream.flush()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='batch.py',
+        description="Пакетный расчёт реакций опор для сохранённых балок (.bm) без графического интерфейса"
+    )
+    parser.add_argument('paths', nargs='+', help="файлы .bm или шаблоны, например 'models/**/*.bm'")
+    parser.add_argument('-m', '--method', choices=METHODS, default='auto', help="метод решения (по умолчанию auto)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию — число ядер)")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='jsonl', help="формат вывода (по умолчанию jsonl)")
+    parser.add_argument('-o', '--output', default='-', help="файл для результатов (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("число процессов должно быть положительным")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    files = expand_paths(args.paths)
+    if not files:
+        print("Не найдено ни одного файла балки", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    failed = 0
+    with contextlib.ExitStack() as stack:
+        stream = sys.stdout if args.output == '-' else stack.enter_context(
+            open(args.output, 'w', encoding='utf-8', newline=''))
+        writer = JsonLinesWriter(stream) if args.format == 'jsonl' else CsvWriter(stream)
+        for result in solve_files(files, args.method, args.workers):
+            failed += result['status'] != 'ok'
+            writer.write(result)
+
+    print(f"Файлов: {len(files)}, с ошибками: {failed}, время: {time.perf_counter() - start:.2f} с", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class SolutionStore:
+    # Общее для нескольких процессов хранилище ответов в файле SQLite
+    def __init__(self, filename: str = "solutions.sqlite"):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, answer TEXT NOT NULL)"
+            )
+
+    def get(self, key: str) -> dict[str, float] | None:
+        with self._lock:
+            row = self._connection.execute("SELECT answer FROM solutions WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, answer: dict[str, float]):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO solutions (key, answer) VALUES (?, ?)",
+                (key, json.dumps(answer, ensure_ascii=False))
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM solutions")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class SolutionCache:
+    # LRU-кэш ответов Beam.solve по хешу содержимого балки (см. Beam.content_hash).
+    # При промахе в памяти ответ ищется в общем хранилище, если оно задано.
+    def __init__(self, max_size: int = 128, store: SolutionStore | None = None):
+        self.max_size = max_size
+        self.store = store
+        self._entries: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> dict[str, float] | None:
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(answer)
+
+        answer = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+                return None
+            self.store_hits += 1
+            self._remember(key, answer)
+        return dict(answer)
+
+    def put(self, key: str, answer: dict[str, float]):
+        with self._lock:
+            self._remember(key, dict(answer))
+        if self.store is not None:
+            self.store.put(key, answer)
+
+    def _remember(self, key: str, answer: dict[str, float]):
+        self._entries[key] = answer
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.store_hits = self.misses = self.evictions = 0
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import json
+import lzma
+import math
+import mmap
+import zlib
+
+import numpy as np
+
+from errors import IncorrectInputError
+from ids import use_registry
+from profiles import LoadProfile
+from serialization import load_beam_from_file, save_beam_to_file
+from structures import Beam, BeamSegment, Node, Force, DistributedForce, Torque, Support, Hinge, Section, is_parameter
+
+# Двоичный формат модели: сигнатура, длина заголовка (4 байта, little-endian), заголовок JSON
+# с описанием столбцов и сами столбцы — массивы одного типа, выровненные по ALIGNMENT.
+# Несжатые столбцы читаются прямо из отображённого в память файла, без копирования.
+MAGIC = b'BALKICOL'
+VERSION = 1
+ALIGNMENT = 64
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+# Столбцы по таблицам: узлы, опоры, сегменты, силы, участки профилей, моменты
+SCHEMA = {
+    'node_id': '<i8', 'node_x': '<f8', 'node_y': '<f8', 'node_hinge': '<i8',
+    'support_node': '<i8', 'support_id': '<i8', 'support_type': '<i1', 'support_angle': '<f8',
+    'support_force_id': '<i8', 'support_force_value': '<f8', 'support_force_unknown': '<u1',
+    'support_torque_id': '<i8', 'support_torque_value': '<f8', 'support_torque_unknown': '<u1',
+    'segment_id': '<i8', 'segment_node1': '<i8', 'segment_node2': '<i8', 'segment_ea': '<f8', 'segment_ei': '<f8',
+    'force_segment': '<i8', 'force_id': '<i8', 'force_value': '<f8', 'force_angle': '<f8',
+    'force_node1_dist': '<f8', 'force_length': '<f8', 'force_unknown': '<u1',
+    'force_profile_start': '<i8', 'force_profile_count': '<i8',
+    'piece_start': '<f8', 'piece_end': '<f8', 'piece_coefficient_start': '<i8', 'piece_coefficient_count': '<i8',
+    'coefficient': '<f8',
+    'torque_segment': '<i8', 'torque_id': '<i8', 'torque_value': '<f8', 'torque_node1_dist': '<f8',
+    'torque_unknown': '<u1',
+}
+# Маска неизвестных составляющих силы опоры
+_UNKNOWN_X, _UNKNOWN_Y = 1, 2
+
+
+def _number(value) -> float:
+    if is_parameter(value):
+        raise IncorrectInputError("Нагрузки с параметрами нельзя сохранить в двоичном формате!")
+    return float(value)
+
+
+def beam_columns(beam: Beam) -> dict[str, np.ndarray]:
+    # Модель в виде столбцов SCHEMA; ссылки между таблицами — номера строк, а не id
+    nodes = beam.get_nodes()
+    segments = beam.get_segments()
+    position = {node: i for i, node in enumerate(nodes)}
+    supported = [(i, node.support) for i, node in enumerate(nodes) if node.support]
+    forces = [(e, force) for e, segment in enumerate(segments) for force in segment.forces]
+    torques = [(e, torque) for e, segment in enumerate(segments) for torque in segment.torques]
+
+    pieces, coefficients, profile_start, profile_count = [], [], [], []
+    for _, force in forces:
+        if isinstance(force, DistributedForce):
+            profile_start.append(len(pieces))
+            profile_count.append(len(force.profile.pieces))
+            for start, end, piece in force.profile.pieces:
+                pieces.append((start, end, len(coefficients), len(piece)))
+                coefficients.extend(piece)
+        else:
+            profile_start.append(-1)
+            profile_count.append(0)
+
+    columns = {
+        'node_id': [node.id for node in nodes],
+        'node_x': [_number(node.x) for node in nodes],
+        'node_y': [_number(node.y) for node in nodes],
+        'node_hinge': [node.hinge.id if node.hinge else -1 for node in nodes],
+        'support_node': [i for i, _ in supported],
+        'support_id': [support.id for _, support in supported],
+        'support_type': [support.support_type.value for _, support in supported],
+        'support_angle': [support.angle for _, support in supported],
+        'support_force_id': [support.force.id for _, support in supported],
+        'support_force_value': [support.force.value for _, support in supported],
+        'support_force_unknown': [support.force.unknown_x * _UNKNOWN_X + support.force.unknown_y * _UNKNOWN_Y
+                                  for _, support in supported],
+        'support_torque_id': [support.torque.id for _, support in supported],
+        'support_torque_value': [support.torque.value for _, support in supported],
+        'support_torque_unknown': [support.torque.unknown for _, support in supported],
+        'segment_id': [segment.id for segment in segments],
+        'segment_node1': [position[segment.node1] for segment in segments],
+        'segment_node2': [position[segment.node2] for segment in segments],
+        'segment_ea': [segment.section.EA if segment.section else np.nan for segment in segments],
+        'segment_ei': [segment.section.EI if segment.section else np.nan for segment in segments],
+        'force_segment': [e for e, _ in forces],
+        'force_id': [force.id for _, force in forces],
+        'force_value': [_number(force.value) for _, force in forces],
+        'force_angle': [_number(force.angle) for _, force in forces],
+        'force_node1_dist': [_number(force.node1_dist) for _, force in forces],
+        'force_length': [_number(force.length) for _, force in forces],
+        'force_unknown': [force.unknown_x or force.unknown_y for _, force in forces],
+        'force_profile_start': profile_start,
+        'force_profile_count': profile_count,
+        'piece_start': [piece[0] for piece in pieces],
+        'piece_end': [piece[1] for piece in pieces],
+        'piece_coefficient_start': [piece[2] for piece in pieces],
+        'piece_coefficient_count': [piece[3] for piece in pieces],
+        'coefficient': coefficients,
+        'torque_segment': [e for e, _ in torques],
+        'torque_id': [torque.id for _, torque in torques],
+        'torque_value': [_number(torque.value) for _, torque in torques],
+        'torque_node1_dist': [_number(torque.node1_dist) for _, torque in torques],
+        'torque_unknown': [torque.unknown for _, torque in torques],
+    }
+    return {name: np.array(values, dtype=SCHEMA[name]) for name, values in columns.items()}
+
+
+def write_columns(filename: str, columns: dict[str, np.ndarray], compression: str | None = None):
+    if compression is not None and compression not in CODECS:
+        raise IncorrectInputError(f"Неизвестный способ сжатия: {compression}")
+
+    blocks, header = [], {'version': VERSION, 'columns': {}}
+    for name, array in columns.items():
+        data = np.ascontiguousarray(array, dtype=SCHEMA[name]).tobytes()
+        codec = compression
+        if codec is not None:
+            packed = CODECS[codec][0](data)
+            # Несжимаемые столбцы хранятся как есть и остаются доступными через mmap
+            if len(packed) < len(data):
+                data = packed
+            else:
+                codec = None
+        header['columns'][name] = {'count': len(array), 'size': len(data), 'codec': codec}
+        blocks.append((name, data))
+
+    # Смещения зависят от длины заголовка, а она — от смещений: заголовок дополняется до ALIGNMENT
+    def layout(header_size: int) -> int:
+        offset = _align(len(MAGIC) + 4 + header_size)
+        for name, data in blocks:
+            header['columns'][name]['offset'] = offset
+            offset = _align(offset + len(data))
+        return offset
+
+    size = 0
+    encoded = b''
+    while True:
+        layout(size)
+        encoded = json.dumps(header).encode('utf-8')
+        if len(encoded) <= size:
+            break
+        size = _align(len(encoded) + 16)
+
+    with open(filename, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(4, 'little'))
+        f.write(encoded)
+        for name, data in blocks:
+            f.seek(header['columns'][name]['offset'])
+            f.write(data)
+        f.truncate(_align(f.tell()))
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ColumnarModel:
+    # Открытый двоичный файл модели. Столбцы читаются по запросу: несжатые —
+    # представлениями NumPy над отображённым в память файлом, сжатые — распаковываются
+    # при первом обращении. Объекты балки создаются только в to_beam.
+    def __init__(self, filename: str):
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise IncorrectInputError("Файл не является двоичной моделью балки!")
+        start = len(MAGIC) + 4
+        size = int.from_bytes(self._mmap[len(MAGIC):start], 'little')
+        header = json.loads(self._mmap[start:start + size].decode('utf-8'))
+        if header['version'] > VERSION:
+            raise IncorrectInputError("Файл модели создан более новой версией программы!")
+        self.columns: dict[str, dict] = header['columns']
+        self._cache: dict[str, np.ndarray] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # Представления столбцов держат отображение открытым, пока живы
+        self._cache.clear()
+        self._mmap = None
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        array = self._cache.get(name)
+        if array is not None:
+            return array
+        if name not in self.columns:
+            return np.empty(0, dtype=SCHEMA[name])
+
+        info = self.columns[name]
+        dtype = np.dtype(SCHEMA[name])
+        if info['codec'] is None:
+            array = np.frombuffer(self._mmap, dtype=dtype, count=info['count'], offset=info['offset'])
+        else:
+            data = CODECS[info['codec']][1](self._mmap[info['offset']:info['offset'] + info['size']])
+            array = np.frombuffer(data, dtype=dtype, count=info['count'])
+        self._cache[name] = array
+        return array
+
+    def count(self, table: str) -> int:
+        # Число строк таблицы: 'node', 'support', 'segment', 'force', 'torque'
+        return self.columns[f'{table}_id']['count'] if f'{table}_id' in self.columns else 0
+
+    def to_beam(self, beam: Beam):
+        # Те же шаги, что в load_beam_from_file, но значения берутся из столбцов
+        with use_registry(beam.registry):
+            beam.graph.clear()
+            column = {name: self[name].tolist() for name in SCHEMA}
+
+            nodes = [Node(x, y, custom_id=node_id)
+                     for node_id, x, y in zip(column['node_id'], column['node_x'], column['node_y'])]
+
+            for i, support_id, support_type, angle, force_id, force_value, force_unknown, torque_id, torque_value, \
+                    torque_unknown in zip(*(column[name] for name in (
+                        'support_node', 'support_id', 'support_type', 'support_angle', 'support_force_id',
+                        'support_force_value', 'support_force_unknown', 'support_torque_id', 'support_torque_value',
+                        'support_torque_unknown'))):
+                support = Support(
+                    support_type=Support.Type(support_type),
+                    angle=angle,
+                    force_x=force_value,
+                    force_y=0,
+                    torque=torque_value,
+                    unknown_fx=bool(force_unknown & _UNKNOWN_X),
+                    unknown_fy=bool(force_unknown & _UNKNOWN_Y),
+                    unknown_t=bool(torque_unknown),
+                    custom_id=support_id,
+                    is_new=False
+                )
+                support.force.id = force_id
+                support.torque.id = torque_id
+                nodes[i].add_support(support)
+
+            nodes = [beam.add_node(node) for node in nodes]
+
+            hinges = {}
+            for node, hinge_id in zip(nodes, column['node_hinge']):
+                if hinge_id >= 0:
+                    if hinge_id not in hinges:
+                        hinges[hinge_id] = Hinge(custom_id=hinge_id)
+                    node.hinge = hinges[hinge_id]
+
+            segments = []
+            for segment_id, node1, node2, ea, ei in zip(column['segment_id'], column['segment_node1'],
+                                                        column['segment_node2'], column['segment_ea'], column['segment_ei']):
+                section = None if math.isnan(ea) else Section(ea, ei)
+                segments.append(BeamSegment(nodes[node1], nodes[node2], custom_id=segment_id, section=section))
+
+            for e, force_id, value, angle, node1_dist, length, unknown, profile_start, profile_count in zip(*(
+                    column[name] for name in ('force_segment', 'force_id', 'force_value', 'force_angle', 'force_node1_dist',
+                                              'force_length', 'force_unknown', 'force_profile_start',
+                                              'force_profile_count'))):
+                if profile_start >= 0:
+                    pieces = []
+                    for k in range(profile_start, profile_start + profile_count):
+                        first = column['piece_coefficient_start'][k]
+                        coefficients = column['coefficient'][first:first + column['piece_coefficient_count'][k]]
+                        pieces.append((column['piece_start'][k], column['piece_end'][k], coefficients))
+                    force = DistributedForce(LoadProfile(pieces), angle, custom_id=force_id)
+                else:
+                    force = Force(value, angle, node1_dist, length, bool(unknown), custom_id=force_id)
+                segments[e].add_force(force)
+
+            for e, torque_id, value, node1_dist, unknown in zip(*(
+                    column[name] for name in ('torque_segment', 'torque_id', 'torque_value', 'torque_node1_dist',
+                                              'torque_unknown'))):
+                segments[e].add_torque(Torque(value, node1_dist, bool(unknown), custom_id=torque_id))
+
+            for segment in segments:
+                beam.add_segment(segment)
+
+
+def save_beam_to_columnar(beam: Beam, filename: str = "beam.bmc", compression: str | None = None):
+    write_columns(filename, beam_columns(beam), compression)
+
+
+def load_beam_from_columnar(filename: str, beam: Beam):
+    with ColumnarModel(filename) as model:
+        model.to_beam(beam)
+
+
+def json_to_columnar(source: str, target: str, compression: str | None = None):
+    beam = Beam()
+    load_beam_from_file(source, beam)
+    save_beam_to_columnar(beam, target, compression)
+
+
+def columnar_to_json(source: str, target: str):
+    beam = Beam()
+    load_beam_from_columnar(source, beam)
+    save_beam_to_file(beam, target)
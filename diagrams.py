@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import numpy as np
+
+from errors import IncorrectInputError, IndeterminateError
+from lazy import lazy_import
+
+sps = lazy_import('scipy.sparse')
+spla = lazy_import('scipy.sparse.linalg')
+
+COMPONENTS = ('N', 'Q', 'M')
+DEFAULT_POINTS = 21
+
+# Столбцы весов событий, суммируемых по событиям за сечением: сила GX, GY
+# и момент относительно сечения M0 - s·M1. За ними — коэффициенты многочленов
+# распределённых нагрузок, действующих в самом сечении (по степеням s, см. _FIXED)
+_GX, _GY, _M0, _M1 = range(4)
+_FIXED = 4
+# Порядок при совпадении координат: сечение «до» нагрузки, нагрузка, сечение «после»
+_BEFORE, _EVENT, _AFTER = 0, 1, 2
+
+
+class Extreme:
+    __slots__ = ('value', 'segment', 's', 'x', 'y')
+
+    def __init__(self, value: float, segment, s: float, x: float, y: float):
+        self.value = value
+        self.segment = segment
+        self.s = s
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"Extreme(value={self.value}, segment={self.segment.id}, s={self.s}, x={self.x}, y={self.y})"
+
+
+class InternalForces:
+    # Эпюры по всем сегментам в плоских массивах: точки сегмента segments[i] занимают
+    # срез offsets[i]:offsets[i + 1] и упорядочены по s — расстоянию от node1.
+    # Под сосредоточенной нагрузкой точка повторяется дважды: значения до и после скачка.
+    #
+    # Правило знаков в осях сегмента (ось t от node1 к node2, нормаль n повёрнута
+    # от t на 90° против часовой стрелки): N > 0 — растяжение; Q — проекция на n сил,
+    # приложенных к части со стороны node1; M — момент сил со стороны node2 относительно
+    # сечения, против часовой стрелки. Для горизонтального сегмента слева направо
+    # это обычные правила: M > 0 растягивает нижние волокна и dM/ds = Q.
+    def __init__(self, segments: list, offsets: np.ndarray, segment: np.ndarray, s: np.ndarray,
+                 x: np.ndarray, y: np.ndarray, N: np.ndarray, Q: np.ndarray, M: np.ndarray):
+        self.segments = segments
+        self.offsets = offsets
+        self.segment = segment
+        self.s = s
+        self.x = x
+        self.y = y
+        self.N = N
+        self.Q = Q
+        self.M = M
+        self._index = {segment: i for i, segment in enumerate(segments)}
+
+    def __len__(self):
+        return len(self.s)
+
+    def of(self, segment) -> dict[str, np.ndarray]:
+        i = self._index[segment]
+        part = slice(self.offsets[i], self.offsets[i + 1])
+        return {name: getattr(self, name)[part] for name in ('s', 'x', 'y', *COMPONENTS)}
+
+    def extremes(self, segment=None) -> dict[str, dict[str, Extreme]]:
+        # Наибольшие и наименьшие значения N, Q, M по всей балке или по одному сегменту.
+        # Экстремумы M внутри участков, где Q меняет знак, уточняются по линейной
+        # интерполяции Q: при равномерных нагрузках это точно (M — квадратичная парабола),
+        # при нагрузках сложного профиля — с точностью до шага эпюры.
+        if segment is None:
+            part = slice(0, len(self.s))
+        else:
+            i = self._index[segment]
+            part = slice(self.offsets[i], self.offsets[i + 1])
+        seg, s, x, y = self.segment[part], self.s[part], self.x[part], self.y[part]
+        values = {name: getattr(self, name)[part] for name in COMPONENTS}
+
+        Q, M = values['Q'], values['M']
+        crossing = np.flatnonzero((seg[:-1] == seg[1:]) & (Q[:-1] * Q[1:] < 0))
+        if crossing.size:
+            share = Q[crossing] / (Q[crossing] - Q[crossing + 1])
+            M_cross = M[crossing] + 0.5 * Q[crossing] * share * (s[crossing + 1] - s[crossing])
+            s_cross = s[crossing] + share * (s[crossing + 1] - s[crossing])
+            x_cross = x[crossing] + share * (x[crossing + 1] - x[crossing])
+            y_cross = y[crossing] + share * (y[crossing + 1] - y[crossing])
+        else:
+            M_cross = s_cross = x_cross = y_cross = np.empty(0)
+
+        result = {}
+        for name in COMPONENTS:
+            value, where = values[name], (seg, s, x, y)
+            if name == 'M' and crossing.size:
+                value = np.concatenate([value, M_cross])
+                where = (np.concatenate([seg, seg[crossing]]), np.concatenate([s, s_cross]),
+                         np.concatenate([x, x_cross]), np.concatenate([y, y_cross]))
+            result[name] = {
+                'min': self._extreme(value, where, int(np.argmin(value))),
+                'max': self._extreme(value, where, int(np.argmax(value))),
+            }
+        return result
+
+    def _extreme(self, value: np.ndarray, where: tuple, index: int) -> Extreme:
+        seg, s, x, y = where
+        return Extreme(float(value[index]), self.segments[int(seg[index])],
+                       float(s[index]), float(x[index]), float(y[index]))
+
+
+def _force_parts(force, values: dict[str, float], name: str) -> tuple[float, float]:
+    fx = values[f'{name}_x'] if force.unknown_x else force.part_x
+    fy = values[f'{name}_y'] if force.unknown_y else force.part_y
+    return float(fx), float(fy)
+
+
+def _torque_value(torque, values: dict[str, float], name: str) -> float:
+    return float(values[name] if torque.unknown else torque.value)
+
+
+class SegmentLoads:
+    # Нагрузки всех сегментов в массивах; номер сегмента — позиция в переданном списке.
+    # Сосредоточенные силы: f_*, f_point отмечает силы без распределения (у остальных
+    # f_dist — точка приложения равнодействующей). Моменты: t_*. Распределённые нагрузки —
+    # участки [p_a, p_b] с интенсивностью (p_vx, p_vy)·q(s), где q — многочлен по степеням s
+    # с коэффициентами в строках p_coef; равномерная сила даёт один участок с q = 1.
+    def __init__(self, segments: list, values: dict[str, float]):
+        f_seg, f_x, f_y, f_dist, f_point = [], [], [], [], []
+        p_seg, p_a, p_b, p_vx, p_vy, p_coef = [], [], [], [], [], []
+        t_seg, t_value, t_dist = [], [], []
+        for e, segment in enumerate(segments):
+            sid = f'segment_{segment.id}'
+            for force in segment.forces:
+                fx, fy = _force_parts(force, values, f'{sid}_force_{force.id}')
+                f_seg.append(e)
+                f_x.append(fx)
+                f_y.append(fy)
+                f_dist.append(force.node1_dist)
+                profile = getattr(force, 'profile', None)
+                # Как в диалоге добавления силы: без флажка «Распределённая» длина равна 1
+                f_point.append(profile is None and force.length == 1)
+                if profile is not None:
+                    piece_start, piece_end, coefficients = profile.power_pieces()
+                    total = float(force.value * force.length)
+                    p_seg.extend([e] * len(piece_start))
+                    p_a.extend(piece_start)
+                    p_b.extend(piece_end)
+                    p_vx.extend([fx / total] * len(piece_start))
+                    p_vy.extend([fy / total] * len(piece_start))
+                    p_coef.extend(coefficients)
+                elif force.length != 1:
+                    length = float(force.length)
+                    p_seg.append(e)
+                    p_a.append(force.node1_dist - length / 2)
+                    p_b.append(force.node1_dist + length / 2)
+                    p_vx.append(fx / length)
+                    p_vy.append(fy / length)
+                    p_coef.append(np.ones(1))
+            for torque in segment.torques:
+                t_seg.append(e)
+                t_value.append(_torque_value(torque, values, f'{sid}_torque_{torque.id}'))
+                t_dist.append(torque.node1_dist)
+
+        self.f_seg, self.t_seg, self.p_seg = (np.array(array, dtype=np.int64) for array in (f_seg, t_seg, p_seg))
+        (self.f_x, self.f_y, self.f_dist, self.t_value, self.t_dist,
+         self.p_a, self.p_b, self.p_vx, self.p_vy) = (
+            np.array(array, dtype=np.float64) for array in (f_x, f_y, f_dist, t_value, t_dist, p_a, p_b, p_vx, p_vy)
+        )
+        self.f_point = np.array(f_point, dtype=bool)
+        self.p_coef = np.zeros((len(p_coef), max((len(coefficients) for coefficients in p_coef), default=1)))
+        for i, coefficients in enumerate(p_coef):
+            self.p_coef[i, :len(coefficients)] = coefficients
+
+
+def compute_internal_forces(beam, values: dict[str, float], points: int = DEFAULT_POINTS,
+                    step: float | None = None) -> InternalForces:
+    # values — неокруглённые значения неизвестных по внутренним именам (Beam.raw_solution).
+    #
+    # Часть конструкции за сегментом (со стороны node2) передаёт в начало сегмента
+    # силу U и момент относительно начала координат. Для дерева сегментов U находится
+    # из равновесия узлов одним разреженным решением: B·U = -(L + A·S), где B — матрица
+    # инцидентности (+1 в node1, -1 в node2), L — реакции в узлах, S — нагрузки сегментов.
+    # Вклад нагрузок самого сегмента, лежащих за сечением, — суффиксные суммы по событиям
+    # (сосредоточенные силы и моменты, концы распределённых нагрузок), отсортированным
+    # вместе с точками сечений. Всё считается без циклов по точкам.
+    if points < 2:
+        raise IncorrectInputError("Число точек на сегменте должно быть не меньше 2!")
+    if step is not None and step <= 0:
+        raise IncorrectInputError("Шаг эпюры должен быть положительным!")
+
+    graph = beam.graph
+    segments = graph.segments()
+    nodes = graph.node_list()
+    n_nodes, n_edges = len(nodes), len(segments)
+    if n_edges != n_nodes - 1:
+        raise IndeterminateError("Усилия в замкнутом контуре статически неопределимы: эпюры строятся только для балок без замкнутых контуров!")
+
+    coords = graph.coordinates()
+    ends = np.array([(graph.position(segment.node1), graph.position(segment.node2)) for segment in segments],
+                    dtype=np.int64).reshape(-1, 2)
+    start = coords[ends[:, 0]]
+    delta = coords[ends[:, 1]] - start
+    lengths = np.hypot(delta[:, 0], delta[:, 1])
+    tx, ty = delta[:, 0] / lengths, delta[:, 1] / lengths
+
+    # Реакции опор в узлах: Fx, Fy и момент относительно начала координат
+    nodal = np.zeros((n_nodes, 3))
+    for i, node in enumerate(nodes):
+        support = node.support
+        if support is None:
+            continue
+        nid = f'node_{node.id}'
+        fx, fy = _force_parts(support.force, values, nid)
+        nodal[i] = fx, fy, -node.y * fx + node.x * fy + _torque_value(support.torque, values, f'{nid}_torque')
+
+    loads = SegmentLoads(segments, values)
+    f_seg, f_x, f_y, f_dist, f_point = loads.f_seg, loads.f_x, loads.f_y, loads.f_dist, loads.f_point
+    t_seg, t_value, t_dist = loads.t_seg, loads.t_value, loads.t_dist
+    p_seg, p_a, p_b, p_vx, p_vy = loads.p_seg, loads.p_a, loads.p_b, loads.p_vx, loads.p_vy
+
+    # Равнодействующие нагрузок каждого сегмента: Fx, Fy и момент относительно начала координат
+    f_px = start[f_seg, 0] + f_dist * tx[f_seg]
+    f_py = start[f_seg, 1] + f_dist * ty[f_seg]
+    own = np.zeros((n_edges, 3))
+    np.add.at(own, f_seg, np.column_stack([f_x, f_y, f_px * f_y - f_py * f_x]))
+    np.add.at(own[:, 2], t_seg, t_value)
+
+    # Многочлены участков: q по степеням s, первообразная F = ∫q и G = ∫s·q;
+    # в самом сечении нагрузка участка даёт силу F(s) и момент G(s) - s·F(s)
+    powers = loads.p_coef.shape[1] + 2
+    q = np.zeros((len(p_seg), powers))
+    q[:, :powers - 2] = loads.p_coef
+    j = np.arange(powers - 2)
+    F = np.zeros_like(q)
+    F[:, 1:-1] = q[:, :-2] / (j + 1)
+    G = np.zeros_like(q)
+    G[:, 2:] = q[:, :-2] / (j + 2)
+    at_section = G.copy()
+    at_section[:, 2:] -= F[:, 1:-1]
+    p_cross = tx[p_seg] * p_vy - ty[p_seg] * p_vx
+
+    # События: сосредоточенные силы и моменты, концы участков (b со знаком +, a со знаком -)
+    f_cross = tx[f_seg] * f_y - ty[f_seg] * f_x
+    n_columns = _FIXED + 3 * powers
+    point = f_point
+    jumps = np.zeros((point.sum() + len(t_seg), n_columns))
+    jumps[:point.sum(), _GX] = f_x[point]
+    jumps[:point.sum(), _GY] = f_y[point]
+    jumps[:point.sum(), _M0] = f_cross[point] * f_dist[point]
+    jumps[:point.sum(), _M1] = f_cross[point]
+    jumps[point.sum():, _M0] = t_value
+
+    def piece_events(position: np.ndarray, sign: float) -> np.ndarray:
+        events = np.zeros((len(position), n_columns))
+        F_end = np.polynomial.polynomial.polyval(position, F.T, tensor=False)
+        G_end = np.polynomial.polynomial.polyval(position, G.T, tensor=False)
+        events[:, _GX] = sign * p_vx * F_end
+        events[:, _GY] = sign * p_vy * F_end
+        events[:, _M0] = sign * p_cross * G_end
+        events[:, _M1] = sign * p_cross * F_end
+        # В сечениях между a и b участок действует сам: его вклад вычитается из суммы за сечением
+        events[:, _FIXED:_FIXED + powers] = sign * p_vx[:, None] * F
+        events[:, _FIXED + powers:_FIXED + 2 * powers] = sign * p_vy[:, None] * F
+        events[:, _FIXED + 2 * powers:] = sign * p_cross[:, None] * at_section
+        return events
+
+    ev_seg = np.concatenate([f_seg[point], t_seg, p_seg, p_seg])
+    ev_pos = np.concatenate([f_dist[point], t_dist, p_b, p_a])
+    ev_weights = np.concatenate([jumps, piece_events(p_b, 1), piece_events(p_a, -1)])
+    n_jumps = len(jumps)
+
+    # Силы, передаваемые в начало каждого сегмента с его стороны node2
+    transmitted = np.zeros((n_edges, 3))
+    if n_edges:
+        incidence = sps.csc_matrix(
+            (np.concatenate([np.ones(n_edges), -np.ones(n_edges)]),
+             (np.concatenate([ends[:, 0], ends[:, 1]]), np.tile(np.arange(n_edges), 2))),
+            shape=(n_nodes, n_edges)
+        )
+        rhs = -nodal
+        np.add.at(rhs, ends[:, 0], -own)
+        # Одна строка лишняя: сумма всех уравнений — равновесие конструкции в целом
+        transmitted = spla.splu(incidence[1:].tocsc()).solve(np.ascontiguousarray(rhs[1:]))
+
+    # Точки сечений: равномерная сетка и пары точек в местах нагрузок
+    if step is None:
+        counts = np.full(n_edges, points, dtype=np.int64)
+    else:
+        counts = np.maximum(np.ceil(lengths / step).astype(np.int64) + 1, 2)
+    grid_seg = np.repeat(np.arange(n_edges), counts)
+    first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    local = np.arange(len(grid_seg)) - np.repeat(first, counts)
+    grid_pos = local / np.repeat(counts - 1, counts) * lengths[grid_seg]
+    grid_rank = np.where(local == np.repeat(counts - 1, counts), _BEFORE, _AFTER)
+
+    # Под сосредоточенной нагрузкой — пара точек «до» и «после», на концах распределённой — одна
+    inside = (ev_pos > 0) & (ev_pos < lengths[ev_seg])
+    jump = inside & (np.arange(len(ev_seg)) < n_jumps)
+    kink = inside & ~jump
+    n_events = len(ev_seg)
+
+    # Сортировка одним ключом: номер сегмента плюс доля его диапазона координат.
+    # Массив заранее выстроен по рангу, поэтому устойчивая сортировка сама
+    # разводит совпадающие координаты в порядке «до», нагрузка, «после».
+    low, high = np.zeros(n_edges), lengths.copy()
+    np.minimum.at(low, ev_seg, ev_pos)
+    np.maximum.at(high, ev_seg, ev_pos)
+    before = grid_rank == _BEFORE
+    all_seg = np.concatenate([grid_seg[before], ev_seg[jump], ev_seg, grid_seg[~before], ev_seg[jump], ev_seg[kink]])
+    all_pos = np.concatenate([grid_pos[before], ev_pos[jump], ev_pos, grid_pos[~before], ev_pos[jump], ev_pos[kink]])
+    first_event = before.sum() + jump.sum()
+    all_rank = np.repeat(np.array([_BEFORE, _EVENT, _AFTER]),
+                         [first_event, n_events, len(all_seg) - first_event - n_events])
+    key = all_seg + 0.5 * (all_pos - low[all_seg]) / (high[all_seg] - low[all_seg])
+    order = np.argsort(key, kind='stable')
+    sorted_seg, sorted_pos, sorted_rank = all_seg[order], all_pos[order], all_rank[order]
+
+    # Префиксные суммы весов только по событиям; для точки сечения — число событий перед ней
+    is_event = sorted_rank == _EVENT
+    cumulative = np.zeros((n_events + 1, n_columns))
+    np.cumsum(ev_weights[order[is_event] - first_event], axis=0, out=cumulative[1:])
+    segment_total = cumulative[np.searchsorted(sorted_seg[is_event], np.arange(n_edges), side='right')]
+    events_before = np.cumsum(is_event)
+
+    # Точка сетки, совпавшая с местом нагрузки, не дублирует точку из пары «до/после»
+    is_sample = ~is_event
+    is_sample[1:] &= ~((sorted_seg[1:] == sorted_seg[:-1]) & (sorted_pos[1:] == sorted_pos[:-1])
+                       & (sorted_rank[1:] == sorted_rank[:-1]))
+    seg = sorted_seg[is_sample]
+    s = sorted_pos[is_sample]
+    passed = events_before[is_sample]
+
+    def beyond(column: int) -> np.ndarray:
+        # Сумма весов событий сегмента, лежащих за сечением
+        return segment_total[seg, column] - cumulative[passed, column]
+
+    def acting(first: int) -> np.ndarray:
+        # Многочлен участков, действующих в сечении, вычисленный в точке s
+        result = np.zeros(len(s))
+        for column in range(first + powers - 1, first - 1, -1):
+            result = result * s + cumulative[passed, column]
+        return result
+
+    t_x, t_y = tx[seg], ty[seg]
+    x = start[seg, 0] + s * t_x
+    y = start[seg, 1] + s * t_y
+    Ux, Uy = transmitted[seg, 0], transmitted[seg, 1]
+    Rx = Ux + beyond(_GX) + acting(_FIXED)
+    Ry = Uy + beyond(_GY) + acting(_FIXED + powers)
+    M = (transmitted[seg, 2] - (x * Uy - y * Ux)
+         + beyond(_M0) - s * beyond(_M1) + acting(_FIXED + 2 * powers))
+    N = Rx * t_x + Ry * t_y
+    Q = Rx * t_y - Ry * t_x
+
+    offsets = np.zeros(n_edges + 1, dtype=np.int64)
+    np.cumsum(np.bincount(seg, minlength=n_edges), out=offsets[1:])
+    return InternalForces(segments, offsets, seg, s, x, y, N, Q, M)
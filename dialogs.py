@@ -3,6 +3,7 @@ from PyQt6.QtWidgets import (
     QPushButton, QComboBox, QCheckBox, QMessageBox
 )
 from structures import *
+from journal import EditJournal
 
 # Умная конвертация числа в строку:
 # если число является целым (например, 3.0), то оно преобразуется в '3', а не '3.0'.
@@ -184,8 +185,14 @@ class SolveDialog(QDialog):
 
 # Класс, управляющий открытием диалогов и обработкой их результатов
 class DialogManager:
-    def __init__(self, grid_widget):
+    def __init__(self, grid_widget, journal: EditJournal | None = None):
         self.grid_widget = grid_widget  # Ссылка на виджет с графиком/сценой
+        self.journal = journal  # Журнал правок для автосохранения (необязателен)
+
+    # Записывает применённую правку в журнал: edit — имя метода EditJournal
+    def log(self, edit, *args):
+        if self.journal is not None:
+            getattr(self.journal, edit)(self.grid_widget.beam, *args)
 
     # Общий метод для открытия диалогов с обработкой ошибок
     def open_dialog(self, dialog_class, apply_func):
@@ -205,12 +212,17 @@ class DialogManager:
     # Методы открытия конкретных диалогов:
 
     def open_segment_dialog(self):
-        self.open_dialog(
-            BeamSegmentDialog,
-            lambda data: self.grid_widget.beam.add_segment(
-                BeamSegment(Node(data[0], data[1]), Node(data[2], data[3]))
-            )
-        )
+        def apply(data):
+            beam = self.grid_widget.beam
+            # Концы, совпадающие с существующими узлами, берутся из балки,
+            # чтобы сегмент ссылался на узлы графа и сохранялся вместе с ними
+            node1 = beam.find_node(data[0], data[1]) or Node(data[0], data[1])
+            node2 = beam.find_node(data[2], data[3]) or Node(data[2], data[3])
+            segment = BeamSegment(node1, node2)
+            if beam.add_segment(segment) is segment:
+                self.log('segment', segment)
+
+        self.open_dialog(BeamSegmentDialog, apply)
 
     def open_support_dialog(self):
         def apply(data):
@@ -221,6 +233,7 @@ class DialogManager:
             ut = support_type_index == Support.Type.FIXED.value
             self.grid_widget.node_mapping[node_number].add_support(Support(Support.Type(support_type_index), angle, 0, 0, 0, ufx, True, ut))
             self.grid_widget.node_mapping[node_number].hinge = None
+            self.log('support', self.grid_widget.node_mapping[node_number])
 
 
         self.open_dialog(SupportDialog, apply)
@@ -230,9 +243,9 @@ class DialogManager:
             segment_number, offset, value, angle, length = data
             if segment_number not in self.grid_widget.segment_mapping:
                 raise NonExistentError(f"Сегмент балки {segment_number} не существует!")
-            self.grid_widget.segment_mapping[segment_number].add_force(
-                Force(value, angle, offset, length, False)
-            )
+            force = Force(value, angle, offset, length, False)
+            self.grid_widget.segment_mapping[segment_number].add_force(force)
+            self.log('force', self.grid_widget.segment_mapping[segment_number], force)
 
         self.open_dialog(ForceDialog, apply)
 
@@ -241,9 +254,9 @@ class DialogManager:
             segment_number, offset, value = data
             if segment_number not in self.grid_widget.segment_mapping:
                 raise NonExistentError(f"Сегмент балки {segment_number} не существует!")
-            self.grid_widget.segment_mapping[segment_number].add_torque(
-                Torque(value, offset, False)
-            )
+            torque = Torque(value, offset, False)
+            self.grid_widget.segment_mapping[segment_number].add_torque(torque)
+            self.log('torque', self.grid_widget.segment_mapping[segment_number], torque)
 
         self.open_dialog(TorqueDialog, apply)
 
@@ -254,6 +267,7 @@ class DialogManager:
                 raise NonExistentError(f"Узел {node_number} не существует!")
             node = self.grid_widget.node_mapping[node_number].add_hinge()
             self.grid_widget.node_mapping[node_number].support = None
+            self.log('hinge', self.grid_widget.node_mapping[node_number])
 
         self.open_dialog(HingeDialog, apply)
 
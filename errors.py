@@ -8,6 +8,12 @@ class UnsolvableError(BaseError):
 class TooManyUnknownsError(BaseError):
     pass
 
+class MechanismError(UnsolvableError):
+    pass
+
+class IndeterminateError(TooManyUnknownsError):
+    pass
+
 class NegativeOrZeroValueError(BaseError):
     pass
 
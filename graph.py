@@ -0,0 +1,325 @@
+from array import array
+import numpy as np
+from lazy import lazy_import
+from unionfind import UnionFind
+
+sps = lazy_import('scipy.sparse')
+csgraph = lazy_import('scipy.sparse.csgraph')
+
+
+class NodeView:
+    # Только для чтения: len, обход и проверка `in`, как у networkx.Graph.nodes
+    def __init__(self, graph: "StructureGraph"):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph._nodes)
+
+    def __iter__(self):
+        return iter(self._graph._nodes)
+
+    def __contains__(self, node):
+        return node in self._graph._positions
+
+
+class EdgeView:
+    # Рёбра в порядке обхода networkx.Graph.edges; edges(data=True) отдаёт {'object': сегмент}
+    def __init__(self, graph: "StructureGraph"):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph._segments)
+
+    def __iter__(self):
+        return self(data=False)
+
+    def __call__(self, data: bool = False):
+        nodes = self._graph._nodes
+        order, lo, hi = self._graph._edge_order()
+        segments = self._graph._segments
+        for edge, i, j in zip(order.tolist(), lo.tolist(), hi.tolist()):
+            yield (nodes[i], nodes[j], {'object': segments[edge]}) if data else (nodes[i], nodes[j])
+
+    def __contains__(self, edge):
+        return self._graph.has_edge(*edge)
+
+
+class StructureGraph:
+    # Число рёбер, до которого порядок обхода считается без NumPy
+    SMALL = 32
+
+    # Топология балки в компактном виде: узлы нумеруются по порядку добавления,
+    # концы рёбер хранятся номерами в массивах, смежность в CSR строится по запросу.
+    # Порядок обхода узлов, рёбер и соседей такой же, как у networkx.Graph,
+    # которым балка пользовалась раньше, — от него зависит нумерация в ответах.
+    #
+    # Связность и тела поддерживаются при добавлении рёбер системами непересекающихся
+    # множеств. Тела — компоненты без «разрезающих» узлов (is_cut, для балки это шарниры);
+    # после изменения разрезов (sync_cuts) множества тел перестраиваются целиком.
+    # Множества строятся при первом запросе, поэтому вспомогательные графы их не заводят.
+    def __init__(self, is_cut=None):
+        self._is_cut = is_cut
+        self._nodes: list = []
+        self._positions: dict = {}
+        self._u = array('q')
+        self._v = array('q')
+        self._segments: list = []
+        # Поиск ребра по паре концов: отсортированные ключи и номера рёбер в массивах,
+        # недавно добавленные рёбра — в небольшом словаре до следующего слияния
+        self._keys = np.empty(0, dtype=np.int64)
+        self._key_edges = np.empty(0, dtype=np.int64)
+        self._recent: dict[int, int] = {}
+        self._cache: dict = {}
+        self._connectivity: UnionFind | None = None
+        self._bodies: UnionFind | None = None
+        self._cut: bytearray | None = None
+
+    @property
+    def nodes(self) -> NodeView:
+        return NodeView(self)
+
+    @property
+    def edges(self) -> EdgeView:
+        return EdgeView(self)
+
+    def number_of_nodes(self) -> int:
+        return len(self._nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self._segments)
+
+    def node_list(self) -> list:
+        return list(self._nodes)
+
+    def segments(self) -> list:
+        if 'segments' not in self._cache:
+            if len(self._segments) <= StructureGraph.SMALL:
+                # Для маленьких графов (подбалки) сортировка без NumPy заметно быстрее
+                u, v = self._u, self._v
+                order = sorted(range(len(self._segments)), key=lambda edge: min(u[edge], v[edge]))
+            else:
+                order = self._edge_order()[0].tolist()
+            self._cache['segments'] = [self._segments[edge] for edge in order]
+        return list(self._cache['segments'])
+
+    def ordered_edges(self) -> np.ndarray:
+        # Концы рёбер (номера узлов) в порядке обхода edges, форма (E, 2)
+        _, lo, hi = self._edge_order()
+        return np.column_stack([lo, hi])
+
+    def has_node(self, node) -> bool:
+        return node in self._positions
+
+    def position(self, node) -> int:
+        return self._positions[node]
+
+    def add_node(self, node) -> int:
+        position = self._positions.get(node)
+        if position is None:
+            position = self._positions[node] = len(self._nodes)
+            self._nodes.append(node)
+            if self._connectivity is not None:
+                self._connectivity.add()
+            if self._bodies is not None:
+                self._bodies.add()
+                self._cut.append(self._cuts(node))
+            self._cache.clear()
+        return position
+
+    @staticmethod
+    def _key(i: int, j: int) -> int:
+        return (i << 32) | j if i <= j else (j << 32) | i
+
+    def _find_edge(self, key: int) -> int | None:
+        edge = self._recent.get(key)
+        if edge is not None:
+            return edge
+        keys = self._keys
+        if not len(keys):
+            return None
+        index = int(keys.searchsorted(key))
+        if index < len(keys) and keys[index] == key:
+            return int(self._key_edges[index])
+        return None
+
+    def _merge_recent(self):
+        keys = np.concatenate([self._keys, np.fromiter(self._recent.keys(), dtype=np.int64, count=len(self._recent))])
+        edges = np.concatenate([self._key_edges, np.fromiter(self._recent.values(), dtype=np.int64, count=len(self._recent))])
+        order = np.argsort(keys, kind='stable')
+        self._keys, self._key_edges = keys[order], edges[order]
+        self._recent.clear()
+
+    def add_edge(self, node1, node2, object=None):
+        i, j = self.add_node(node1), self.add_node(node2)
+        key = StructureGraph._key(i, j)
+        edge = self._find_edge(key)
+        if edge is not None:
+            self._segments[edge] = object
+            return
+        self._recent[key] = len(self._segments)
+        self._u.append(i)
+        self._v.append(j)
+        self._segments.append(object)
+        self._cache.clear()
+        if self._connectivity is not None:
+            self._connectivity.union(i, j)
+        if self._bodies is not None and not self._cut[i] and not self._cut[j]:
+            self._bodies.union(i, j)
+        # Слияние при росте словаря на долю от числа рёбер — в сумме O(E log E)
+        if len(self._recent) > max(1024, len(self._segments) // 8):
+            self._merge_recent()
+
+    def add_nodes(self, nodes: list):
+        # Пакетный add_node для узлов, которых ещё нет в графе
+        for node in nodes:
+            self._positions[node] = len(self._nodes)
+            self._nodes.append(node)
+            if self._connectivity is not None:
+                self._connectivity.add()
+            if self._bodies is not None:
+                self._bodies.add()
+                self._cut.append(self._cuts(node))
+        self._cache.clear()
+
+    def add_edges(self, first: np.ndarray, second: np.ndarray, objects: list):
+        # Пакетный add_edge по номерам концов: пары не повторяются ни между собой,
+        # ни с имеющимися рёбрами (это проверяет вызывающий), поэтому ключи
+        # сливаются в поиск одной сортировкой
+        first = np.asarray(first, dtype=np.int64)
+        second = np.asarray(second, dtype=np.int64)
+        edges = np.arange(len(self._segments), len(self._segments) + len(objects), dtype=np.int64)
+        self._u.extend(first.tolist())
+        self._v.extend(second.tolist())
+        self._segments.extend(objects)
+        self._cache.clear()
+
+        lo, hi = np.minimum(first, second), np.maximum(first, second)
+        keys = np.concatenate([self._keys, (lo << 32) | hi])
+        edges = np.concatenate([self._key_edges, edges])
+        order = np.argsort(keys, kind='stable')
+        self._keys, self._key_edges = keys[order], edges[order]
+
+        if self._connectivity is not None or self._bodies is not None:
+            for i, j in zip(first.tolist(), second.tolist()):
+                if self._connectivity is not None:
+                    self._connectivity.union(i, j)
+                if self._bodies is not None and not self._cut[i] and not self._cut[j]:
+                    self._bodies.union(i, j)
+
+    def has_edge(self, node1, node2) -> bool:
+        return self.segment(node1, node2) is not None
+
+    def segment(self, node1, node2):
+        i, j = self._positions.get(node1), self._positions.get(node2)
+        if i is None or j is None:
+            return None
+        edge = self._find_edge(StructureGraph._key(i, j))
+        return None if edge is None else self._segments[edge]
+
+    def neighbors(self, node):
+        indptr, neighbors, _ = self.csr()
+        position = self._positions[node]
+        return (self._nodes[i] for i in neighbors[indptr[position]:indptr[position + 1]].tolist())
+
+    def __getitem__(self, node) -> dict:
+        indptr, neighbors, edges = self.csr()
+        position = self._positions[node]
+        start, end = indptr[position], indptr[position + 1]
+        return {
+            self._nodes[i]: {'object': self._segments[edge]}
+            for i, edge in zip(neighbors[start:end].tolist(), edges[start:end].tolist())
+        }
+
+    def clear(self):
+        self.__init__(self._is_cut)
+
+    def edge_array(self) -> np.ndarray:
+        # Концы рёбер (номера узлов) в порядке добавления, форма (E, 2)
+        if 'edges' not in self._cache:
+            edges = np.empty((len(self._segments), 2), dtype=np.int64)
+            edges[:, 0] = self._u
+            edges[:, 1] = self._v
+            self._cache['edges'] = edges
+        return self._cache['edges']
+
+    def coordinates(self) -> np.ndarray:
+        # Координаты узлов, форма (N, 2); узлы могут двигаться, поэтому не кэшируется
+        return np.array([(node.x, node.y) for node in self._nodes], dtype=np.float64).reshape(-1, 2)
+
+    def csr(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # indptr, соседи и номера рёбер; соседи узла упорядочены по номеру ребра
+        if 'csr' not in self._cache:
+            n = len(self._nodes)
+            edges = self.edge_array()
+            ids = np.arange(len(edges), dtype=np.int64)
+            rows = np.concatenate([edges[:, 0], edges[:, 1]])
+            cols = np.concatenate([edges[:, 1], edges[:, 0]])
+            ids = np.concatenate([ids, ids])
+            order = np.lexsort((ids, rows))
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+            self._cache['csr'] = (indptr, cols[order], ids[order])
+        return self._cache['csr']
+
+    def _edge_order(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Как в networkx: по меньшему из номеров концов, затем по порядку добавления
+        if 'order' not in self._cache:
+            edges = self.edge_array()
+            lo, hi = edges.min(axis=1), edges.max(axis=1)
+            order = np.lexsort((np.arange(len(edges)), lo))
+            self._cache['order'] = (order, lo[order], hi[order])
+        return self._cache['order']
+
+    def components(self, exclude: np.ndarray | None = None) -> np.ndarray:
+        # Номер связной компоненты каждого узла без учёта узлов из маски exclude (для них -1).
+        # Компоненты нумеруются в порядке появления их первого узла.
+        n = len(self._nodes)
+        keep = np.ones(n, dtype=bool) if exclude is None else ~np.asarray(exclude, dtype=bool)
+        labels = np.full(n, -1, dtype=np.int64)
+        kept = np.flatnonzero(keep)
+        if not kept.size:
+            return labels
+
+        edges = self.edge_array()
+        edges = edges[keep[edges[:, 0]] & keep[edges[:, 1]]]
+        adjacency = sps.coo_matrix(
+            (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n, n)
+        )
+        raw = csgraph.connected_components(adjacency, directed=False)[1][kept]
+        unique, first = np.unique(raw, return_index=True)
+        renumber = np.empty(unique.max() + 1, dtype=np.int64)
+        renumber[unique[np.argsort(first)]] = np.arange(len(unique))
+        labels[kept] = renumber[raw]
+        return labels
+
+    def _cuts(self, node) -> bool:
+        return bool(self._is_cut and self._is_cut(node))
+
+    def is_connected(self) -> bool:
+        if self._connectivity is None:
+            self._connectivity = UnionFind.from_labels(self.components())
+        return bool(self._nodes) and self._connectivity.count == 1
+
+    def sync_cuts(self) -> bool:
+        # Перепроверяет разрезающие узлы; при изменении перестраивает множества тел
+        cut = bytearray(self._cuts(node) for node in self._nodes)
+        if self._bodies is not None and cut == self._cut:
+            return False
+        self._cut = cut
+        exclude = np.frombuffer(bytes(cut), dtype=bool)
+        self._bodies = UnionFind.from_labels(self.components(exclude=exclude))
+        return True
+
+    def body_labels(self) -> np.ndarray:
+        # Номер тела каждого узла (-1 для разрезающих) в порядке появления первого узла тела
+        if self._bodies is None:
+            self.sync_cuts()
+        labels = np.full(len(self._nodes), -1, dtype=np.int64)
+        kept = np.flatnonzero(np.frombuffer(bytes(self._cut), dtype=bool) == 0)
+        if kept.size:
+            roots = self._bodies.roots()[kept]
+            unique, first = np.unique(roots, return_index=True)
+            renumber = np.empty(unique.max() + 1, dtype=np.int64)
+            renumber[unique[np.argsort(first)]] = np.arange(len(unique))
+            labels[kept] = renumber[roots]
+        return labels
@@ -4,9 +4,34 @@ from PyQt6.QtGui import QPainter, QPen, QColor, QFont, QPixmap, QTransform
 from PyQt6.QtCore import Qt, QPointF, QPoint
 from structures import *  # Пользовательские структуры данных (например, Beam, Segment, Force и т.п.)
 import math
+import os
+
+# Каталог с изображениями элементов балки (не зависит от текущего каталога)
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+IMAGE_NAMES = ("arrow.svg", "circlearrow.svg", "support0.svg", "support1.svg", "support2.svg", "hinge.svg")
 
 # Класс GridWidget — виджет с координатной плоскостью и элементами балки
 class GridWidget(QWidget):
+    # SVG разбирается один раз, а не при каждой перерисовке
+    _pixmaps: dict[tuple[str, bool], QPixmap] = {}
+
+    @staticmethod
+    def pixmap(name: str, mirrored: bool = False) -> QPixmap:
+        pixmap = GridWidget._pixmaps.get((name, mirrored))
+        if pixmap is None:
+            pixmap = QPixmap(os.path.join(IMAGES_DIR, name))
+            if mirrored:
+                pixmap = pixmap.transformed(QTransform().scale(-1, 1))
+            GridWidget._pixmaps[(name, mirrored)] = pixmap
+        return pixmap
+
+    # Загрузка всех изображений заранее, пока приложение простаивает после запуска
+    @staticmethod
+    def preload_images():
+        for name in IMAGE_NAMES:
+            GridWidget.pixmap(name)
+        GridWidget.pixmap("circlearrow.svg", mirrored=True)
+
     def __init__(self):
         super().__init__()
         self.scale = 40.0  # Масштаб по умолчанию (пикселей на 1 условную единицу)
@@ -17,6 +42,7 @@ class GridWidget(QWidget):
         self.coord_limit = 10000  # Ограничение по координатам (в логических единицах)
         self.margin = 40  # Отступ от краёв (пока не используется)
         self.beam = Beam()  # Объект балки, содержащий узлы, сегменты, нагрузки и т.д.
+        self.beam.activate()  # Элементы, которые создают диалоги, нумеруются в реестре этой балки
 
     # Метод отрисовки при каждом обновлении окна
     def paintEvent(self, event):
@@ -208,7 +234,7 @@ class GridWidget(QWidget):
         painter.save()
         painter.translate(x, y)
         painter.rotate(-force.angle)
-        painter.drawPixmap(-size_x, -size_y // 2, size_x, size_y, QPixmap("images\\arrow.svg"))
+        painter.drawPixmap(-size_x, -size_y // 2, size_x, size_y, self.pixmap("arrow.svg"))
         painter.restore()
 
         text = f'{force.value} Н'
@@ -225,9 +251,9 @@ class GridWidget(QWidget):
         painter.save()
         painter.translate(x, y)
         if torque.value < 0:
-            painter.drawPixmap(-size // 2, -size // 2, size, size, QPixmap("images\\circlearrow.svg").transformed(QTransform().scale(-1, 1)))
+            painter.drawPixmap(-size // 2, -size // 2, size, size, self.pixmap("circlearrow.svg", mirrored=True))
         else:
-            painter.drawPixmap(-size // 2, -size // 2, size, size, QPixmap("images\\circlearrow.svg"))
+            painter.drawPixmap(-size // 2, -size // 2, size, size, self.pixmap("circlearrow.svg"))
         painter.restore()
 
         text = f'{torque.value} Нм'
@@ -269,9 +295,9 @@ class GridWidget(QWidget):
                 painter.rotate(-node.support.angle)
 
                 match node.support.support_type:
-                    case Support.Type.FIXED: image = QPixmap("images\\support0.svg")
-                    case Support.Type.PINNED: image = QPixmap("images\\support1.svg")
-                    case Support.Type.ROLLER: image = QPixmap("images\\support2.svg")
+                    case Support.Type.FIXED: image = self.pixmap("support0.svg")
+                    case Support.Type.PINNED: image = self.pixmap("support1.svg")
+                    case Support.Type.ROLLER: image = self.pixmap("support2.svg")
                 painter.drawPixmap(-size // 2, -size // 2 + 12, size, size, image)
                 painter.restore()
 
@@ -280,7 +306,7 @@ class GridWidget(QWidget):
             if node.hinge:
                 size = int(2 * self.scale)
                 size = 35 if size > 35 else size
-                painter.drawPixmap(int(x - size // 2), int(y - size // 2), size, size, QPixmap("images\\hinge.svg"))
+                painter.drawPixmap(int(x - size // 2), int(y - size // 2), size, size, self.pixmap("hinge.svg"))
                 node_text_pen = Qt.GlobalColor.red
                 node_brush = QColor(255, 0, 0, 127)
 
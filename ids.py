@@ -1,26 +1,165 @@
-from abc import ABCMeta, ABC
+import threading
+from abc import ABC
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 
-class _IDMeta(ABCMeta):
-    def __new__(cls, name, bases, dct):
-        dct['_next_id'] = 1
-        dct['_used_ids'] = set()
-        return super().__new__(cls, name, bases, dct)
+class IDAllocator:
+    # Занятые номера одного класса. Номера, идущие подряд от нуля, отмечаются
+    # в байтовой карте (байт на номер), редкие далёкие и отрицательные — в множестве.
+    # Новый номер — первый свободный, начиная со следующего за последним выданным.
+    __slots__ = ('_used', '_sparse', '_next', '_count')
+    DENSE_GAP = 4096
 
+    def __init__(self):
+        self.reset()
 
-class IDNumerator(ABC, metaclass=_IDMeta):
-    def __init__(self, custom_id: int | None = None):
-        cls = self.__class__
-        if custom_id is not None:
-            if custom_id in cls._used_ids:
-                raise ValueError(f"ID {custom_id} уже занят в {cls.__name__}")
-            self._id = int(custom_id)
+    def reset(self):
+        self._used = bytearray()
+        self._sparse: set[int] = set()
+        self._next = 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, value: int) -> bool:
+        if 0 <= value < len(self._used):
+            return self._used[value] == 1
+        return value in self._sparse
+
+    def claim(self, value: int):
+        if 0 <= value < len(self._used) + IDAllocator.DENSE_GAP:
+            if value >= len(self._used):
+                self._grow(value + 1)
+            self._used[value] = 1
+        else:
+            self._sparse.add(value)
+        self._count += 1
+
+    def _grow(self, size: int):
+        old_size = len(self._used)
+        self._used.extend(bytes(max(size, 2 * old_size) - old_size))
+        # Номера из множества, попавшие в расширенную карту, переносятся в неё
+        for value in [value for value in self._sparse if old_size <= value < len(self._used)]:
+            self._sparse.remove(value)
+            self._used[value] = 1
+
+    def allocate(self) -> int:
+        value = self._next
+        used = self._used
+        if value < len(used) and used[value]:
+            value = used.find(0, value)
+            if value == -1:
+                value = len(used)
+        while value >= len(used) and value in self._sparse:
+            value += 1
+        self.claim(value)
+        self._next = value + 1
+        return value
+
+    def release(self, value: int):
+        if value not in self:
+            return
+        if 0 <= value < len(self._used):
+            self._used[value] = 0
         else:
-            while cls._next_id in cls._used_ids:
-                cls._next_id += 1
-            self._id = int(cls._next_id)
-            cls._next_id += 1
-        cls._used_ids.add(self._id)
+            self._sparse.remove(value)
+        self._count -= 1
+
+
+class IDRegistry:
+    # Номера элементов одной модели (балки и её подбалок) отдельно для каждого класса.
+    # Потокобезопасен; блокировка доступна снаружи для составных операций.
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._allocators: dict[type, IDAllocator] = {}
+
+    def _allocator(self, cls: type) -> IDAllocator:
+        allocator = self._allocators.get(cls)
+        if allocator is None:
+            allocator = self._allocators[cls] = IDAllocator()
+        return allocator
+
+    def allocate(self, cls: type, custom_id: int | None = None) -> int:
+        with self.lock:
+            allocator = self._allocator(cls)
+            if custom_id is None:
+                return allocator.allocate()
+            custom_id = int(custom_id)
+            if custom_id in allocator:
+                raise ValueError(f"ID {custom_id} уже занят в {cls.__name__}")
+            allocator.claim(custom_id)
+            return custom_id
+
+    def change(self, cls: type, old_id: int, new_id: int) -> int:
+        with self.lock:
+            allocator = self._allocator(cls)
+            if new_id in allocator:
+                raise ValueError(f"ID {new_id} уже занят в {cls.__name__}")
+            allocator.release(old_id)
+            allocator.claim(new_id)
+            return new_id
+
+    def renumber(self, *objects: "IDNumerator"):
+        # Следующие свободные номера без освобождения старых (после reset).
+        # Объект из другого реестра переходит в этот, а старый номер там освобождается
+        with self.lock:
+            for obj in objects:
+                if obj._registry is not self:
+                    obj._registry.release(type(obj), obj._id)
+                    obj._registry = self
+                obj._id = self._allocator(type(obj)).allocate()
+
+    def release(self, cls: type, value: int):
+        with self.lock:
+            self._allocator(cls).release(value)
+
+    def used(self, cls: type) -> int:
+        with self.lock:
+            return len(self._allocator(cls))
+
+    def reset(self):
+        with self.lock:
+            self._allocators.clear()
+
+
+# Реестр, в котором нумеруются новые элементы. Свой для каждого потока
+# (и контекста asyncio): по умолчанию создаётся при первом обращении.
+_current_registry: ContextVar[IDRegistry] = ContextVar('id_registry')
+
+
+def current_registry() -> IDRegistry:
+    try:
+        return _current_registry.get()
+    except LookupError:
+        registry = IDRegistry()
+        _current_registry.set(registry)
+        return registry
+
+
+def activate_registry(registry: IDRegistry):
+    _current_registry.set(registry)
+
+
+@contextmanager
+def use_registry(registry: IDRegistry):
+    token = _current_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _current_registry.reset(token)
+
+
+class IDNumerator(ABC):
+    # _registry — реестр, в котором выдан номер: смена номера проверяется в нём,
+    # в каком бы потоке и при каком текущем реестре она ни происходила
+    __slots__ = ('_id', '_registry')
+
+    def __init__(self, custom_id: int | None = None, registry: IDRegistry | None = None):
+        registry = registry or current_registry()
+        self._registry = registry
+        self._id = registry.allocate(self.__class__, custom_id)
 
     @property
     def id(self) -> int:
@@ -28,18 +167,10 @@ class IDNumerator(ABC, metaclass=_IDMeta):
 
     @id.setter
     def id(self, new_id: int):
-        cls = self.__class__
         new_id = int(new_id)
         if new_id == self._id:
             return  # ничего не меняем
-        if new_id in cls._used_ids:
-            raise ValueError(f"ID {new_id} уже занят в {cls.__name__}")
-        # Снимаем старый ID
-        if self._id in cls._used_ids:
-            cls._used_ids.remove(self._id)
-        # Присваиваем новый
-        self._id = new_id
-        cls._used_ids.add(self._id)
+        self._id = self._registry.change(self.__class__, self._id, new_id)
 
 
 # Пример использования
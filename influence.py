@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import numpy as np
+
+from errors import IncorrectInputError, NegativeOrZeroValueError, NonExistentError
+
+DEFAULT_POINTS = 101
+# Память под правые части одной пачки положений груза, байт; число положений
+# в пачке подбирается по числу уравнений системы
+CHUNK_BYTES = 1 << 26
+
+
+class AxleTrain:
+    # Состав из сосредоточенных грузов: (расстояние от первой оси, нагрузка на ось).
+    # Состав едет по пути линий влияния в сторону роста пути, первая ось впереди.
+    __slots__ = ('offsets', 'loads')
+
+    def __init__(self, axles: list[tuple[float, float]]):
+        if not axles:
+            raise IncorrectInputError("Состав должен содержать хотя бы одну ось!")
+        axles = sorted((float(offset), float(load)) for offset, load in axles)
+        if axles[0][0] < 0: raise NegativeOrZeroValueError("Расстояние до оси не может быть отрицательным!")
+        if any(load <= 0 for _, load in axles): raise NegativeOrZeroValueError("Нагрузка на ось должна быть положительной!")
+        self.offsets = np.array([offset for offset, _ in axles]) - axles[0][0]
+        self.loads = np.array([load for _, load in axles])
+
+    @property
+    def length(self) -> float:
+        return float(self.offsets[-1])
+
+    def reversed(self) -> AxleTrain:
+        # Тот же состав, идущий задом наперёд
+        return AxleTrain(list(zip((self.length - self.offsets).tolist(), self.loads.tolist())))
+
+    def __repr__(self):
+        return f"AxleTrain(axles={list(zip(self.offsets.tolist(), self.loads.tolist()))})"
+
+
+class TrainExtreme:
+    __slots__ = ('value', 'lead')
+
+    def __init__(self, value: float, lead: float):
+        self.value = value
+        # Положение первой оси на пути; может выходить за конец пути, пока на нём остальные оси
+        self.lead = lead
+
+    def __repr__(self):
+        return f"TrainExtreme(value={self.value}, lead={self.lead})"
+
+
+class InfluenceLines:
+    # Линии влияния неизвестных (реакций опор и усилий в шарнирах): values[i, k] — значение
+    # неизвестного names[i] от единичной силы в точке k. Точки сегмента segments[j] занимают
+    # срез offsets[j]:offsets[j + 1] и упорядочены по s; path — расстояние вдоль пути,
+    # составленного из сегментов в порядке segments. labels — читаемые подписи, как в ответе solve.
+    def __init__(self, segments: list, offsets: np.ndarray, names: list[str], labels: dict[str, int],
+                 segment: np.ndarray, s: np.ndarray, x: np.ndarray, y: np.ndarray, path: np.ndarray,
+                 values: np.ndarray):
+        self.segments = segments
+        self.offsets = offsets
+        self.names = names
+        self.labels = labels
+        self.segment = segment
+        self.s = s
+        self.x = x
+        self.y = y
+        self.path = path
+        self.values = values
+        self._index = {segment: i for i, segment in enumerate(segments)}
+        self._rows = {name: i for i, name in enumerate(names)}
+
+    def __len__(self):
+        return len(self.s)
+
+    def row(self, name: str) -> int:
+        # Номер строки по читаемой подписи или по внутреннему имени неизвестного
+        if name in self.labels:
+            return self.labels[name]
+        if name in self._rows:
+            return self._rows[name]
+        raise NonExistentError(f"Неизвестная {name} не существует!")
+
+    def line(self, name: str) -> np.ndarray:
+        return self.values[self.row(name)]
+
+    def of(self, segment) -> dict[str, np.ndarray]:
+        i = self._index[segment]
+        part = slice(self.offsets[i], self.offsets[i + 1])
+        return {'s': self.s[part], 'x': self.x[part], 'y': self.y[part], 'path': self.path[part],
+                'values': self.values[:, part]}
+
+    def envelope(self, train: AxleTrain) -> dict[str, dict[str, TrainExtreme]]:
+        # Наибольшие и наименьшие значения всех неизвестных при проходе состава.
+        # Между точками линии влияния линейны, поэтому сумма по осям достигает
+        # экстремума, когда одна из осей стоит в точке линии — эти положения
+        # первой оси и перебираются, все неизвестные и оси обрабатываются массивами.
+        # Путь — сегменты подряд, конец каждого — начало следующего
+        for previous, segment in zip(self.segments, self.segments[1:]):
+            if previous.node2 is not segment.node1:
+                raise IncorrectInputError("Сегменты линий влияния не образуют непрерывного пути!")
+        path = self.path
+        leads = np.unique((path[:, None] + train.offsets).ravel())
+        total = np.zeros((len(self.names), len(leads)))
+        for offset, load in zip(train.offsets.tolist(), train.loads.tolist()):
+            at = leads - offset
+            on_path = (at >= path[0]) & (at <= path[-1])
+            right = np.clip(np.searchsorted(path, at, side='right'), 1, len(path) - 1)
+            left = right - 1
+            span = path[right] - path[left]
+            share = np.divide(at - path[left], span, out=np.zeros_like(at), where=span > 0)
+            share = np.clip(share, 0, 1)
+            contribution = self.values[:, left] * (1 - share) + self.values[:, right] * share
+            total += load * np.where(on_path, contribution, 0)
+
+        low, high = np.argmin(total, axis=1), np.argmax(total, axis=1)
+        rows = np.arange(len(self.names))
+        labels = {row: label for label, row in self.labels.items()}
+        return {
+            labels.get(i, self.names[i]): {
+                'min': TrainExtreme(float(total[i, low[i]]), float(leads[low[i]])),
+                'max': TrainExtreme(float(total[i, high[i]]), float(leads[high[i]])),
+            }
+            for i in rows.tolist()
+        }
+
+
+def compute_influence_lines(system, factorization, labels: dict[str, int], segments: list,
+                            points: int = DEFAULT_POINTS, step: float | None = None,
+                            direction: tuple[float, float] = (0.0, -1.0)) -> InfluenceLines:
+    # Единичная сила направления direction ставится в каждую точку сегментов. Её вклад
+    # в правую часть — три числа в строках тела сегмента, поэтому правые части всех
+    # положений собираются массивами и решаются пачками на одном разложении матрицы.
+    if points < 2:
+        raise IncorrectInputError("Число точек на сегменте должно быть не меньше 2!")
+    if step is not None and step <= 0:
+        raise IncorrectInputError("Шаг линии влияния должен быть положительным!")
+    if not segments:
+        raise IncorrectInputError("Не выбрано ни одного сегмента!")
+
+    n_edges = len(segments)
+    lengths = np.array([segment.length for segment in segments], dtype=np.float64)
+    starts = np.array([(segment.node1.x, segment.node1.y) for segment in segments], dtype=np.float64)
+    ends = np.array([(segment.node2.x, segment.node2.y) for segment in segments], dtype=np.float64)
+    rows = np.array([system.segment_rows[segment] for segment in segments], dtype=np.intp)
+
+    if step is None:
+        counts = np.full(n_edges, points, dtype=np.int64)
+    else:
+        counts = np.maximum(np.ceil(lengths / step).astype(np.int64) + 1, 2)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    seg = np.repeat(np.arange(n_edges), counts)
+    local = np.arange(len(seg)) - offsets[seg]
+    share = local / (counts[seg] - 1)
+    s = share * lengths[seg]
+    xy = starts[seg] + share[:, None] * (ends[seg] - starts[seg])
+    path = s + np.concatenate([[0], np.cumsum(lengths)[:-1]])[seg]
+
+    px, py = direction
+    n_rows, n_points = system.shape[0], len(s)
+    values = np.empty((system.shape[1], n_points))
+    chunk = max(1, CHUNK_BYTES // (8 * n_rows))
+    for first in range(0, n_points, chunk):
+        part = slice(first, min(first + chunk, n_points))
+        columns = np.arange(part.stop - part.start)
+        row = rows[seg[part]]
+        rhs = np.zeros((n_rows, len(columns)))
+        rhs[row, columns] = -px
+        rhs[row + 1, columns] = -py
+        rhs[row + 2, columns] = px * xy[part, 1] - py * xy[part, 0]
+        values[:, part] = factorization.solve(rhs)
+
+    return InfluenceLines(segments, offsets, list(system.columns), labels, seg, s, xy[:, 0], xy[:, 1], path, values)
@@ -7,6 +7,7 @@ from structures import *
 from grid import GridWidget
 from dialogs import DialogManager
 from serialization import *
+from journal import EditJournal
 
 # Импорт пользовательских классов и модулей
 from structures import *          # Содержит определения структур: Beam, Node, Force, и т.д.
@@ -16,7 +17,8 @@ from dialogs import DialogManager # Управляет диалогами для
 
 # Главный виджет приложения
 class MainWindow(QWidget):
-    def __init__(self):
+    # journal_path — путь автосохранения без расширения (см. EditJournal)
+    def __init__(self, journal_path: str):
         super().__init__()
 
         # Основной горизонтальный макет интерфейса (делит окно на левую панель и область рисования)
@@ -25,8 +27,11 @@ class MainWindow(QWidget):
         # Виджет для отрисовки балки и элементов на координатной плоскости
         self.grid_widget = GridWidget()
 
+        # Журнал правок: автосохранение после каждой правки и восстановление после сбоя
+        self.journal = EditJournal(journal_path)
+
         # Менеджер диалогов, получает ссылку на grid_widget для взаимодействия
-        self.dialogs = DialogManager(self.grid_widget)
+        self.dialogs = DialogManager(self.grid_widget, self.journal)
 
         # Вертикальный макет для кнопок на левой панели
         left_layout = QVBoxLayout()
@@ -170,6 +175,7 @@ class MainWindow(QWidget):
         try:
             self.clear_field()
             load_beam_from_file(filename, self.grid_widget.beam)
+            self.journal.compact(self.grid_widget.beam)  # Загруженная балка — новый снимок автосохранения
             self.grid_widget.update()
 
         except Exception as e:
@@ -192,14 +198,42 @@ class MainWindow(QWidget):
             self.clear_field()  # Очистка подтверждена
 
 
+    # Предлагает восстановить балку из автосохранения, если прошлый сеанс его оставил
+    def restore_session(self):
+        if not self.journal.has_session():
+            return
+        box = QMessageBox(self)
+        box.setWindowTitle("Восстановление")
+        box.setText("Найдена несохранённая балка из прошлого сеанса. Восстановить её?")
+        button_yes = box.addButton("Да", QMessageBox.ButtonRole.YesRole)
+        button_no = box.addButton("Нет", QMessageBox.ButtonRole.NoRole)
+        button_yes.setStyleSheet("background-color: #f3e0dc")
+        button_no.setStyleSheet("background-color: #f3e0dc")
+        box.setStyleSheet("background-color: #d4a59a;")
+        box.exec()
+
+        if box.clickedButton() != button_yes:
+            self.journal.discard()
+            return
+        try:
+            self.grid_widget.beam = self.journal.restore()
+            self.grid_widget.beam.activate()
+            self.grid_widget.update()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка восстановления", str(e))
+
+    # Дописывает журнал правок перед закрытием окна
+    def closeEvent(self, event):
+        self.journal.close()
+        super().closeEvent(event)
+
+
     # Метод, полностью очищающий поле от элементов и сбрасывающий ID
     def clear_field(self):
-        for cls in [Force, Torque, Support, Hinge, Node, BeamSegment, Beam]:
-            cls._next_id = 1
-            cls._used_ids.clear()
-
-        # Создание новой пустой балки
+        # Создание новой пустой балки (со своим реестром номеров, начинающихся с 1)
         self.grid_widget.beam = Beam()
+        self.grid_widget.beam.activate()
+        self.journal.discard()  # Очищенное поле восстанавливать не нужно
 
         # Обновление отображения
         self.grid_widget.update()
\ No newline at end of file
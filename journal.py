@@ -0,0 +1,235 @@
+import glob
+import json
+import os
+import queue
+import threading
+
+from ids import use_registry
+from serialization import (beam_to_dict, load_beam_from_file, support_to_dict, support_from_dict, force_to_dict,
+                           force_from_dict, torque_to_dict, torque_from_dict)
+from structures import Beam, BeamSegment, Node
+
+# Автосохранение по умолчанию: снимки autosave.<номер>.bm и журнал autosave.journal
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".balki", "autosave")
+
+
+class EditJournal:
+    # Журнал правок модели для автосохранения. Каждая правка — строка JSON с порядковым
+    # номером, которая дописывается в конец файла журнала фоновым потоком, так что запись
+    # правки стоит столько же, сколько сама правка. Когда правок накапливается больше,
+    # чем COMPACT_EVERY и чем элементов в модели, журнал сжимается: модель сохраняется
+    # целиком в снимок с номером последней правки, а журнал очищается. Средняя стоимость
+    # правки остаётся постоянной.
+    #
+    # Восстановление: последний снимок и правки журнала с большими номерами. Если процесс
+    # упал между записью снимка и очисткой журнала, старые правки пропускаются по номеру,
+    # а оборванная последняя строка журнала отбрасывается.
+    #
+    # Узлы и сегменты в правках задаются координатами, а не номерами: reassign_ids при
+    # каждом решении перенумеровывает элементы, а координаты узлов от этого не меняются.
+    COMPACT_EVERY = 256
+
+    def __init__(self, path: str = DEFAULT_PATH, compact_every: int | None = None):
+        self.path = path
+        self.compact_every = compact_every or EditJournal.COMPACT_EVERY
+        self.error: Exception | None = None
+        self._journal = f"{path}.journal"
+        self._seq = max(self._snapshot()[0], self._last_seq())
+        self._edits = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, name="edit-journal", daemon=True)
+        self._thread.start()
+
+    # Правки, которые вносит DialogManager
+
+    def segment(self, beam: Beam, segment: BeamSegment):
+        self.record(beam, {'op': 'segment', 'segment': ends(segment)})
+
+    def support(self, beam: Beam, node: Node):
+        self.record(beam, {'op': 'support', 'node': [node.x, node.y],
+                           'support': without_ids(support_to_dict(node.support))})
+
+    def hinge(self, beam: Beam, node: Node):
+        self.record(beam, {'op': 'hinge', 'node': [node.x, node.y]})
+
+    def force(self, beam: Beam, segment: BeamSegment, force):
+        self.record(beam, {'op': 'force', 'segment': ends(segment), 'force': without_ids(force_to_dict(force))})
+
+    def torque(self, beam: Beam, segment: BeamSegment, torque):
+        self.record(beam, {'op': 'torque', 'segment': ends(segment), 'torque': without_ids(torque_to_dict(torque))})
+
+    def record(self, beam: Beam, edit: dict):
+        self._seq += 1
+        self._queue.put(('append', json.dumps({'seq': self._seq, **edit}) + '\n'))
+        self._edits += 1
+        if self._edits >= max(self.compact_every, len(beam.graph.nodes) + beam.graph.number_of_edges()):
+            self.compact(beam)
+
+    def compact(self, beam: Beam):
+        # Снимок собирается здесь, пока модель не изменилась, а пишется в фоне
+        self._seq += 1
+        self._queue.put(('snapshot', self._seq, beam_to_dict(beam)))
+        self._edits = 0
+
+    def flush(self):
+        # Ждёт, пока все правки будут записаны
+        self._queue.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        # Дописывает очередь и останавливает поток; ошибка записи остаётся в error
+        self._queue.put(('stop',))
+        self._thread.join()
+
+    def has_session(self) -> bool:
+        return bool(self._snapshot()[1]) or bool(self._read_edits(0))
+
+    def restore(self) -> Beam:
+        # Новая балка: последний снимок и правки после него
+        self.flush()
+        seq, snapshot = self._snapshot()
+        beam = Beam()
+        if snapshot:
+            load_beam_from_file(snapshot, beam)
+        with use_registry(beam.registry):
+            for edit in self._read_edits(seq):
+                apply_edit(beam, edit)
+        return beam
+
+    def discard(self):
+        self._queue.put(('discard',))
+        self.flush()
+
+    def _snapshot(self) -> tuple[int, str | None]:
+        # Номер и имя последнего снимка
+        best = (0, None)
+        for filename in glob.glob(glob.escape(self.path) + ".*.bm"):
+            number = filename[len(self.path) + 1:-len(".bm")]
+            if number.isdigit() and int(number) >= best[0]:
+                best = (int(number), filename)
+        return best
+
+    def _read_edits(self, after: int) -> list[dict]:
+        edits = []
+        if not os.path.exists(self._journal):
+            return edits
+        with open(self._journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    edit = json.loads(line)
+                except json.JSONDecodeError:
+                    # Строка, которую не успели дописать до падения
+                    break
+                if edit['seq'] > after:
+                    edits.append(edit)
+        return edits
+
+    def _last_seq(self) -> int:
+        edits = self._read_edits(0)
+        return edits[-1]['seq'] if edits else 0
+
+    def _work(self):
+        while True:
+            # Все накопившиеся правки пишутся одним вызовом
+            tasks = [self._queue.get()]
+            while True:
+                try:
+                    tasks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            try:
+                lines = []
+                for task in tasks:
+                    if task[0] == 'append':
+                        lines.append(task[1])
+                        continue
+                    self._append(lines)
+                    lines = []
+                    if task[0] == 'snapshot':
+                        self._write_snapshot(task[1], task[2])
+                    elif task[0] == 'discard':
+                        self._remove(keep=None)
+                    elif task[0] == 'stop':
+                        stop = True
+                self._append(lines)
+            except Exception as e:
+                self.error = e
+            finally:
+                for _ in tasks:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _append(self, lines: list[str]):
+        if not lines:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self._journal)), exist_ok=True)
+        with open(self._journal, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_snapshot(self, seq: int, data: dict):
+        filename = f"{self.path}.{seq}.bm"
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(filename + ".tmp", filename)
+        self._remove(keep=filename)
+
+    def _remove(self, keep: str | None):
+        # Журнал и снимки, кроме keep
+        if os.path.exists(self._journal):
+            os.remove(self._journal)
+        for filename in glob.glob(glob.escape(self.path) + ".*.bm"):
+            if filename != keep:
+                os.remove(filename)
+
+
+def ends(segment: BeamSegment) -> list[list[float]]:
+    return [[segment.node1.x, segment.node1.y], [segment.node2.x, segment.node2.y]]
+
+
+def without_ids(data: dict) -> dict:
+    # Номера к моменту восстановления устаревают; при повторе элементы нумеруются заново
+    return {key: without_ids(value) if isinstance(value, dict) else value
+            for key, value in data.items() if key != 'id'}
+
+
+def apply_edit(beam: Beam, edit: dict):
+    # Повторяет правку так же, как её внёс DialogManager; элементы ищутся по координатам узлов
+    def node(x: float, y: float) -> Node:
+        found = beam.find_node(x, y)
+        if found is None:
+            raise KeyError(f"Нет узла в точке ({x}, {y})")
+        return found
+
+    def segment(first: list[float], second: list[float]) -> BeamSegment:
+        found = beam.graph.segment(node(*first), node(*second))
+        if found is None:
+            raise KeyError(f"Нет сегмента между точками {first} и {second}")
+        return found
+
+    op = edit['op']
+    if op == 'segment':
+        (x1, y1), (x2, y2) = edit['segment']
+        beam.add_segment(BeamSegment(beam.find_node(x1, y1) or Node(x1, y1), beam.find_node(x2, y2) or Node(x2, y2)))
+    elif op == 'support':
+        target = node(*edit['node'])
+        target.add_support(support_from_dict(edit['support']))
+        target.hinge = None
+    elif op == 'hinge':
+        target = node(*edit['node'])
+        target.add_hinge()
+        target.support = None
+    elif op == 'force':
+        segment(*edit['segment']).add_force(force_from_dict(edit['force']))
+    elif op == 'torque':
+        segment(*edit['segment']).add_torque(torque_from_dict(edit['torque']))
+    else:
+        raise ValueError(f"Неизвестная правка: {op}")
@@ -0,0 +1,44 @@
+import importlib
+import sys
+import threading
+
+
+class LazyModule:
+    # Модуль, который импортируется только при первом обращении к его атрибуту.
+    # Тяжёлые библиотеки (sympy, networkx, scipy) не замедляют запуск, пока не нужны.
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None or self._name in sys.modules
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"LazyModule({self._name!r}, loaded={self.loaded})"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def preload(*names: str) -> threading.Thread:
+    # Фоновый импорт модулей, пока пользователь ещё не запросил решение
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
@@ -1,11 +1,19 @@
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from interface import MainWindow
+from journal import DEFAULT_PATH
+from grid import GridWidget
+from lazy import preload
 import sys
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(DEFAULT_PATH)
     window.resize(800, 600)
     window.setWindowTitle("Определение реакций опор")
     window.show()
+    # Изображения и тяжёлые библиотеки решателя загружаются после показа окна
+    QTimer.singleShot(0, GridWidget.preload_images)
+    QTimer.singleShot(0, window.restore_session)
+    preload("sympy", "scipy.linalg", "scipy.sparse.linalg")
     sys.exit(app.exec())
\ No newline at end of file
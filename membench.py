@@ -0,0 +1,63 @@
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from ids import IDRegistry, use_registry
+from structures import BeamSegment, Node, Force, Torque, Support, Hinge
+
+# Что измеряется: фабрика одного элемента модели
+ELEMENTS = {
+    'Force': lambda i: Force(10, 30, 0.5, 1, False),
+    'Torque': lambda i: Torque(5, 0.5, False),
+    'Hinge': lambda i: Hinge(),
+    'Node': lambda i: Node(i, 0),
+    'Support': lambda i: Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False),
+    'BeamSegment': lambda i: BeamSegment(Node(i, 0), Node(i + 1, 0)),
+}
+
+
+def measure(name: str, n: int = 100000) -> float:
+    # Прирост памяти на элемент, включая номера в реестре
+    gc.collect()
+    factory = ELEMENTS[name]
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    with use_registry(IDRegistry()):
+        elements = [factory(i) for i in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    size = (after - before - sys.getsizeof(elements)) / n
+    del elements
+    return size
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='membench.py', description="Память на элемент модели балки")
+    parser.add_argument('-n', type=int, default=100000, help="число элементов в замере")
+    parser.add_argument('--save', help="сохранить замер в JSON-файл")
+    parser.add_argument('--baseline', help="JSON-файл прошлого замера (--save) для сравнения")
+    args = parser.parse_args(argv)
+
+    # Сравнение только с замером, сделанным этим же скриптом: числа зависят от версии Python
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+    sizes = {}
+    print(f"{'элемент':<12} {'байт':>8} {'было':>8} {'выигрыш':>8}")
+    for name in ELEMENTS:
+        size = sizes[name] = measure(name, args.n)
+        before = baseline.get(name)
+        ratio = f"{before / size:.1f}x" if before else "—"
+        print(f"{name:<12} {size:>8.0f} {f'{before:.0f}' if before else '—':>8} {ratio:>8}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(sizes, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
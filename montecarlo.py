@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import math
+import os
+from enum import Enum
+from multiprocessing import Pool
+
+import numpy as np
+
+from errors import IncorrectInputError, NegativeOrZeroValueError, NonExistentError
+from lazy import lazy_import
+from solver import DenseFactorization, SparseFactorization
+
+sps = lazy_import('scipy.sparse')
+
+# Выборок в одной задаче процесса и в одной пачке внутри неё
+CHUNK = 1 << 17
+BATCH = 1 << 14
+# Пробная выборка задаёт диапазон гистограмм для квантилей
+PILOT = 10000
+QUANTILE_BINS = 4096
+# Ширина диапазона гистограммы в стандартных отклонениях пробной выборки
+HISTOGRAM_SPREAD = 10
+FORCE_FIELDS = ('value', 'angle', 'node1_dist')
+TORQUE_FIELDS = ('value',)
+
+
+class Deviation:
+    # Случайное отклонение параметра нагрузки от заданного в ней значения
+    __slots__ = ('type', 'spread')
+
+    class Type(Enum):
+        NORMAL = 0
+        UNIFORM = 1
+
+    def __init__(self, deviation_type: Type, spread: float):
+        if spread < 0: raise NegativeOrZeroValueError("Разброс не может быть отрицательным!")
+        self.type = deviation_type
+        self.spread = float(spread)
+
+    @classmethod
+    def normal(cls, std: float) -> Deviation:
+        return cls(cls.Type.NORMAL, std)
+
+    @classmethod
+    def uniform(cls, half_width: float) -> Deviation:
+        return cls(cls.Type.UNIFORM, half_width)
+
+    def __repr__(self):
+        return f"Deviation(type={self.type.name}, spread={self.spread})"
+
+
+class ReactionStatistics:
+    # Накопленные характеристики неизвестных по выборкам: среднее и M2 (сумма квадратов
+    # отклонений) сливаются по формулам Чана, квантили берутся из гистограмм
+    # на общем диапазоне [low, high] с двумя крайними ячейками для выбросов.
+    def __init__(self, labels: list[str], low: np.ndarray, high: np.ndarray, bins: int = QUANTILE_BINS):
+        n = len(labels)
+        self.labels = labels
+        self.low = low
+        self.high = high
+        self.count = 0
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.minimum = np.full(n, math.inf)
+        self.maximum = np.full(n, -math.inf)
+        self.histogram = np.zeros((n, bins + 2), dtype=np.int64)
+
+    def add(self, samples: np.ndarray):
+        # samples — массив (число неизвестных, число выборок)
+        count = samples.shape[1]
+        if count == 0:
+            return
+        mean = samples.mean(axis=1)
+        m2 = ((samples - mean[:, None]) ** 2).sum(axis=1)
+        self._merge(count, mean, m2)
+        np.minimum(self.minimum, samples.min(axis=1), out=self.minimum)
+        np.maximum(self.maximum, samples.max(axis=1), out=self.maximum)
+
+        n, slots = self.histogram.shape
+        bins = slots - 2
+        position = (samples - self.low[:, None]) / (self.high - self.low)[:, None] * bins
+        index = np.clip(np.floor(position), -1, bins).astype(np.int64) + 1
+        index += np.arange(n)[:, None] * slots
+        self.histogram += np.bincount(index.ravel(), minlength=n * slots).reshape(n, slots)
+
+    def merge(self, other: ReactionStatistics):
+        if other.count == 0:
+            return
+        self._merge(other.count, other.mean, other.m2)
+        np.minimum(self.minimum, other.minimum, out=self.minimum)
+        np.maximum(self.maximum, other.maximum, out=self.maximum)
+        self.histogram += other.histogram
+
+    def _merge(self, count: int, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        # Несмещённая оценка
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.zeros_like(self.mean)
+
+    def quantile(self, q: float) -> np.ndarray:
+        if not 0 <= q <= 1: raise IncorrectInputError("Уровень квантиля должен лежать в [0, 1]!")
+        if self.count == 0:
+            return np.full(len(self.labels), math.nan)
+        bins = self.histogram.shape[1] - 2
+        # Края ячеек: выбросы лежат между наименьшим значением и low, между high и наибольшим
+        inner = self.low[:, None] + (self.high - self.low)[:, None] * np.arange(bins + 1) / bins
+        edges = np.column_stack([np.minimum(self.minimum, self.low), inner, np.maximum(self.maximum, self.high)])
+        cumulative = np.cumsum(self.histogram, axis=1)
+        target = q * self.count
+        rows = np.arange(len(self.labels))
+        cell = np.minimum((cumulative < target).sum(axis=1), bins + 1)
+        below = np.where(cell > 0, cumulative[rows, cell - 1], 0)
+        inside = self.histogram[rows, cell]
+        share = np.divide(target - below, inside, out=np.zeros(len(rows)), where=inside > 0)
+        value = edges[rows, cell] + share * (edges[rows, cell + 1] - edges[rows, cell])
+        return np.clip(value, self.minimum, self.maximum)
+
+    def summary(self, quantiles: tuple[float, ...] = (0.05, 0.5, 0.95)) -> dict[str, dict]:
+        levels = {q: self.quantile(q) for q in quantiles}
+        std = self.std
+        return {
+            label: {
+                'mean': float(self.mean[i]),
+                'std': float(std[i]),
+                'min': float(self.minimum[i]),
+                'max': float(self.maximum[i]),
+                'quantiles': {q: float(values[i]) for q, values in levels.items()},
+            }
+            for i, label in enumerate(self.labels)
+        }
+
+
+class _Sampler:
+    # Всё, что нужно процессу для расчёта выборок: матрица системы, отображение
+    # составляющих нагрузок в строки правой части и параметры нагрузок. Разложение
+    # матрицы не пересылается: в основном процессе берётся готовое разложение балки,
+    # в остальных оно строится один раз.
+    def __init__(self, system, sparse: bool, forces: list, torques: list, variations: dict, factorization=None):
+        self.matrix = system.matrix(sparse)
+        self.sparse = sparse
+        self.base = system.rhs
+        self.factorization = factorization
+
+        n_forces = len(forces)
+        rows = np.array([system.segment_rows[segment] for segment, _ in forces] +
+                        [system.segment_rows[segment] for segment, _ in torques], dtype=np.intp)
+        # Составляющие: по три на силу (Px, Py, момент относительно начала координат) и по одной на момент
+        loading_rows = np.concatenate([rows[:n_forces], rows[:n_forces] + 1, rows[:n_forces] + 2, rows[n_forces:] + 2])
+        loading_values = np.concatenate([-np.ones(n_forces), -np.ones(n_forces), np.ones(n_forces), -np.ones(len(torques))])
+        self.loading = sps.csr_matrix((loading_values, (loading_rows, np.arange(len(loading_rows)))),
+                                      shape=(system.shape[0], len(loading_rows)))
+
+        # Разброс value задаётся в единицах самой силы, у распределённой — интенсивности
+        self.force_value = np.array([force.value for _, force in forces], dtype=np.float64)
+        self.force_length = np.array([force.length for _, force in forces], dtype=np.float64)
+        self.force_angle = np.array([force.angle for _, force in forces], dtype=np.float64)
+        self.force_dist = np.array([force.node1_dist for _, force in forces], dtype=np.float64)
+        self.force_parts = np.array([(force.part_x, force.part_y) for _, force in forces], dtype=np.float64).reshape(-1, 2)
+        # Направление силы: из точных проекций, а у нулевой силы — по углу
+        radians = np.radians(self.force_angle)
+        resultant = self.force_value * self.force_length
+        self.force_direction = np.where(
+            (resultant != 0)[:, None],
+            self.force_parts / np.where(resultant != 0, resultant, 1)[:, None],
+            np.column_stack([np.cos(radians), np.sin(radians)]),
+        )
+        self.segment_length = np.array([segment.length for segment, _ in forces], dtype=np.float64)
+        self.segment_start = np.array([(segment.node1.x, segment.node1.y) for segment, _ in forces],
+                                      dtype=np.float64).reshape(-1, 2)
+        self.segment_direction = np.array(
+            [((segment.node2.x - segment.node1.x) / segment.length, (segment.node2.y - segment.node1.y) / segment.length)
+             for segment, _ in forces], dtype=np.float64).reshape(-1, 2)
+        self.torque_value = np.array([torque.value for _, torque in torques], dtype=np.float64)
+
+        # Для каждого поля: номера нагрузок и разбросы, отдельно для нормального и равномерного
+        index = {load: i for i, (_, load) in enumerate(forces)}
+        index.update({load: i for i, (_, load) in enumerate(torques)})
+        self.deviations = {}
+        for kind, fields in (('force', FORCE_FIELDS), ('torque', TORQUE_FIELDS)):
+            for field in fields:
+                for deviation_type in Deviation.Type:
+                    chosen = [(index[load], deviation.spread) for (load, load_kind, name), deviation in variations.items()
+                              if load_kind == kind and name == field and deviation.type == deviation_type]
+                    self.deviations[(kind, field, deviation_type)] = (
+                        np.array([i for i, _ in chosen], dtype=np.intp),
+                        np.array([spread for _, spread in chosen], dtype=np.float64),
+                    )
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['factorization'] = None
+        return state
+
+    def _sample(self, rng: np.random.Generator, nominal: np.ndarray, kind: str, field: str, count: int):
+        # Возвращает None, если у поля нет разброса ни у одной нагрузки
+        normal, uniform = (self.deviations[(kind, field, deviation_type)] for deviation_type in Deviation.Type)
+        if not len(normal[0]) and not len(uniform[0]):
+            return None
+        values = np.repeat(nominal[:, None], count, axis=1)
+        if len(normal[0]):
+            values[normal[0]] += normal[1][:, None] * rng.standard_normal((len(normal[0]), count))
+        if len(uniform[0]):
+            values[uniform[0]] += uniform[1][:, None] * rng.uniform(-1, 1, (len(uniform[0]), count))
+        return values
+
+    def solve(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        if self.factorization is None:
+            self.factorization = (SparseFactorization if self.sparse else DenseFactorization)(self.matrix)
+
+        value = self._sample(rng, self.force_value, 'force', 'value', count)
+        value = (self.force_value[:, None] if value is None else value) * self.force_length[:, None]
+        angle = self._sample(rng, self.force_angle, 'force', 'angle', count)
+        if angle is None:
+            px, py = self.force_direction[:, :1] * value, self.force_direction[:, 1:] * value
+        else:
+            radians = np.radians(angle)
+            px, py = value * np.cos(radians), value * np.sin(radians)
+
+        dist = self._sample(rng, self.force_dist, 'force', 'node1_dist', count)
+        if dist is None:
+            dist = self.force_dist[:, None]
+        else:
+            dist = np.clip(dist, 0, self.segment_length[:, None])
+        x = self.segment_start[:, :1] + dist * self.segment_direction[:, :1]
+        y = self.segment_start[:, 1:] + dist * self.segment_direction[:, 1:]
+
+        torque = self._sample(rng, self.torque_value, 'torque', 'value', count)
+        if torque is None:
+            torque = self.torque_value[:, None]
+
+        shape = (len(self.force_value), count)
+        components = np.concatenate([
+            np.broadcast_to(px, shape), np.broadcast_to(py, shape), np.broadcast_to(px * y - py * x, shape),
+            np.broadcast_to(torque, (len(self.torque_value), count)),
+        ])
+        rhs = self.loading @ components + self.base[:, None]
+        return self.factorization.solve(rhs)
+
+
+_sampler: _Sampler | None = None
+
+
+def _init_worker(sampler: _Sampler):
+    global _sampler
+    _sampler = sampler
+
+
+def _run_chunk(task: tuple) -> ReactionStatistics:
+    seed, count, labels, low, high = task
+    return _collect(_sampler, seed, count, labels, low, high)
+
+
+def _collect(sampler: _Sampler, seed, count: int, labels: list[str], low: np.ndarray, high: np.ndarray) -> ReactionStatistics:
+    rng = np.random.default_rng(seed)
+    statistics = ReactionStatistics(labels, low, high)
+    for first in range(0, count, BATCH):
+        statistics.add(sampler.solve(rng, min(BATCH, count - first)))
+    return statistics
+
+
+class MonteCarlo:
+    # Распространение неопределённости нагрузок на реакции. variations связывает
+    # нагрузку балки с отклонениями её полей: {force: {'value': Deviation.normal(50)}}.
+    # Силам можно задать разброс value, angle и node1_dist, моментам — value.
+    # Выборки решаются пачками на одном разложении матрицы, задачи по CHUNK выборок
+    # раздаются процессам; у каждой задачи свой поток случайных чисел, поэтому
+    # результат при данном seed не зависит от числа процессов.
+    def __init__(self, beam, variations: dict, sparse: bool | None = None):
+        forces, torques = beam.segment_loads()
+        if beam._has_unknown_loads(forces, torques):
+            raise IncorrectInputError("Для расчёта разброса все нагрузки должны быть известны!")
+        if sparse is None:
+            sparse = len(beam.graph.edges) > beam.SPARSE_THRESHOLD
+
+        force_loads, torque_loads = {load for _, load in forces}, {load for _, load in torques}
+        checked = {}
+        for load, fields in variations.items():
+            if load in torque_loads:
+                kind, allowed = 'torque', TORQUE_FIELDS
+            elif load in force_loads:
+                kind, allowed = 'force', FORCE_FIELDS
+            else:
+                raise NonExistentError("Нагрузка с разбросом не приложена к балке!")
+            for field, deviation in fields.items():
+                if field not in allowed:
+                    raise IncorrectInputError(f"Разброс поля {field} не поддерживается!")
+                checked[(load, kind, field)] = deviation
+
+        system, factorization, labels = beam.factorized_system(sparse)
+        names = {col: label for label, col in labels.items()}
+        self.labels = [names.get(col, name) for col, name in enumerate(system.columns)]
+        self.sampler = _Sampler(system, sparse, forces, torques, checked, factorization)
+
+    def stream(self, samples: int, seed: int | None = None, workers: int | None = None):
+        # Отдаёт накопленную статистику после каждой завершённой задачи
+        if samples <= 0:
+            raise NegativeOrZeroValueError("Число выборок должно быть положительным!")
+        sequence = np.random.SeedSequence(seed)
+        pilot_seed, *chunk_seeds = sequence.spawn(1 + math.ceil(samples / CHUNK))
+
+        pilot = self.sampler.solve(np.random.default_rng(pilot_seed), min(PILOT, samples))
+        center, spread = pilot.mean(axis=1), pilot.std(axis=1)
+        spread = np.maximum(spread * HISTOGRAM_SPREAD, 1e-9 * np.maximum(1, np.abs(center)))
+        low = np.minimum(center - spread, pilot.min(axis=1))
+        high = np.maximum(center + spread, pilot.max(axis=1))
+
+        tasks = [(chunk_seed, min(CHUNK, samples - i * CHUNK), self.labels, low, high)
+                 for i, chunk_seed in enumerate(chunk_seeds)]
+        total = ReactionStatistics(self.labels, low, high)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                total.merge(_collect(self.sampler, *task))
+                yield total
+            return
+
+        with Pool(min(workers, len(tasks)), initializer=_init_worker, initargs=(self.sampler,)) as pool:
+            for statistics in pool.imap_unordered(_run_chunk, tasks):
+                total.merge(statistics)
+                yield total
+
+    def run(self, samples: int, seed: int | None = None, workers: int | None = None) -> ReactionStatistics:
+        for statistics in self.stream(samples, seed, workers):
+            pass
+        return statistics
@@ -0,0 +1,42 @@
+from __future__ import annotations
+import numpy as np
+from errors import *
+from lazy import lazy_import
+
+sp = lazy_import('sympy')
+
+
+class ParametricSolution:
+    # Реакции в замкнутом виде как функции параметров нагрузок.
+    # Формулы компилируются в одно ядро NumPy, которое вычисляет все реакции
+    # сразу для массивов значений параметров (с общим подвыражениями через cse).
+    def __init__(self, formulas: dict[str, sp.Expr]):
+        self.formulas = formulas
+
+        symbols = set()
+        for formula in formulas.values():
+            symbols |= formula.free_symbols
+        self.parameters: list[sp.Symbol] = sorted(symbols, key=lambda symbol: symbol.name)
+
+        self._kernel = sp.lambdify(self.parameters, list(formulas.values()), 'numpy', cse=True)
+
+    @property
+    def parameter_names(self) -> list[str]:
+        return [symbol.name for symbol in self.parameters]
+
+    def evaluate(self, **values) -> dict[str, np.ndarray]:
+        missing = [name for name in self.parameter_names if name not in values]
+        if missing:
+            raise IncorrectInputError(f"Не заданы значения параметров: {', '.join(missing)}")
+
+        args = [np.asarray(values[name], dtype=np.float64) for name in self.parameter_names]
+        shape = np.broadcast_shapes(*(arg.shape for arg in args))
+
+        results = {}
+        for name, result in zip(self.formulas, self._kernel(*args)):
+            result = np.asarray(result, dtype=np.float64)
+            results[name] = result if result.shape == shape else np.broadcast_to(result, shape).copy()
+        return results
+
+    def __repr__(self):
+        return f"ParametricSolution(parameters={self.parameter_names}, formulas={self.formulas})"
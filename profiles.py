@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import functools
+import math
+
+import numpy as np
+
+from errors import HighDistanceError, IncorrectInputError, NegativeOrZeroValueError
+
+# Число участков, на которые делится нагрузка, заданная произвольной функцией
+FUNCTION_PIECES = 32
+# Узлы Гаусса — Лежандра, перенесённые на [0, 1]
+_GAUSS_NODES = (np.polynomial.legendre.leggauss(4)[0] + 1) / 2
+
+
+class LoadProfile:
+    # Интенсивность распределённой нагрузки вдоль сегмента — кусочный многочлен:
+    # на участке [start, end] q(s) = c0 + c1·(s - start) + c2·(s - start)² + ...,
+    # где s — расстояние от node1. Участки могут перекрываться, тогда нагрузки складываются.
+    # Профиль неизменяем: равнодействующая считается один раз на набор участков
+    # и берётся из кэша для всех одинаковых профилей.
+    __slots__ = ('pieces',)
+
+    def __init__(self, pieces):
+        checked = []
+        for start, end, coefficients in pieces:
+            start, end = float(start), float(end)
+            if start < 0: raise NegativeOrZeroValueError("Расстояние от края не может быть отрицательным!")
+            if end <= start: raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
+            checked.append((start, end, tuple(float(c) for c in coefficients) or (0.0,)))
+        if not checked:
+            raise IncorrectInputError("Профиль нагрузки должен содержать хотя бы один участок!")
+        self.pieces: tuple[tuple[float, float, tuple[float, ...]], ...] = tuple(sorted(checked))
+
+    @classmethod
+    def uniform(cls, start: float, end: float, q: float) -> LoadProfile:
+        return cls.trapezoidal(start, end, q, q)
+
+    @classmethod
+    def trapezoidal(cls, start: float, end: float, q_start: float, q_end: float) -> LoadProfile:
+        if q_start < 0 or q_end < 0: raise NegativeOrZeroValueError("Интенсивность нагрузки не может быть отрицательной!")
+        if end <= start: raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
+        return cls([(start, end, (q_start, (q_end - q_start) / (end - start)))])
+
+    @classmethod
+    def triangular(cls, start: float, end: float, peak: float, peak_at: float | None = None) -> LoadProfile:
+        # По умолчанию нагрузка растёт от нуля в start до peak в end
+        peak_at = end if peak_at is None else peak_at
+        if not start <= peak_at <= end:
+            raise HighDistanceError("Вершина треугольной нагрузки должна лежать внутри её участка!")
+        points = [(start, 0 if peak_at > start else peak), (end, 0 if peak_at < end else peak)]
+        if start < peak_at < end:
+            points.insert(1, (peak_at, peak))
+        return cls.piecewise_linear(points)
+
+    @classmethod
+    def piecewise_linear(cls, points: list[tuple[float, float]]) -> LoadProfile:
+        if len(points) < 2:
+            raise IncorrectInputError("Кусочно-линейная нагрузка задаётся хотя бы двумя точками!")
+        pieces = []
+        for (s1, q1), (s2, q2) in zip(points, points[1:]):
+            if s2 <= s1: raise IncorrectInputError("Точки нагрузки должны идти по возрастанию расстояния!")
+            pieces.extend(cls.trapezoidal(s1, s2, q1, q2).pieces)
+        return cls(pieces)
+
+    @classmethod
+    def polynomial(cls, start: float, end: float, coefficients: list[float]) -> LoadProfile:
+        return cls([(start, end, coefficients)])
+
+    @classmethod
+    def function(cls, q, start: float, end: float, pieces: int = FUNCTION_PIECES) -> LoadProfile:
+        # Произвольная функция q(s) заменяется кубическими многочленами, проходящими через
+        # узлы Гаусса на каждом участке. Квадратура Гаусса по четырём узлам интерполяционная,
+        # поэтому равнодействующая и её момент у многочленов совпадают с квадратурой функции.
+        if end <= start: raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
+        return cls(_fit_function(q, float(start), float(end), int(pieces)))
+
+    @property
+    def start(self) -> float:
+        return self.pieces[0][0]
+
+    @property
+    def end(self) -> float:
+        return max(end for _, end, _ in self.pieces)
+
+    @property
+    def length(self) -> float:
+        return self.end - self.start
+
+    def resultant(self) -> tuple[float, float]:
+        # Равнодействующая и расстояние от node1 до точки её приложения (центра тяжести эпюры)
+        total, moment = _integrate(self.pieces)
+        if total <= 0:
+            raise NegativeOrZeroValueError("Равнодействующая распределённой нагрузки должна быть положительной!")
+        return total, moment / total
+
+    def intensity(self, s) -> np.ndarray:
+        s = np.asarray(s, dtype=np.float64)
+        q = np.zeros_like(s)
+        for start, end, coefficients in self.pieces:
+            inside = (s >= start) & (s <= end)
+            q[inside] += np.polynomial.polynomial.polyval(s[inside] - start, coefficients)
+        return q
+
+    def power_pieces(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Начала, концы и коэффициенты участков по степеням самого s (а не s - start)
+        return _power_pieces(self.pieces)
+
+    def to_list(self) -> list:
+        return [[start, end, list(coefficients)] for start, end, coefficients in self.pieces]
+
+    @classmethod
+    def from_list(cls, data: list) -> LoadProfile:
+        return cls([(start, end, coefficients) for start, end, coefficients in data])
+
+    def __eq__(self, other):
+        return isinstance(other, LoadProfile) and self.pieces == other.pieces
+
+    def __hash__(self):
+        return hash(self.pieces)
+
+    def __repr__(self):
+        return f"LoadProfile(pieces={self.to_list()})"
+
+
+def _coefficient_matrix(pieces: tuple) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    starts = np.array([start for start, _, _ in pieces])
+    ends = np.array([end for _, end, _ in pieces])
+    degree = max(len(coefficients) for _, _, coefficients in pieces)
+    matrix = np.zeros((len(pieces), degree))
+    for i, (_, _, coefficients) in enumerate(pieces):
+        matrix[i, :len(coefficients)] = coefficients
+    return starts, ends, matrix
+
+
+@functools.lru_cache(maxsize=4096)
+def _integrate(pieces: tuple) -> tuple[float, float]:
+    # Точно для всех участков сразу: ∫ c_k·u^k du = c_k·h^(k+1)/(k+1) и момент относительно node1
+    starts, ends, matrix = _coefficient_matrix(pieces)
+    powers = np.arange(matrix.shape[1])
+    h = (ends - starts)[:, None]
+    total = matrix * h ** (powers + 1) / (powers + 1)
+    own = matrix * h ** (powers + 2) / (powers + 2)
+    totals = total.sum(axis=1)
+    return float(totals.sum()), float((starts * totals + own.sum(axis=1)).sum())
+
+
+@functools.lru_cache(maxsize=4096)
+def _power_pieces(pieces: tuple) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (s - a)^k = Σ_j C(k, j)·s^j·(-a)^(k-j)
+    starts, ends, matrix = _coefficient_matrix(pieces)
+    degree = matrix.shape[1]
+    binomial = np.array([[math.comb(k, j) for j in range(degree)] for k in range(degree)], dtype=np.float64)
+    power = np.zeros_like(matrix)
+    for k in range(degree):
+        shift = (-starts[:, None]) ** (k - np.arange(k + 1))
+        power[:, :k + 1] += matrix[:, k, None] * binomial[k, :k + 1] * shift
+    for array in (starts, ends, power):
+        array.setflags(write=False)
+    return starts, ends, power
+
+
+@functools.lru_cache(maxsize=256)
+def _fit_function(q, start: float, end: float, pieces: int) -> tuple:
+    h = (end - start) / pieces
+    left = start + h * np.arange(pieces)
+    nodes = left[:, None] + h * _GAUSS_NODES
+    try:
+        values = np.broadcast_to(np.asarray(q(nodes), dtype=np.float64), nodes.shape)
+    except (TypeError, ValueError):
+        # Функция не принимает массивы — вызываем поточечно
+        values = np.vectorize(q, otypes=[np.float64])(nodes)
+    vandermonde = np.vander(h * _GAUSS_NODES, 4, increasing=True)
+    coefficients = np.linalg.solve(vandermonde, values.T).T
+    return tuple((float(a), float(a + h), tuple(c.tolist())) for a, c in zip(left, coefficients))
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from errors import NonExistentError
+from lazy import lazy_import
+
+sps = lazy_import('scipy.sparse')
+
+DEGREE = math.pi / 180
+# Память под одну пачку правых частей, байт; размер пачки подбирается по числу уравнений
+CHUNK_BYTES = 1 << 26
+
+
+class Sensitivity:
+    # Матрица чувствительности matrix[i, j] = ∂u_i/∂p_j: строки — неизвестные системы
+    # (реакции опор и усилия в шарнирах) с теми же именами, что в raw_solution, столбцы —
+    # параметры. Параметры нагрузок: segment_S_force_F_value, _angle (на градус),
+    # _node1_dist и segment_S_torque_T_value; координаты узлов: node_N_coord_x, node_N_coord_y.
+    def __init__(self, names: list[str], labels: dict[str, int], parameters: list[str],
+                 values: np.ndarray, matrix: np.ndarray):
+        self.names = names
+        self.labels = labels
+        self.parameters = parameters
+        self.values = values
+        self.matrix = matrix
+        self._rows = {name: i for i, name in enumerate(names)}
+        self._columns = {name: j for j, name in enumerate(parameters)}
+
+    def row(self, name: str) -> int:
+        # Номер строки по читаемой подписи или по внутреннему имени неизвестного
+        if name in self.labels:
+            return self.labels[name]
+        if name in self._rows:
+            return self._rows[name]
+        raise NonExistentError(f"Неизвестная {name} не существует!")
+
+    def column(self, parameter: str) -> int:
+        if parameter not in self._columns:
+            raise NonExistentError(f"Параметр {parameter} не существует!")
+        return self._columns[parameter]
+
+    def of(self, name: str) -> dict[str, float]:
+        # Чувствительности одной реакции по всем параметрам
+        return dict(zip(self.parameters, self.matrix[self.row(name)].tolist()))
+
+    def __getitem__(self, key: tuple[str, str]) -> float:
+        name, parameter = key
+        return float(self.matrix[self.row(name), self.column(parameter)])
+
+
+def _direction(force) -> tuple[float, float]:
+    # Проекции силы на единицу value: точные, как в part_x/part_y, а у нулевой силы — по углу
+    if force.value != 0:
+        return force.part_x / force.value, force.part_y / force.value
+    radians = math.radians(force.angle)
+    return math.cos(radians) * force.length, math.sin(radians) * force.length
+
+
+def compute_sensitivity(system, factorization, labels: dict[str, int], u: np.ndarray, forces: list,
+                        torques: list, nodes: list, reactions: list[str] | None = None) -> Sensitivity:
+    # Из A(p)·u = b(p): ∂u/∂p = A⁻¹·(∂b/∂p - ∂A/∂p·u). Правые части всех параметров
+    # собираются в разреженную матрицу R. Если параметров больше, чем запрошенных
+    # неизвестных reactions (по умолчанию — всех), выгоднее сопряжённая задача:
+    # Aᵀ·λ_i = e_i решается для каждой неизвестной, и строка производных равна λ_iᵀ·R.
+    # Решения идут пачками столбцов, чтобы не держать в памяти A⁻¹ или плотную R.
+    # u — решение при текущих нагрузках
+    n_rows, n_cols = system.shape
+
+    parameters = []
+    entries_rows, entries_cols, entries_vals = [], [], []
+
+    def add(row: int, parameter: int, value: float):
+        if value != 0:
+            entries_rows.append(row)
+            entries_cols.append(parameter)
+            entries_vals.append(value)
+
+    def parameter(name: str) -> int:
+        parameters.append(name)
+        return len(parameters) - 1
+
+    node_parameters = {}
+    for node in nodes:
+        node_parameters[node] = (parameter(f'node_{node.id}_coord_x'), parameter(f'node_{node.id}_coord_y'))
+
+    # Неизвестные в узлах: в строке моментов A[row + 2, X] = -y, A[row + 2, Y] = x
+    for row, node, col_x, col_y in system.node_columns:
+        px, py = node_parameters[node]
+        if col_y >= 0:
+            add(row + 2, px, -u[col_y])
+        if col_x >= 0:
+            add(row + 2, py, u[col_x])
+        # Известные составляющие реакции опоры стоят в правой части
+        support = node.support
+        if support is not None:
+            if not support.force.unknown_x:
+                add(row + 2, py, support.force.part_x)
+            if not support.force.unknown_y:
+                add(row + 2, px, -support.force.part_y)
+
+    for segment, force in forces:
+        row = system.segment_rows[segment]
+        name = f'segment_{segment.id}_force_{force.id}'
+        ux, uy = _direction(force)
+        fx, fy = force.part_x, force.part_y
+        x, y = segment.point_at(force.node1_dist)
+        length = segment.length
+        tx, ty = (segment.node2.x - segment.node1.x) / length, (segment.node2.y - segment.node1.y) / length
+
+        # b[row] = -Px, b[row + 1] = -Py, b[row + 2] = Px·y - Py·x
+        j = parameter(f'{name}_value')
+        add(row, j, -ux)
+        add(row + 1, j, -uy)
+        add(row + 2, j, ux * y - uy * x)
+        j = parameter(f'{name}_angle')
+        add(row, j, fy * DEGREE)
+        add(row + 1, j, -fx * DEGREE)
+        add(row + 2, j, -(fy * y + fx * x) * DEGREE)
+        j = parameter(f'{name}_node1_dist')
+        add(row + 2, j, fx * ty - fy * tx)
+
+        # Точка приложения P = n1 + d·t: ∂P/∂n2 = (d/ℓ)·(I - t·tᵀ), ∂P/∂n1 = I - ∂P/∂n2
+        share = force.node1_dist / length
+        for k, (ex, ey) in enumerate(((1, 0), (0, 1))):
+            dx2 = share * (ex - tx * (tx * ex + ty * ey))
+            dy2 = share * (ey - ty * (tx * ex + ty * ey))
+            add(row + 2, node_parameters[segment.node2][k], fx * dy2 - fy * dx2)
+            add(row + 2, node_parameters[segment.node1][k], fx * (ey - dy2) - fy * (ex - dx2))
+
+    for segment, torque in torques:
+        j = parameter(f'segment_{segment.id}_torque_{torque.id}_value')
+        add(system.segment_rows[segment] + 2, j, -1)
+
+    # Повторяющиеся пары (строка, параметр) суммируются при переходе COO → CSR
+    rhs = sps.coo_matrix((entries_vals, (entries_rows, entries_cols)), shape=(n_rows, len(parameters))).tocsr()
+    rows = _requested_rows(list(system.columns), labels, reactions)
+    matrix = np.empty((len(rows), len(parameters)))
+    block = max(1, CHUNK_BYTES // (8 * n_rows))
+    if factorization.square and len(rows) < len(parameters):
+        for first in range(0, len(rows), block):
+            part = rows[first:first + block]
+            unit = np.zeros((n_cols, len(part)))
+            unit[part, np.arange(len(part))] = 1
+            adjoint = factorization.solve_transposed(unit)
+            matrix[first:first + len(part)] = (rhs.T @ adjoint).T
+    else:
+        for first in range(0, len(parameters), block):
+            matrix[:, first:first + block] = factorization.solve(rhs[:, first:first + block].toarray())[rows]
+
+    names = [system.columns[row] for row in rows]
+    positions = {row: i for i, row in enumerate(rows)}
+    selected = {label: positions[col] for label, col in labels.items() if col in positions}
+    return Sensitivity(names, selected, parameters, u[rows], matrix)
+
+
+def _requested_rows(names: list[str], labels: dict[str, int], reactions: list[str] | None) -> np.ndarray:
+    # Номера неизвестных по читаемым подписям или внутренним именам; без списка — все
+    if reactions is None:
+        return np.arange(len(names))
+    index = {name: i for i, name in enumerate(names)}
+    rows = []
+    for name in reactions:
+        if name in labels:
+            rows.append(labels[name])
+        elif name in index:
+            rows.append(index[name])
+        else:
+            raise NonExistentError(f"Неизвестная {name} не существует!")
+    return np.array(rows, dtype=int)
@@ -1,133 +1,307 @@
 import json
-from structures import Beam, BeamSegment, Node, Force, Torque, Support, Hinge
+import re
+from ids import use_registry
+from structures import Beam, BeamSegment, Node, Force, DistributedForce, Torque, Support, Hinge, Section
+from profiles import LoadProfile
+
+# Размер порции при чтении файла, символов
+CHUNK = 1 << 16
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def support_to_dict(support: Support) -> dict:
+    return {
+        'id': support.id,
+        'type': support.support_type.value,
+        'angle': support.angle,
+        'force': {
+            'id': support.force.id,
+            'value': support.force.value,
+            'angle': support.force.angle,
+            'node1_dist': support.force.node1_dist,
+            'length': support.force.length,
+            'unknown_x': support.force.unknown_x,
+            'unknown_y': support.force.unknown_y
+        },
+        'torque': {
+            'id': support.torque.id,
+            'value': support.torque.value,
+            'node1_dist': support.torque.node1_dist,
+            'unknown': support.torque.unknown
+        }
+    }
+
+
+def force_to_dict(force: Force) -> dict:
+    return {
+        'id': force.id,
+        'value': force.value,
+        'angle': force.angle,
+        'node1_dist': force.node1_dist,
+        'length': force.length,
+        'unknown': force.unknown_x or force.unknown_y,
+        **({'profile': force.profile.to_list()} if isinstance(force, DistributedForce) else {})
+    }
+
+
+def torque_to_dict(torque: Torque) -> dict:
+    return {
+        'id': torque.id,
+        'value': torque.value,
+        'node1_dist': torque.node1_dist,
+        'unknown': torque.unknown
+    }
+
+
+def node_to_dict(node: Node) -> dict:
+    return {
+        'id': node.id,
+        'x': node.x,
+        'y': node.y,
+        'support': support_to_dict(node.support) if node.support else None,
+        'hinge_id': node.hinge.id if node.hinge else None
+    }
+
+
+def segment_to_dict(segment: BeamSegment) -> dict:
+    return {
+        'id': segment.id,
+        'node1_id': segment.node1.id,
+        'node2_id': segment.node2.id,
+        'forces': [force_to_dict(force) for force in segment.forces],
+        'torques': [torque_to_dict(torque) for torque in segment.torques],
+        **({'section': {'EA': segment.section.EA, 'EI': segment.section.EI}} if segment.section else {})
+    }
+
+
+def _nodes(beam: Beam, hinges: dict):
+    # Узлы по одному; заодно за один проход собираются узлы каждого шарнира
+    for node in beam.get_nodes():
+        if node.hinge:
+            hinges.setdefault(node.hinge, []).append(node.id)
+        yield node_to_dict(node)
+
+
+def _hinges(hinges: dict):
+    for hinge, node_ids in hinges.items():
+        yield {'id': hinge.id, 'node_ids': node_ids}
 
 
 def beam_to_dict(beam: Beam) -> dict:
+    hinges = {}
     return {
-        'nodes': [
-            {
-                'id': node.id,
-                'x': node.x,
-                'y': node.y,
-                'support': {
-                    'id': node.support.id,
-                    'type': node.support.support_type.value,
-                    'angle': node.support.angle,
-                    'force': {
-                        'id': node.support.force.id,
-                        'value': node.support.force.value,
-                        'angle': node.support.force.angle,
-                        'node1_dist': node.support.force.node1_dist,
-                        'length': node.support.force.length,
-                        'unknown_x': node.support.force.unknown_x,
-                        'unknown_y': node.support.force.unknown_y
-                    },
-                    'torque': {
-                        'id': node.support.torque.id,
-                        'value': node.support.torque.value,
-                        'node1_dist': node.support.torque.node1_dist,
-                        'unknown': node.support.torque.unknown
-                    }
-                } if node.support else None,
-                'hinge_id': node.hinge.id if node.hinge else None
-            }
-            for node in beam.get_nodes()
-        ],
-        'segments': [
-            {
-                'id': segment.id,
-                'node1_id': segment.node1.id,
-                'node2_id': segment.node2.id,
-                'forces': [
-                    {
-                        'id': force.id,
-                        'value': force.value,
-                        'angle': force.angle,
-                        'node1_dist': force.node1_dist,
-                        'length': force.length,
-                        'unknown': force.unknown_x or force.unknown_y
-                    } for force in segment.forces
-                ],
-                'torques': [
-                    {
-                        'id': torque.id,
-                        'value': torque.value,
-                        'node1_dist': torque.node1_dist,
-                        'unknown': torque.unknown
-                    } for torque in segment.torques
-                ]
-            }
-            for segment in beam.get_segments()
-        ],
-        'hinges': [
-            {
-                'id': hinge.id,
-                'node_ids': [node.id for node in beam.graph.nodes if node.hinge == hinge]
-            }
-            for hinge in {node.hinge for node in beam.get_nodes() if node.hinge}
-        ]
+        'nodes': list(_nodes(beam, hinges)),
+        'segments': [segment_to_dict(segment) for segment in beam.get_segments()],
+        'hinges': list(_hinges(hinges))
     }
 
 
+def _write_array(f, key: str, items, last: bool = False):
+    # Тот же текст, что даёт json.dump(..., indent=4) для массива внутри объекта верхнего уровня
+    f.write(f'    {json.dumps(key)}: [')
+    empty = True
+    for item in items:
+        f.write('\n        ' if empty else ',\n        ')
+        f.write(json.dumps(item, indent=4).replace('\n', '\n        '))
+        empty = False
+    f.write(']' if empty else '\n    ]')
+    f.write('\n' if last else ',\n')
+
+
 def save_beam_to_file(beam: Beam, filename: str = "beam.bm"):
+    # Записи пишутся по мере обхода графа, целиком модель в словари не переводится
+    hinges = {}
     with open(filename, "w", encoding="utf-8") as f:
-        json.dump(beam_to_dict(beam), f, indent=4)
+        f.write('{\n')
+        _write_array(f, 'nodes', _nodes(beam, hinges))
+        _write_array(f, 'segments', (segment_to_dict(segment) for segment in beam.get_segments()))
+        _write_array(f, 'hinges', _hinges(hinges), last=True)
+        f.write('}')
+
+
+class _JSONStream:
+    # Разбор JSON по частям: объект верхнего уровня читается ключ за ключом,
+    # а элементы массивов — по одному через raw_decode, так что в памяти
+    # находится только текущая порция файла
+    def __init__(self, f, chunk: int | None = None):
+        self._file = f
+        self._chunk = chunk or CHUNK
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        data = self._file.read(self._chunk)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Число на границе порции могло оборваться
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def keys(self):
+        self.expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect('}')
+            return
+
+    def array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self._pos += 1
+                continue
+            self.expect(']')
+            return
+
+    def end(self):
+        if self.peek():
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+
+
+def support_from_dict(s: dict) -> Support:
+    support = Support(
+        support_type=Support.Type(s['type']),
+        angle=s['angle'],
+        force_x=s['force']['value'],
+        force_y=0,
+        torque=s['torque']['value'],
+        unknown_fx=s['force']['unknown_x'],
+        unknown_fy=s['force']['unknown_y'],
+        unknown_t=s['torque']['unknown'],
+        custom_id=s.get('id'),
+        is_new=False
+    )
+    # Без номеров (как в журнале правок) элементы нумеруются заново
+    if s['force'].get('id') is not None:
+        support.force.id = s['force']['id']
+    if s['torque'].get('id') is not None:
+        support.torque.id = s['torque']['id']
+    return support
+
+
+def force_from_dict(f: dict) -> Force:
+    if f.get('profile'):
+        return DistributedForce(LoadProfile.from_list(f['profile']), f['angle'], custom_id=f.get('id'))
+    return Force(
+        f['value'], f['angle'], f['node1_dist'],
+        f['length'], f['unknown'], custom_id=f.get('id')
+    )
+
+
+def torque_from_dict(t: dict) -> Torque:
+    return Torque(
+        t['value'], t['node1_dist'], t['unknown'], custom_id=t.get('id')
+    )
+
+
+def _add_node(beam: Beam, node_data: dict, id_node_map: dict):
+    node = Node(node_data['x'], node_data['y'], custom_id=node_data['id'])
+    if node_data['support']:
+        node.add_support(support_from_dict(node_data['support']))
+    id_node_map[node.id] = beam.add_node(node)
+
+
+def _add_hinge(beam: Beam, h: dict, id_node_map: dict):
+    hinge = Hinge(custom_id=h['id'])
+    for node_id in h['node_ids']:
+        node = id_node_map[node_id]
+        node.hinge = hinge
+        #hinge.assign_body(beam)
+
+
+def _add_segment(beam: Beam, segment_data: dict, id_node_map: dict):
+    node1 = id_node_map[segment_data['node1_id']]
+    node2 = id_node_map[segment_data['node2_id']]
+    section = segment_data.get('section')
+    segment = BeamSegment(node1, node2, custom_id=segment_data['id'],
+                          section=Section(section['EA'], section['EI']) if section else None)
+
+    for f in segment_data['forces']:
+        segment.add_force(force_from_dict(f))
+
+    for t in segment_data['torques']:
+        segment.add_torque(torque_from_dict(t))
+
+    beam.add_segment(segment)
 
 
 def load_beam_from_file(filename: str, beam: Beam):
-    with open(filename, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    beam.graph.clear()
-    id_node_map = {}
-
-    for node_data in data['nodes']:
-        node = Node(node_data['x'], node_data['y'], custom_id=node_data['id'])
-        if node_data['support']:
-            s = node_data['support']
-            support = Support(
-                support_type=Support.Type(s['type']),
-                angle=s['angle'],
-                force_x=s['force']['value'],
-                force_y=0,
-                torque=s['torque']['value'],
-                unknown_fx=s['force']['unknown_x'],
-                unknown_fy=s['force']['unknown_y'],
-                unknown_t=s['torque']['unknown'],
-                custom_id=s['id'],
-                is_new=False
-            )
-            support.force.id = s['force']['id']
-            support.torque.id = s['torque']['id']
-            node.add_support(support)
-        id_node_map[node.id] = beam.add_node(node)
-
-    hinge_map = {}
-    if 'hinges' in data:
-        for h in data['hinges']:
-            hinge = Hinge(custom_id=h['id'])
-            hinge_map[hinge.id] = hinge
-            for node_id in h['node_ids']:
-                node = id_node_map[node_id]
-                node.hinge = hinge
-                #hinge.assign_body(beam)
-
-    for segment_data in data['segments']:
-        node1 = id_node_map[segment_data['node1_id']]
-        node2 = id_node_map[segment_data['node2_id']]
-        segment = BeamSegment(node1, node2, custom_id=segment_data['id'])
-
-        for f in segment_data['forces']:
-            force = Force(
-                f['value'], f['angle'], f['node1_dist'],
-                f['length'], f['unknown'], custom_id=f['id']
-            )
-            segment.add_force(force)
-
-        for t in segment_data['torques']:
-            torque = Torque(
-                t['value'], t['node1_dist'], t['unknown'], custom_id=t['id']
-            )
-            segment.add_torque(torque)
-
-        beam.add_segment(segment)
+    # Модель строится по мере чтения: узлы, сегменты и шарниры добавляются
+    # сразу после разбора своей записи. Сегменты и шарниры, записанные раньше
+    # узлов (в чужих файлах), откладываются до конца массива узлов.
+    # Номера из файла занимаются в реестре балки, а не в текущем реестре потока
+    with use_registry(beam.registry):
+        beam.graph.clear()
+        id_node_map = {}
+        pending = []
+        read = set()
+
+        with open(filename, "r", encoding="utf-8") as f:
+            stream = _JSONStream(f)
+            for key in stream.keys():
+                if key == 'nodes':
+                    for node_data in stream.array():
+                        _add_node(beam, node_data, id_node_map)
+                    for add, item in pending:
+                        add(beam, item, id_node_map)
+                    pending.clear()
+                elif key in ('segments', 'hinges'):
+                    add = _add_segment if key == 'segments' else _add_hinge
+                    for item in stream.array():
+                        if 'nodes' in read:
+                            add(beam, item, id_node_map)
+                        else:
+                            pending.append((add, item))
+                else:
+                    stream.value()
+                read.add(key)
+            stream.end()
+
+    for key in ('nodes', 'segments'):
+        if key not in read:
+            raise KeyError(key)
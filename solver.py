@@ -0,0 +1,405 @@
+from __future__ import annotations
+import warnings
+from enum import Enum
+import numpy as np
+from errors import *
+from lazy import lazy_import
+
+la = lazy_import('scipy.linalg')
+sps = lazy_import('scipy.sparse')
+spla = lazy_import('scipy.sparse.linalg')
+
+
+# Порог обусловленности, ниже которого система считается вырожденной (подвижной)
+RCOND_LIMIT = 1e-12
+# Допустимая относительная невязка для переопределённых систем
+RESIDUAL_LIMIT = 1e-9
+# Наибольшее число неизвестных, для которого классификация строит полное SVD
+CLASSIFY_DENSE_LIMIT = 2000
+# Сдвиг и число обратных итераций разреженной классификации, см. _classify_sparse
+SPARSE_SHIFT = 1e-8
+CLASSIFY_ITERATIONS = 2
+
+
+def _check_shape(n_rows: int, n_cols: int):
+    if n_cols > n_rows:
+        raise TooManyUnknownsError("Слишком много неизвестных!")
+    if n_cols == 0:
+        raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+
+def _check_consistency(matrix, matrix_norm: float, solution: np.ndarray, rhs: np.ndarray):
+    # Переопределённая система должна быть совместной
+    residual = np.linalg.norm(matrix @ solution - rhs, axis=0)
+    scale = np.linalg.norm(rhs, axis=0) + matrix_norm * np.linalg.norm(solution, axis=0)
+    if np.any(residual > RESIDUAL_LIMIT * np.maximum(scale, 1)):
+        raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+
+class DenseFactorization:
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+        n_rows, n_cols = matrix.shape
+        _check_shape(n_rows, n_cols)
+
+        self.square = n_rows == n_cols
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', la.LinAlgWarning)
+            if self.square:
+                # LU-разложение с оценкой обратного числа обусловленности
+                self._lu = la.lu_factor(matrix, check_finite=False)
+                rcond, _ = la.lapack.dgecon(self._lu[0], np.linalg.norm(matrix, 1), norm='1')
+            else:
+                # QR с выбором ведущего столбца — диагональ R показывает ранг
+                self._q, self._r, self._perm = la.qr(matrix, mode='economic', pivoting=True, check_finite=False)
+                diag = np.abs(np.diag(self._r))
+                rcond = diag[-1] / diag[0] if diag[0] > 0 else 0.0
+
+        if not rcond > RCOND_LIMIT:
+            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        if self.square:
+            return la.lu_solve(self._lu, rhs, check_finite=False)
+
+        solution = np.empty((self.matrix.shape[1],) + rhs.shape[1:])
+        solution[self._perm] = la.solve_triangular(self._r, self._q.T @ rhs, check_finite=False)
+        _check_consistency(self.matrix, np.linalg.norm(self.matrix, 1), solution, rhs)
+        return solution
+
+    def solve_transposed(self, rhs: np.ndarray) -> np.ndarray:
+        # Сопряжённая задача: λ, для которых λᵀ·b равно rhsᵀ·solve(b) при любой правой части
+        if self.square:
+            return la.lu_solve(self._lu, rhs, trans=1, check_finite=False)
+        # solve(b)[perm] = R⁻¹·Qᵀ·b, поэтому λ = Q·R⁻ᵀ·rhs[perm]
+        return self._q @ la.solve_triangular(self._r, rhs[self._perm], trans='T', check_finite=False)
+
+
+class SparseFactorization:
+    def __init__(self, matrix: sps.spmatrix):
+        self.matrix = matrix.tocsr()
+        n_rows, n_cols = matrix.shape
+        _check_shape(n_rows, n_cols)
+
+        self.square = n_rows == n_cols
+        if self.square:
+            system = matrix.tocsc()
+        else:
+            # Метод наименьших квадратов через расширенную систему [[I, A], [Aᵀ, 0]]
+            system = sps.bmat([[sps.identity(n_rows), matrix], [matrix.T, None]], format='csc')
+
+        try:
+            self._lu = spla.splu(system)
+        except RuntimeError:
+            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+        diag = np.abs(self._lu.U.diagonal())
+        if not diag.min() > RCOND_LIMIT * diag.max():
+            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        if self.square:
+            return self._lu.solve(rhs)
+
+        n_rows, n_cols = self.matrix.shape
+        extended = np.concatenate([rhs, np.zeros((n_cols,) + rhs.shape[1:])])
+        solution = self._lu.solve(extended)[n_rows:]
+        _check_consistency(self.matrix, spla.norm(self.matrix, 1), solution, rhs)
+        return solution
+
+    def solve_transposed(self, rhs: np.ndarray) -> np.ndarray:
+        # Сопряжённая задача, см. DenseFactorization.solve_transposed
+        if self.square:
+            return self._lu.solve(rhs, trans='T')
+
+        n_rows, n_cols = self.matrix.shape
+        extended = np.concatenate([np.zeros((n_rows,) + rhs.shape[1:]), rhs])
+        return self._lu.solve(extended, trans='T')[:n_rows]
+
+
+class EquilibriumSystem:
+    # Система уравнений равновесия A·u = b для набора тел, разделённых шарнирами.
+    # На каждое тело приходится три строки (ΣFx, ΣFy, ΣM относительно начала координат),
+    # на каждый шарнир — две строки (сумма реакций шарнира по всем телам равна нулю).
+    # Столбцы — неизвестные с теми же именами, что и в символьном решении.
+    # Без with_loads нагрузки сегментов не попадают в правую часть, её затем
+    # собирают для каждого варианта нагружения в case_rhs.
+    def __init__(self, subbeams: list["Beam"], with_loads: bool = True):
+        self.with_loads = with_loads
+        self.columns: list[str] = []
+        self.index: dict[str, int] = {}
+        self.segment_rows: dict["BeamSegment", int] = {}
+        self.body_rows: list[tuple[int, "Beam"]] = []
+        # Неизвестные силы в узлах, плечи которых зависят от координат узла:
+        # (строка тела, узел, столбец X или -1, столбец Y или -1)
+        self.node_columns: list[tuple[int, "Node", int, int]] = []
+        self._rows: list[int] = []
+        self._cols: list[int] = []
+        self._vals: list[float] = []
+        self._rhs: list[float] = []
+
+        for beam in subbeams:
+            self._add_body(beam)
+
+        self.rhs = np.array(self._rhs, dtype=np.float64)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self._rhs), len(self.columns)
+
+    def matrix(self, sparse: bool = False):
+        rows = np.array(self._rows, dtype=np.intp)
+        cols = np.array(self._cols, dtype=np.intp)
+        vals = np.array(self._vals, dtype=np.float64)
+
+        if sparse:
+            # Повторяющиеся пары (строка, столбец) суммируются при переходе COO → CSR
+            return sps.coo_matrix((vals, (rows, cols)), shape=self.shape).tocsr()
+
+        a = np.zeros(self.shape, dtype=np.float64)
+        np.add.at(a, (rows, cols), vals)
+        return a
+
+    def factorize(self, sparse: bool = False):
+        if sparse:
+            return SparseFactorization(self.matrix(sparse=True))
+        return DenseFactorization(self.matrix())
+
+    def solve(self, sparse: bool = False) -> dict[str, float]:
+        solution = self.factorize(sparse).solve(self.rhs)
+        return dict(zip(self.columns, solution.tolist()))
+
+    def case_rhs(self, forces: list[tuple["BeamSegment", "Force"]], torques: list[tuple["BeamSegment", "Torque"]]) -> np.ndarray:
+        rhs = self.rhs.copy()
+
+        if forces:
+            rows = np.array([self.segment_rows[segment] for segment, _ in forces], dtype=np.intp)
+            points = np.array([segment.point_at(force.node1_dist) for segment, force in forces], dtype=np.float64)
+            parts = np.array([(force.part_x, force.part_y) for _, force in forces], dtype=np.float64)
+            np.add.at(rhs, rows, -parts[:, 0])
+            np.add.at(rhs, rows + 1, -parts[:, 1])
+            np.add.at(rhs, rows + 2, parts[:, 0] * points[:, 1] - parts[:, 1] * points[:, 0])
+
+        if torques:
+            rows = np.array([self.segment_rows[segment] for segment, _ in torques], dtype=np.intp)
+            np.add.at(rhs, rows + 2, -np.array([torque.value for _, torque in torques], dtype=np.float64))
+
+        return rhs
+
+    def cases_rhs(self, cases: list[tuple[list, list]]) -> np.ndarray:
+        # Правые части всех вариантов нагружения — по столбцу на вариант
+        return np.column_stack([self.case_rhs(forces, torques) for forces, torques in cases])
+
+    def _new_row(self) -> int:
+        self._rhs.append(0.0)
+        return len(self._rhs) - 1
+
+    def _column(self, name: str) -> int:
+        col = self.index.get(name)
+        if col is None:
+            col = self.index[name] = len(self.columns)
+            self.columns.append(name)
+        return col
+
+    def _add(self, row: int, col: int, value: float):
+        if value != 0:
+            self._rows.append(row)
+            self._cols.append(col)
+            self._vals.append(value)
+
+    def _add_force_parts(self, row: int, name: str, force: "Force", x: float, y: float):
+        if force.unknown_x:
+            col = self._column(f'{name}_x')
+            self._add(row, col, 1)
+            self._add(row + 2, col, -y)
+        else:
+            part = force.part_x
+            self._rhs[row] -= part
+            self._rhs[row + 2] += part * y
+
+        if force.unknown_y:
+            col = self._column(f'{name}_y')
+            self._add(row + 1, col, 1)
+            self._add(row + 2, col, x)
+        else:
+            part = force.part_y
+            self._rhs[row + 1] -= part
+            self._rhs[row + 2] -= part * x
+
+    def _add_torque(self, row: int, name: str, torque: "Torque"):
+        if torque.unknown:
+            self._add(row + 2, self._column(name), 1)
+        else:
+            self._rhs[row + 2] -= torque.value
+
+    def _add_body(self, beam: "Beam"):
+        row = self._new_row()
+        self._new_row()
+        self._new_row()
+        self.body_rows.append((row, beam))
+
+        for node in beam.get_nodes():
+            if node.support:
+                nid = f'node_{node.id}'
+                self._add_force_parts(row, nid, node.support.force, node.x, node.y)
+                self._add_torque(row, f'{nid}_torque', node.support.torque)
+                self.node_columns.append((row, node, self.index.get(f'{nid}_x', -1), self.index.get(f'{nid}_y', -1)))
+
+            elif node.hinge:
+                hinge = node.hinge
+                if beam not in hinge.bodies:
+                    continue
+
+                prefix = f'hinge_{hinge.id}_for_beam_{beam.id}'
+                col_x = self._column(f'{prefix}_force_x')
+                col_y = self._column(f'{prefix}_force_y')
+                self._add(row, col_x, 1)
+                self._add(row + 1, col_y, 1)
+                self._add(row + 2, col_x, -node.y)
+                self._add(row + 2, col_y, node.x)
+                self.node_columns.append((row, node, col_x, col_y))
+
+                if hinge.bodies[0] == beam:
+                    row_x = self._new_row()
+                    row_y = self._new_row()
+                    for body in hinge.bodies:
+                        self._add(row_x, self._column(f'hinge_{hinge.id}_for_beam_{body.id}_force_x'), 1)
+                        self._add(row_y, self._column(f'hinge_{hinge.id}_for_beam_{body.id}_force_y'), 1)
+
+        for segment in beam.get_segments():
+            self.segment_rows[segment] = row
+            if not self.with_loads:
+                continue
+
+            sid = f'segment_{segment.id}'
+            for force in segment.forces:
+                x, y = segment.point_at(force.node1_dist)
+                self._add_force_parts(row, f'{sid}_force_{force.id}', force, x, y)
+            for torque in segment.torques:
+                self._add_torque(row, f'{sid}_torque_{torque.id}', torque)
+
+
+class Determinacy:
+    # Результат классификации системы по рангу матрицы равновесия:
+    # degree — степень статической неопределимости (число лишних неизвестных),
+    # freedom — число независимых форм движения механизма,
+    # redundant — неизвестные, входящие в состояния самонапряжения,
+    # free_mode — перемещения узлов (dx, dy) в одной из форм движения.
+    class Type(Enum):
+        DETERMINATE = 0
+        INDETERMINATE = 1
+        MECHANISM = 2
+
+    def __init__(self,
+                 degree: int,
+                 freedom: int,
+                 condition: float,
+                 redundant: list[str],
+                 free_mode: dict["Node", tuple[float, float]]):
+        self.degree = degree
+        self.freedom = freedom
+        self.condition = condition
+        self.redundant = redundant
+        self.free_mode = free_mode
+
+    @property
+    def type(self) -> "Determinacy.Type":
+        if self.freedom > 0:
+            return Determinacy.Type.MECHANISM
+        if self.degree > 0:
+            return Determinacy.Type.INDETERMINATE
+        return Determinacy.Type.DETERMINATE
+
+    def __repr__(self):
+        return (f"Determinacy(type={self.type.name}, degree={self.degree}, freedom={self.freedom}, "
+                f"condition={self.condition:.3g})")
+
+
+def classify_system(system: EquilibriumSystem) -> Determinacy:
+    n_rows, n_cols = system.shape
+    if n_cols > CLASSIFY_DENSE_LIMIT:
+        return _classify_sparse(system)
+
+    a = system.matrix()
+    u, singular, vt = np.linalg.svd(a, full_matrices=True)
+    top = singular[0] if singular.size else 0.0
+    rank = int(np.count_nonzero(singular > RCOND_LIMIT * top)) if top > 0 else 0
+    condition = top / singular[rank - 1] if rank else np.inf
+
+    # Ядро A — состояния самонапряжения, они показывают лишние неизвестные
+    redundant = []
+    if rank < n_cols:
+        redundant = _redundant(system, np.abs(vt[rank:]).max(axis=0))
+
+    # Левое ядро A — виртуальные перемещения тел (u, v, θ), которым ничто не препятствует
+    free_mode = _free_mode(system, u[:, rank]) if rank < n_rows else {}
+    return Determinacy(n_cols - rank, n_rows - rank, condition, redundant, free_mode)
+
+
+def _classify_sparse(system: EquilibriumSystem) -> Determinacy:
+    # Для больших систем SVD заменяется обратными итерациями на одном разреженном
+    # разложении K = [[-γ·I, Â], [Âᵀ, -γ·I]], где Â — матрица равновесия с выровненными
+    # нормами строк и столбцов. Собственные числа K — ±σ - γ по сингулярным числам Â,
+    # поэтому шаг x → -γ·K⁻¹·x оставляет ядра Â без изменений и гасит остальное в σ/γ раз.
+    # Верхняя часть [s; 0] после итераций — проекция s на левое ядро (формы движения),
+    # нижняя часть [0; r] — проекция r на ядро (состояния самонапряжения). Число форм
+    # движения — ранг проекций пачки случайных векторов; пачка удваивается, пока он не
+    # меньше её половины.
+    n_rows, n_cols = system.shape
+    a = system.matrix(sparse=True).tocsr()
+    rows = 1 / np.maximum(spla.norm(a, axis=1), np.finfo(float).tiny)
+    a = sps.diags(rows) @ a
+    columns = 1 / np.maximum(spla.norm(a, axis=0), np.finfo(float).tiny)
+    a = a @ sps.diags(columns)
+
+    shift = SPARSE_SHIFT
+    lu = spla.splu(sps.bmat([[-shift * sps.identity(n_rows), a], [a.T, -shift * sps.identity(n_cols)]],
+                            format='csc'))
+
+    def project(probe: np.ndarray) -> np.ndarray:
+        for _ in range(CLASSIFY_ITERATIONS):
+            probe = -shift * lu.solve(probe)
+        return probe
+
+    rng = np.random.default_rng(0)
+    tolerance = RESIDUAL_LIMIT ** 0.5
+    size = 8
+    while True:
+        probe = np.concatenate([rng.standard_normal((n_rows, size)), np.zeros((n_cols, size))])
+        modes, singular, _ = np.linalg.svd(project(probe)[:n_rows], full_matrices=False)
+        freedom = int(np.count_nonzero(singular > tolerance * np.sqrt(n_rows)))
+        if freedom <= size // 2 or size >= n_rows:
+            break
+        size *= 2
+    degree = n_cols - (n_rows - freedom)
+
+    redundant = []
+    if degree > 0:
+        probe = np.concatenate([np.zeros((n_rows, 2)), rng.standard_normal((n_cols, 2))])
+        stresses = columns[:, None] * project(probe)[n_rows:]
+        redundant = _redundant(system, np.abs(stresses / np.abs(stresses).max(axis=0)).max(axis=1))
+
+    free_mode = _free_mode(system, rows * modes[:, 0]) if freedom > 0 else {}
+    return Determinacy(degree, freedom, np.nan, redundant, free_mode)
+
+
+def _redundant(system: EquilibriumSystem, weights: np.ndarray) -> list[str]:
+    # Неизвестные, заметно входящие в состояния самонапряжения
+    return [name for name, weight in zip(system.columns, weights) if weight > RESIDUAL_LIMIT ** 0.5]
+
+
+def _free_mode(system: EquilibriumSystem, mode: np.ndarray) -> dict["Node", tuple[float, float]]:
+    # Перемещения узлов по перемещениям (u, v, θ) тел, отнесённые к наибольшему
+    free_mode = {}
+    for row, beam in system.body_rows:
+        du, dv, dtheta = mode[row:row + 3]
+        for node in beam.get_nodes():
+            free_mode.setdefault(node, (du - dtheta * node.y, dv + dtheta * node.x))
+
+    scale = max((abs(d) for pair in free_mode.values() for d in pair), default=0.0)
+    return {
+        node: (dx / scale, dy / scale)
+        for node, (dx, dy) in free_mode.items()
+        if max(abs(dx), abs(dy)) > RESIDUAL_LIMIT ** 0.5 * scale
+    }
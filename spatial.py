@@ -0,0 +1,47 @@
+import math
+
+
+class SpatialIndex:
+    # Хеш-сетка для поиска узла по координатам. Сторона ячейки равна допуску,
+    # поэтому все точки ближе допуска лежат в соседних ячейках (3×3).
+    # При нулевом допуске ячейкой служит сама пара координат (точное совпадение).
+    def __init__(self, tolerance: float = 0.0):
+        if tolerance < 0 or math.isnan(tolerance):
+            raise ValueError("Допуск совпадения узлов не может быть отрицательным")
+        self.tolerance = float(tolerance)
+        self._cells: dict[tuple, list] = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, x: float, y: float) -> tuple:
+        if not self.tolerance:
+            return (x, y)
+        return (math.floor(x / self.tolerance), math.floor(y / self.tolerance))
+
+    def insert(self, node):
+        self._cells.setdefault(self._cell(node.x, node.y), []).append(node)
+        self._size += 1
+
+    def rebuild(self, nodes):
+        self._cells.clear()
+        self._size = 0
+        for node in nodes:
+            self.insert(node)
+
+    def find(self, x: float, y: float):
+        if not self.tolerance:
+            candidates = self._cells.get((x, y))
+            return candidates[0] if candidates else None
+
+        # Ближайший из узлов в пределах допуска
+        cx, cy = self._cell(x, y)
+        best, best_distance = None, self.tolerance
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for node in self._cells.get((i, j), ()):
+                    distance = math.hypot(node.x - x, node.y - y)
+                    if distance <= best_distance:
+                        best, best_distance = node, distance
+        return best
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Что измеряется: код, выполняемый в чистом процессе интерпретатора
+TARGETS = {
+    'structures': "import structures",
+    'batch': "import batch",
+    'solve': "from structures import *\n"
+             "beam = Beam()\n"
+             "node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(2, 0))\n"
+             "node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))\n"
+             "node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))\n"
+             "beam.add_segment(BeamSegment(node1, node2)).add_force(Force(10, 270, 1, 1, False))\n"
+             "beam.solve()",
+    # Автосохранение окна пишется во временный каталог, а не в журнал пользователя
+    'window': "import os, sys, tempfile\n"
+              "from PyQt6.QtWidgets import QApplication\n"
+              "app = QApplication(sys.argv)\n"
+              "from interface import MainWindow\n"
+              "window = MainWindow(os.path.join(tempfile.mkdtemp(), 'autosave'))\n"
+              "window.show()\n"
+              "app.processEvents()",
+}
+# Бюджет холодного запуска в миллисекундах (без учёта старта самого интерпретатора)
+BUDGETS_MS = {
+    'structures': 250,
+    'batch': 300,
+    'solve': 900,
+    'window': 1000,
+}
+HEAVY_MODULES = ('sympy', 'networkx', 'scipy', 'PyQt6')
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+exec(compile({code!r}, '<startup>', 'exec'))
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(target: str, repeat: int = 3) -> dict:
+    # Лучшее из нескольких запусков, время по пакетам — из python -X importtime
+    env = dict(os.environ)
+    if sys.platform.startswith('linux') and not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    probe = _PROBE.format(code=TARGETS[target], heavy=HEAVY_MODULES)
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    best = None
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                                 capture_output=True, text=True, cwd=cwd, env=env)
+        if process.returncode != 0:
+            raise RuntimeError(f"Не удалось измерить {target}: {process.stderr.strip().splitlines()[-1:]}")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        if best is None or result['elapsed'] < best['elapsed']:
+            best = {**result, 'packages': _package_times(process.stderr)}
+
+    elapsed_ms = best['elapsed'] * 1000
+    budget_ms = BUDGETS_MS.get(target)
+    return {
+        'target': target,
+        'elapsed_ms': round(elapsed_ms, 1),
+        'budget_ms': budget_ms,
+        'over_budget': budget_ms is not None and elapsed_ms > budget_ms,
+        'loaded': best['loaded'],
+        'packages': best['packages'],
+    }
+
+
+def _package_times(importtime_log: str) -> dict[str, float]:
+    # Собственное время импорта, сложенное по пакетам верхнего уровня, в миллисекундах
+    totals = defaultdict(float)
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us) / 1000
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def format_report(results: list[dict], top: int = 5) -> str:
+    lines = []
+    for result in results:
+        budget = f"{result['budget_ms']} мс" if result['budget_ms'] is not None else "—"
+        status = "ПРЕВЫШЕН" if result['over_budget'] else "ok"
+        lines.append(f"{result['target']:<12} {result['elapsed_ms']:>8.1f} мс  бюджет {budget:<8} {status}")
+        if result['loaded']:
+            lines.append(f"  загружены: {', '.join(result['loaded'])}")
+        packages = list(result['packages'].items())[:top]
+        lines.append("  " + ", ".join(f"{name} {ms:.0f} мс" for name, ms in packages))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='startup.py', description="Отчёт о времени холодного запуска")
+    parser.add_argument('targets', nargs='*', help=f"что измерять (по умолчанию всё): {', '.join(TARGETS)}")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="число запусков, берётся лучший")
+    parser.add_argument('-t', '--top', type=int, default=5, help="сколько самых тяжёлых пакетов показать")
+    parser.add_argument('--json', action='store_true', help="вывести результаты в JSON")
+    args = parser.parse_args(argv)
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"неизвестные цели: {', '.join(unknown)}")
+
+    results = [measure(target, args.repeat) for target in args.targets or TARGETS]
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(results, args.top))
+    return 1 if any(result['over_budget'] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
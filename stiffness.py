@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from diagrams import SegmentLoads
+from errors import MechanismError
+from lazy import lazy_import
+
+sps = lazy_import('scipy.sparse')
+spla = lazy_import('scipy.sparse.linalg')
+
+# Наименьшее число узлов Гаусса для распределённых нагрузок; для многочленов
+# высокой степени узлов берётся столько, чтобы эквивалентные силы были точными
+GAUSS_POINTS = 4
+
+
+class StiffnessSolution:
+    # Результат метода перемещений. reactions — реакции опор и усилия в шарнирах
+    # по внутренним именам, как в Beam.raw_solution. Перемещения узлов (u, v)
+    # и поворот theta — в порядке nodes; у шарнирного узла поворот свой для
+    # каждого тела, поэтому theta там nan, а повороты лежат в hinge_rotations[(узел, тело)].
+    def __init__(self, nodes: list, displacements: np.ndarray, hinge_rotations: dict, reactions: dict[str, float]):
+        self.nodes = nodes
+        self.displacements = displacements
+        self.hinge_rotations = hinge_rotations
+        self.reactions = reactions
+        self._index = {node: i for i, node in enumerate(nodes)}
+
+    def displacement(self, node) -> tuple[float, float, float]:
+        u, v, theta = self.displacements[self._index[node]]
+        return float(u), float(v), float(theta)
+
+
+def _element_matrices(lengths: np.ndarray, c: np.ndarray, s: np.ndarray, EA: np.ndarray, EI: np.ndarray) -> np.ndarray:
+    # Матрицы жёсткости плоских стержней в глобальных осях, форма (E, 6, 6);
+    # степени свободы концов: u1, v1, theta1, u2, v2, theta2
+    local = np.zeros((len(lengths), 6, 6))
+    axial = EA / lengths
+    b12, b6, b4, b2 = 12 * EI / lengths ** 3, 6 * EI / lengths ** 2, 4 * EI / lengths, 2 * EI / lengths
+    local[:, 0, 0] = local[:, 3, 3] = axial
+    local[:, 0, 3] = local[:, 3, 0] = -axial
+    local[:, 1, 1] = local[:, 4, 4] = b12
+    local[:, 1, 4] = local[:, 4, 1] = -b12
+    local[:, 1, 2] = local[:, 2, 1] = local[:, 1, 5] = local[:, 5, 1] = b6
+    local[:, 4, 2] = local[:, 2, 4] = local[:, 4, 5] = local[:, 5, 4] = -b6
+    local[:, 2, 2] = local[:, 5, 5] = b4
+    local[:, 2, 5] = local[:, 5, 2] = b2
+
+    rotation = np.zeros_like(local)
+    for k in (0, 3):
+        rotation[:, k, k] = rotation[:, k + 1, k + 1] = c
+        rotation[:, k, k + 1] = s
+        rotation[:, k + 1, k] = -s
+        rotation[:, k + 2, k + 2] = 1
+    return np.swapaxes(rotation, 1, 2) @ local @ rotation
+
+
+def _equivalent_loads(lengths: np.ndarray, c: np.ndarray, s: np.ndarray, loads: SegmentLoads) -> np.ndarray:
+    # Эквивалентные узловые силы от нагрузок на стержнях (работа на функциях формы Эрмита),
+    # в глобальных осях, форма (E, 6). Распределённые участки заменяются силами в узлах Гаусса.
+    # Квадратура по n узлам точна для степени 2n - 1, а q·N — многочлен степени deg q + 3
+    degree = loads.p_coef.shape[1] - 1
+    count = max(GAUSS_POINTS, math.ceil((degree + 4) / 2))
+    nodes, weights = np.polynomial.legendre.leggauss(count)
+    nodes, weights = (nodes + 1) / 2, weights / 2
+    span = loads.p_b - loads.p_a
+    at = loads.p_a[:, None] + span[:, None] * nodes
+    intensity = np.einsum('pk,pgk->pg', loads.p_coef, at[..., None] ** np.arange(degree + 1))
+    amount = intensity * weights * span[:, None]
+
+    point = loads.f_point
+    seg = np.concatenate([loads.f_seg[point], np.repeat(loads.p_seg, count)])
+    dist = np.concatenate([loads.f_dist[point], at.ravel()])
+    fx = np.concatenate([loads.f_x[point], (amount * loads.p_vx[:, None]).ravel()])
+    fy = np.concatenate([loads.f_y[point], (amount * loads.p_vy[:, None]).ravel()])
+    couple_seg, couple_dist, couple = loads.t_seg, loads.t_dist, loads.t_value
+
+    # Сила за пределами стержня переносится на ближайший конец вместе с моментом переноса
+    L = lengths[seg]
+    clipped = np.clip(dist, 0, L)
+    shift = dist - clipped
+    if np.any(shift):
+        moved = shift != 0
+        couple_seg = np.concatenate([couple_seg, seg[moved]])
+        couple_dist = np.concatenate([couple_dist, clipped[moved]])
+        couple = np.concatenate([couple, shift[moved] * (c[seg[moved]] * fy[moved] - s[seg[moved]] * fx[moved])])
+    dist = clipped
+
+    result = np.zeros((len(lengths), 6))
+    # Сосредоточенные силы: продольная часть — линейно, поперечная — по функциям формы
+    cs, sn = c[seg], s[seg]
+    along, across = fx * cs + fy * sn, -fx * sn + fy * cs
+    xi = dist / L
+    local = np.column_stack([
+        along * (1 - xi),
+        across * (1 - 3 * xi ** 2 + 2 * xi ** 3),
+        across * L * (xi - 2 * xi ** 2 + xi ** 3),
+        along * xi,
+        across * (3 * xi ** 2 - 2 * xi ** 3),
+        across * L * (xi ** 3 - xi ** 2),
+    ])
+    np.add.at(result, seg, _to_global(local, cs, sn))
+
+    # Сосредоточенные моменты — по производным функций формы
+    L = lengths[couple_seg]
+    xi = couple_dist / L
+    zero = np.zeros_like(xi)
+    local = np.column_stack([
+        zero,
+        couple * (6 * xi ** 2 - 6 * xi) / L,
+        couple * (1 - 4 * xi + 3 * xi ** 2),
+        zero,
+        couple * (6 * xi - 6 * xi ** 2) / L,
+        couple * (3 * xi ** 2 - 2 * xi),
+    ])
+    np.add.at(result, couple_seg, _to_global(local, c[couple_seg], s[couple_seg]))
+    return result
+
+
+def _to_global(local: np.ndarray, c: np.ndarray, s: np.ndarray) -> np.ndarray:
+    result = local.copy()
+    for k in (0, 3):
+        result[:, k] = c * local[:, k] - s * local[:, k + 1]
+        result[:, k + 1] = s * local[:, k] + c * local[:, k + 1]
+    return result
+
+
+def compute_stiffness(beam, bodies: list, default_section) -> StiffnessSolution:
+    # Метод перемещений для плоской рамы из стержней Эйлера — Бернулли.
+    # Узел шарнира получает отдельный поворот для каждого тела, в том числе над
+    # опорой, поэтому моменты в шарнире не передаются. Опоры исключают степени свободы
+    # матрицей Z: перемещения d = Z·r, где у наклонного катка одна свобода вдоль
+    # направления качения. Решается (Zᵀ·K·Z)·r = Zᵀ·f, реакции — невязка K·d - f.
+    graph = beam.graph
+    segments = graph.segments()
+    nodes = graph.node_list()
+    n_nodes, n_edges = len(nodes), len(segments)
+
+    coords = graph.coordinates()
+    ends = np.array([(graph.position(segment.node1), graph.position(segment.node2)) for segment in segments],
+                    dtype=np.int64).reshape(-1, 2)
+    delta = coords[ends[:, 1]] - coords[ends[:, 0]]
+    lengths = np.hypot(delta[:, 0], delta[:, 1])
+    c, s = delta[:, 0] / lengths, delta[:, 1] / lengths
+    sections = [segment.section or default_section for segment in segments]
+    EA = np.array([section.EA for section in sections], dtype=np.float64)
+    EI = np.array([section.EI for section in sections], dtype=np.float64)
+
+    # Сегмент между двумя шарнирами не входит ни в одно тело — он сам себе тело
+    body_of = {segment: k for k, body in enumerate(bodies) for segment in body.get_segments()}
+    body = np.array([body_of.get(segment, len(bodies) + e) for e, segment in enumerate(segments)], dtype=np.int64)
+    hinged = np.array([node.hinge is not None for node in nodes], dtype=bool)
+
+    # Повороты: один на узел, у шарнира — по одному на каждое тело
+    stride = len(bodies) + n_edges
+    rotation_key = np.where(hinged[ends], n_nodes + ends * stride + body[:, None], ends)
+    keys, rotation_index = np.unique(rotation_key, return_inverse=True)
+    rotation_index = rotation_index.reshape(ends.shape)
+    n_dofs = 2 * n_nodes + len(keys)
+    dofs = np.column_stack([2 * ends[:, 0], 2 * ends[:, 0] + 1, 2 * n_nodes + rotation_index[:, 0],
+                            2 * ends[:, 1], 2 * ends[:, 1] + 1, 2 * n_nodes + rotation_index[:, 1]])
+
+    matrices = _element_matrices(lengths, c, s, EA, EI)
+    stiffness = sps.coo_matrix(
+        (matrices.ravel(), (np.repeat(dofs, 6, axis=1).ravel(), np.tile(dofs, (1, 6)).ravel())),
+        shape=(n_dofs, n_dofs)
+    ).tocsr()
+
+    element_loads = _equivalent_loads(lengths, c, s, SegmentLoads(segments, {}))
+    loads = np.zeros(n_dofs)
+    np.add.at(loads, dofs, element_loads)
+
+    # Опоры: известные составляющие — нагрузки в узле, неизвестные — закреплённые направления.
+    # Опора под шарниром закрепляет поворот каждого тела, её момент — сумма по телам
+    node_rotation = np.full(n_nodes, -1, dtype=np.int64)
+    plain = keys < n_nodes
+    node_rotation[keys[plain]] = 2 * n_nodes + np.flatnonzero(plain)
+    rotations = {}
+    for k, i in enumerate(np.where(plain, keys, (keys - n_nodes) // stride).tolist()):
+        rotations.setdefault(i, []).append(2 * n_nodes + k)
+    fixed = np.zeros(n_dofs, dtype=bool)
+    inclined = []
+    for i, node in enumerate(nodes):
+        support = node.support
+        if support is None:
+            continue
+        force, torque = support.force, support.torque
+        if support.support_type == support.Type.ROLLER and support.angle % 90 != 0:
+            inclined.append((i, support.angle))
+        else:
+            if force.unknown_x:
+                fixed[2 * i] = True
+            else:
+                loads[2 * i] += force.part_x
+            if force.unknown_y:
+                fixed[2 * i + 1] = True
+            else:
+                loads[2 * i + 1] += force.part_y
+        if torque.unknown:
+            fixed[rotations[i]] = True
+        else:
+            loads[rotations[i][0]] += torque.value
+
+    free = ~fixed
+    for i, _ in inclined:
+        free[2 * i] = free[2 * i + 1] = False
+    columns = np.cumsum(free) - 1
+    rows = [np.flatnonzero(free)]
+    cols = [columns[free]]
+    values = [np.ones(int(free.sum()))]
+    n_free = int(free.sum())
+    for k, (i, angle) in enumerate(inclined):
+        rows.append(np.array([2 * i, 2 * i + 1]))
+        cols.append(np.array([n_free + k, n_free + k]))
+        values.append(np.array([math.cos(math.radians(angle)), math.sin(math.radians(angle))]))
+    Z = sps.csc_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                       shape=(n_dofs, n_free + len(inclined)))
+
+    reduced = (Z.T @ stiffness @ Z).tocsc()
+    try:
+        displacements = Z @ spla.splu(reduced).solve(Z.T @ loads)
+    except RuntimeError:
+        raise MechanismError("Система подвижна: матрица жёсткости вырождена!") from None
+    residual = stiffness @ displacements - loads
+
+    reactions = {}
+    for i, node in enumerate(nodes):
+        support = node.support
+        if support is None:
+            continue
+        nid = f'node_{node.id}'
+        if support.force.unknown_x:
+            reactions[f'{nid}_x'] = float(residual[2 * i])
+        if support.force.unknown_y:
+            reactions[f'{nid}_y'] = float(residual[2 * i + 1])
+        if support.torque.unknown:
+            reactions[f'{nid}_torque'] = float(residual[rotations[i]].sum())
+
+    # Усилие в шарнире на тело — сумма концевых сил его стержней в узле шарнира
+    end_forces = np.einsum('eij,ej->ei', matrices, displacements[dofs]) - element_loads
+    hinge_rotations = {}
+    for k, side in ((0, 0), (1, 3)):
+        at_hinge = np.flatnonzero(hinged[ends[:, k]])
+        for e in at_hinge.tolist():
+            node = nodes[ends[e, k]]
+            if body[e] >= len(bodies) or bodies[body[e]] not in node.hinge.bodies:
+                continue
+            owner = bodies[body[e]]
+            hinge_rotations[(node, owner)] = float(displacements[dofs[e, side + 2]])
+            if node.support is not None:
+                # Шарнир над опорой передаёт усилия через опору, как в уравнениях равновесия
+                continue
+            prefix = f'hinge_{node.hinge.id}_for_beam_{owner.id}'
+            reactions[f'{prefix}_force_x'] = reactions.get(f'{prefix}_force_x', 0.0) + float(end_forces[e, side])
+            reactions[f'{prefix}_force_y'] = reactions.get(f'{prefix}_force_y', 0.0) + float(end_forces[e, side + 1])
+
+    result = np.empty((n_nodes, 3))
+    result[:, 0] = displacements[0:2 * n_nodes:2]
+    result[:, 1] = displacements[1:2 * n_nodes:2]
+    result[:, 2] = np.where(node_rotation >= 0, displacements[np.maximum(node_rotation, 0)], np.nan)
+    return StiffnessSolution(nodes, result, hinge_rotations, reactions)
@@ -1,13 +1,50 @@
-import json
+from __future__ import annotations
+import hashlib
 import math
 from enum import Enum
-import networkx as nx
-import sympy as sp
+import numpy as np
 from errors import *
-from ids import IDNumerator
+from lazy import lazy_import
+import itertools
+from ids import IDNumerator, IDRegistry, activate_registry, use_registry
+from solver import EquilibriumSystem, DenseFactorization, SparseFactorization, Determinacy, classify_system
+from parametric import ParametricSolution
+from cache import SolutionCache
+from spatial import SpatialIndex
+from graph import StructureGraph
+from diagrams import InternalForces, compute_internal_forces
+from profiles import LoadProfile
+from influence import AxleTrain, InfluenceLines, compute_influence_lines
+from montecarlo import Deviation, MonteCarlo, ReactionStatistics
+from sensitivity import Sensitivity, compute_sensitivity
+from stiffness import StiffnessSolution, compute_stiffness
+from sweep import Sweep, compute_sweep
+
+sp = lazy_import('sympy')
+
+
+# Именованный параметр, который можно указать вместо числа в значении, угле,
+# отступе или длине нагрузки (см. Beam.solve_parametric)
+def parameter(name: str) -> sp.Symbol:
+    return sp.Symbol(name, real=True)
+
+
+def is_parameter(value) -> bool:
+    # Пока sympy не загружен, параметров (символов sympy) быть не может
+    return sp.loaded and isinstance(value, sp.Basic) and not value.is_number
+
+
+def cos_deg(angle) -> float:
+    return sp.cos(sp.rad(angle)) if is_parameter(angle) else math.cos(math.radians(angle))
+
+
+def sin_deg(angle) -> float:
+    return sp.sin(sp.rad(angle)) if is_parameter(angle) else math.sin(math.radians(angle))
 
 
 class Force(IDNumerator):
+    __slots__ = ('value', 'angle', 'node1_dist', 'length', 'unknown_x', 'unknown_y')
+
     def __init__(self,
                  value: float,
                  angle: float,
@@ -19,15 +56,15 @@ class Force(IDNumerator):
                  custom_id: int | None = None):
         super().__init__(custom_id)
 
-        if value < 0: raise NegativeOrZeroValueError("Значение силы не может быть отрицательным!")
+        if not is_parameter(value) and value < 0: raise NegativeOrZeroValueError("Значение силы не может быть отрицательным!")
         self.value: float = value
 
-        self.angle: float = angle % 360
+        self.angle: float = angle if is_parameter(angle) else angle % 360
 
-        if node1_dist < 0: raise NegativeOrZeroValueError("Расстояние от края не может быть отрицательным!")
+        if not is_parameter(node1_dist) and node1_dist < 0: raise NegativeOrZeroValueError("Расстояние от края не может быть отрицательным!")
         self.node1_dist: float = node1_dist
 
-        if length <= 0: raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
+        if not is_parameter(length) and length <= 0: raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
         self.length: float = length
 
         self.unknown_x: bool = unknown or unknown_x
@@ -49,7 +86,7 @@ class Force(IDNumerator):
         elif self.angle in (90, 270):
             return 0
         else:
-            return math.cos(math.radians(self.angle)) * self.value * self.length
+            return cos_deg(self.angle) * self.value * self.length
 
     @property
     def part_y(self):
@@ -60,7 +97,7 @@ class Force(IDNumerator):
         elif self.angle == 270:
             return -self.value * self.length
         else:
-            return math.sin(math.radians(self.angle)) * self.value * self.length
+            return sin_deg(self.angle) * self.value * self.length
 
     def __repr__(self):
         return f"Force(value={self.value}, angle={self.angle}, node1_dist={self.node1_dist}, length={self.length}, unknown={self.unknown})"
@@ -82,13 +119,37 @@ class Force(IDNumerator):
                 f"dist={self.node1_dist}, len={self.length}, unknown_x={self.unknown_x}, unknown_y={self.unknown_y}")
 
 
+class DistributedForce(Force):
+    # Распределённая нагрузка произвольного профиля (см. LoadProfile), действующая под углом angle.
+    # В уравнениях равновесия она заменяется равнодействующей: value — средняя интенсивность,
+    # length — длина участка, node1_dist — центр тяжести эпюры. Поэтому система уравнений,
+    # кэш решений и сохранение работают с ней так же, как с равномерной силой.
+    __slots__ = ('profile',)
+
+    def __init__(self, profile: LoadProfile, angle: float, custom_id: int | None = None):
+        total, centroid = profile.resultant()
+        super().__init__(total / profile.length, angle, centroid, profile.length, custom_id=custom_id)
+        self.profile: LoadProfile = profile
+
+    def __repr__(self):
+        return f"DistributedForce(profile={self.profile}, angle={self.angle})"
+
+    def pretty_print(self, indent=0):
+        pad = ' ' * indent
+        total, centroid = self.profile.resultant()
+        return (f"{pad}DistributedForce#{self.id}: total={total}, angle={self.angle}°, "
+                f"from={self.profile.start}, to={self.profile.end}, centroid={centroid}")
+
+
 class Torque(IDNumerator):
+    __slots__ = ('value', 'node1_dist', 'unknown')
+
     def __init__(self, value: float, node1_dist: float, unknown: bool = False, custom_id: int | None = None):
         super().__init__(custom_id)
 
         self.value: float = value
 
-        if node1_dist < 0: raise NegativeOrZeroValueError("Расстояние не может быть отрицательным!")
+        if not is_parameter(node1_dist) and node1_dist < 0: raise NegativeOrZeroValueError("Расстояние не может быть отрицательным!")
         self.node1_dist: float = node1_dist
 
         self.unknown: bool = unknown
@@ -101,7 +162,81 @@ class Torque(IDNumerator):
         return (f"{pad}Torque#{self.id}: val={self.value}, dist={self.node1_dist}, unknown={'Y' if self.unknown else 'N'}")
 
 
+def _support_field(name: str) -> property:
+    # Поле реакции, хранящееся в слоте опоры
+    return property(lambda self: getattr(self._support, name),
+                    lambda self, value: setattr(self._support, name, value))
+
+
+class SupportForce:
+    # Сила реакции опоры. Её поля хранятся в слотах Support, а этот объект создаётся
+    # при обращении к support.force. Читается и меняется как Force; номер выдаётся
+    # в ряду номеров Force, как и раньше. Точка приложения — узел опоры
+    __slots__ = ('_support',)
+    node1_dist = 0
+    length = 1
+
+    def __init__(self, support: "Support"):
+        self._support = support
+
+    value = _support_field('force_value')
+    angle = _support_field('force_angle')
+    unknown_x = _support_field('unknown_x')
+    unknown_y = _support_field('unknown_y')
+    part_x = Force.part_x
+    part_y = Force.part_y
+    get_type = Force.get_type
+    pretty_print = Force.pretty_print
+
+    @property
+    def id(self) -> int:
+        return self._support._force_id
+
+    @id.setter
+    def id(self, new_id: int):
+        support = self._support
+        if int(new_id) != support._force_id:
+            support._force_id = support._registry.change(Force, support._force_id, int(new_id))
+
+    def __repr__(self):
+        return f"SupportForce(value={self.value}, angle={self.angle}, unknown_x={self.unknown_x}, unknown_y={self.unknown_y})"
+
+
+class SupportTorque:
+    # Момент в заделке, см. SupportForce
+    __slots__ = ('_support',)
+    node1_dist = 0
+
+    def __init__(self, support: "Support"):
+        self._support = support
+
+    value = _support_field('torque_value')
+    unknown = _support_field('unknown_torque')
+    pretty_print = Torque.pretty_print
+
+    @property
+    def id(self) -> int:
+        return self._support._torque_id
+
+    @id.setter
+    def id(self, new_id: int):
+        support = self._support
+        if int(new_id) != support._torque_id:
+            support._torque_id = support._registry.change(Torque, support._torque_id, int(new_id))
+
+    def __repr__(self):
+        return f"SupportTorque(value={self.value}, unknown={self.unknown})"
+
+
 class Support(IDNumerator):
+    # Реакции хранятся прямо в слотах опоры, без вложенных Force и Torque;
+    # support.force и support.torque — представления этих слотов (SupportForce, SupportTorque)
+    __slots__ = ('support_type', 'angle', 'force_value', 'force_angle', 'unknown_x', 'unknown_y',
+                 'torque_value', 'unknown_torque', '_force_id', '_torque_id', '_node')
+    # Тип, угол, известные значения и флаги неизвестных опоры задают столбцы и правую
+    # часть системы, поэтому их изменение сбрасывает кэши балок узла, как и у Node
+    STRUCTURE_FIELDS = ('support_type', 'angle', 'force_value', 'force_angle', 'unknown_x', 'unknown_y',
+                        'torque_value', 'unknown_torque')
 
     class Type(Enum):
         FIXED = 0
@@ -120,6 +255,7 @@ class Support(IDNumerator):
                  custom_id: int | None = None,
                  is_new: bool = True):
         super().__init__(custom_id)
+        self._node: Node | None = None
         self.support_type = support_type
         self.angle: float = angle % 360
         magnitude, force_angle = Force.combine_force_projections(force_x, force_y)
@@ -137,8 +273,41 @@ class Support(IDNumerator):
                 ux = True
                 uy = True
 
-        self.force: Force = Force(magnitude, angle + force_angle, 0, 1, unknown_x=ux, unknown_y=uy)
-        self.torque: Torque = Torque(torque, 0, unknown_t)
+        self.force_value: float = magnitude
+        self.force_angle: float = (angle + force_angle) % 360
+        self.unknown_x: bool = ux
+        self.unknown_y: bool = uy
+        self.torque_value: float = torque
+        self.unknown_torque: bool = unknown_t
+        # Номера реакций — в рядах Force и Torque того же реестра
+        self._force_id = self._registry.allocate(Force)
+        self._torque_id = self._registry.allocate(Torque)
+
+    def __setattr__(self, name, value):
+        if name in Support.STRUCTURE_FIELDS:
+            self.touch()
+        super().__setattr__(name, value)
+
+    @property
+    def force(self) -> SupportForce:
+        return SupportForce(self)
+
+    @property
+    def torque(self) -> SupportTorque:
+        return SupportTorque(self)
+
+    def renumber_reactions(self, registry: IDRegistry):
+        # Следующие номера реакций в реестре registry; вызывается до переноса самой опоры
+        # (IDRegistry.renumber), пока старые номера ещё можно освободить в её реестре
+        if self._registry is not registry:
+            self._registry.release(Force, self._force_id)
+            self._registry.release(Torque, self._torque_id)
+        self._force_id = registry.allocate(Force)
+        self._torque_id = registry.allocate(Torque)
+
+    def touch(self):
+        if self._node is not None:
+            self._node.touch()
 
     def __repr__(self):
         return f"Support(angle={self.angle}, force={self.force}, torque={self.torque})"
@@ -152,6 +321,8 @@ class Support(IDNumerator):
 
 
 class Hinge(IDNumerator):
+    __slots__ = ('bodies',)
+
     def __init__(self, custom_id: int | None = None):
         super().__init__(custom_id)
         self.bodies: list["Beam"] = []
@@ -166,8 +337,14 @@ class Hinge(IDNumerator):
         return f"{pad}Hinge#{self.id}: bodies=[{parts}]"
 
 class Node(IDNumerator):
+    __slots__ = ('x', 'y', 'support', 'hinge', '_beams')
+    # Изменение этих полей меняет структуру балок, содержащих узел, и сбрасывает их кэши
+    STRUCTURE_FIELDS = ('x', 'y', 'support', 'hinge')
+
     def __init__(self, x: float, y: float, custom_id: int | None = None):
         super().__init__(custom_id)
+        # Балки, в которые узел добавлен; кортеж, чтобы одиночный узел не занимал лишней памяти
+        self._beams: tuple["Beam", ...] = ()
         self.x: float = x
         self.y: float = y
         self.support: Support = None
@@ -179,14 +356,30 @@ class Node(IDNumerator):
     def add_hinge(self):
         self.hinge = Hinge()
 
+    def __setattr__(self, name, value):
+        if name in Node.STRUCTURE_FIELDS:
+            self.touch(geometry=name in ('x', 'y'), hinge=name == 'hinge')
+            if name == 'support':
+                # Опора сообщает об изменениях своих полей узлу, в котором стоит
+                old = getattr(self, 'support', None)
+                if old is not None and old._node is self:
+                    old._node = None
+                if value is not None:
+                    value._node = self
+        super().__setattr__(name, value)
+
+    def touch(self, geometry: bool = False, hinge: bool = False):
+        # Сообщает об изменении только балкам, в которых есть этот узел
+        for beam in self._beams:
+            beam.touch_structure(geometry, hinge)
+
     def __repr__(self):
         return f"Node(coords=({self.x}, {self.y}), support={self.support})"
 
-    def __hash__(self):
-        return hash((self.x, self.y, self.id))
-
-    def __eq__(self, other):
-        return isinstance(other, Node) and self.id == other.id
+    # Узел остаётся ключом графа и после перенумерации в reassign_ids,
+    # поэтому хеш и сравнение основаны на самом объекте, а не на номере
+    __hash__ = object.__hash__
+    __eq__ = object.__eq__
     
     def pretty_print(self, indent=0):
         pad = ' ' * indent
@@ -198,28 +391,69 @@ class Node(IDNumerator):
         return '\n'.join(lines)
 
 
+class Section:
+    # Жёсткости сечения сегмента для метода перемещений: EA — при растяжении-сжатии,
+    # EI — при изгибе. По умолчанию — стальной прокатный профиль средней величины.
+    __slots__ = ('EA', 'EI')
+    DEFAULT_EA = 1.0e9
+    DEFAULT_EI = 1.0e7
+
+    def __init__(self, EA: float = DEFAULT_EA, EI: float = DEFAULT_EI):
+        if EA <= 0 or EI <= 0: raise NegativeOrZeroValueError("Жёсткость сечения должна быть положительной!")
+        self.EA: float = EA
+        self.EI: float = EI
+
+    def __eq__(self, other):
+        return isinstance(other, Section) and (self.EA, self.EI) == (other.EA, other.EI)
+
+    def __repr__(self):
+        return f"Section(EA={self.EA}, EI={self.EI})"
+
+
 class BeamSegment(IDNumerator):
-    def __init__(self, node1: Node, node2: Node, custom_id: int | None = None):
+    __slots__ = ('node1', 'node2', 'forces', 'torques', 'section')
+    STRUCTURE_FIELDS = ('node1', 'node2')
+
+    def __init__(self, node1: Node, node2: Node, custom_id: int | None = None, section: Section | None = None):
         super().__init__(custom_id)
         self.node1: Node = node1
         self.node2: Node = node2
         self.forces: list[Force] = []
         self.torques: list[Torque] = []
+        self.section: Section | None = section
 
     def add_force(self, force: Force):
-        if force.node1_dist > self.length:
+        if isinstance(force, DistributedForce):
+            if force.profile.end > self.length + Beam.NODE_TOLERANCE:
+                raise HighDistanceError("Распределённая нагрузка выходит за пределы сегмента!")
+        elif not is_parameter(force.node1_dist) and force.node1_dist > self.length:
             raise HighDistanceError("Отступ не может быть больше длины сегмента!")
         self.forces.append(force)
 
     def add_torque(self, torque: Torque):
-        if torque.node1_dist > self.length:
+        if not is_parameter(torque.node1_dist) and torque.node1_dist > self.length:
             raise HighDistanceError("Отступ не может быть больше длины сегмента!")
         self.torques.append(torque)
 
+    def __setattr__(self, name, value):
+        if name in BeamSegment.STRUCTURE_FIELDS:
+            # Меняются балки и прежнего, и нового конца
+            old = getattr(self, name, None)
+            if old is not None:
+                old.touch()
+            value.touch()
+        super().__setattr__(name, value)
+
     @property
     def length(self):
         return math.hypot(self.node1.x - self.node2.x, self.node1.y - self.node2.y)
 
+    def point_at(self, dist: float) -> tuple[float, float]:
+        length = self.length
+        x = self.node1.x + dist * (self.node2.x - self.node1.x) / length
+        y = self.node1.y + dist * (self.node2.y - self.node1.y) / length
+        return x, y
+
     def __repr__(self):
         return f"BeamSegment(from={self.node1}, to={self.node2}, forces={self.forces}, torques={self.torques})"
     
@@ -233,70 +467,225 @@ class BeamSegment(IDNumerator):
         return '\n'.join(lines)
 
 
+def has_hinge(node: Node) -> bool:
+    return node.hinge is not None
+
+
 class Beam(IDNumerator):
-    def __init__(self, segments: list[BeamSegment] = [], custom_id: int | None = None):
-        super().__init__(custom_id)
-        self.graph = nx.Graph()
+    # Число сегментов, начиная с которого по умолчанию используется численное решение
+    NUMERIC_THRESHOLD = 10
+    # Число сегментов, начиная с которого система собирается в разреженном виде
+    SPARSE_THRESHOLD = 200
+    # Узлы, расстояние между которыми не больше допуска, считаются одним узлом
+    NODE_TOLERANCE = 1e-9
+    # Кэш ответов solve по содержимому балки. По умолчанию выключен: ключ — хеш всей
+    # балки, и без кэша повторное решение после смены нагрузок идёт сразу по готовому
+    # разложению. Включается для всех балок (Beam.solution_cache = SolutionCache())
+    # или для одной (beam.solution_cache = ...)
+    solution_cache: SolutionCache | None = None
+
+    # Номера ревизий общие для всех балок, поэтому ревизия одной балки не совпадёт с чужой
+    _revisions = itertools.count(1)
+
+    def touch_structure(self, geometry: bool = False, hinge: bool = False):
+        # Ревизии этой балки: structure_revision — любые структурные изменения (узлы,
+        # сегменты, опоры, шарниры), geometry_revision — перемещения узлов (по ней
+        # перестраивается пространственный индекс), hinge_revision — шарниры (по ней
+        # перепроверяется разбиение на тела). next() у itertools.count атомарен
+        revision = next(Beam._revisions)
+        self.structure_revision = revision
+        if geometry:
+            self.geometry_revision = revision
+        if hinge:
+            self.hinge_revision = revision
+
+    def __init__(self, segments: list[BeamSegment] = [], custom_id: int | None = None, tolerance: float | None = None,
+                 registry: IDRegistry | None = None):
+        # У каждой балки свой реестр номеров; элементы переходят в него при reassign_ids.
+        # Чтобы новые элементы сразу нумеровались в нём, реестр включают явно (activate)
+        self.registry = registry if registry is not None else IDRegistry()
+        super().__init__(custom_id, registry=self.registry)
+        self.graph = StructureGraph(is_cut=has_hinge)
+        self.structure_revision = self.geometry_revision = self.hinge_revision = 0
+        self._hinge_revision = 0
+        self._factorized = None
+        self._split = None
+        self._node_index = SpatialIndex(Beam.NODE_TOLERANCE if tolerance is None else tolerance)
+        self._node_index_revision = 0
         for s in segments:
             self.add_segment(s)
 
     def add_node(self, node: Node):
-        for existing_node in self.graph.nodes:
-            if existing_node.x == node.x and existing_node.y == node.y:
-                return existing_node
+        existing_node = self.find_node(node.x, node.y)
+        if existing_node is not None:
+            return existing_node
 
         self.graph.add_node(node)
+        node._beams += (self,)
+        self._node_index.insert(node)
+        self.touch_structure()
         return node
 
+    def activate(self):
+        # Делает реестр балки текущим в этом потоке: новые элементы нумеруются в нём
+        activate_registry(self.registry)
+
+    def find_node(self, x: float, y: float) -> Node | None:
+        # Индекс перестраивается, если узлы двигали или граф меняли в обход add_node
+        index = self._node_index
+        if self._node_index_revision != self.geometry_revision or len(index) != self.graph.number_of_nodes():
+            index.rebuild(self.graph.nodes)
+            self._node_index_revision = self.geometry_revision
+        return index.find(x, y)
+
     def add_segment(self, segment: BeamSegment) -> BeamSegment:
         node1 = self.add_node(segment.node1)
         node2 = self.add_node(segment.node2)
 
-        if node1.x == node2.x and node1.y == node2.y:
+        if node1 is node2:
             raise DotBeamError("Балка не может начинаться и заканчиваться в одной точке!")
 
-        if self.graph.has_edge(node1, node2):
-            return self.graph[node1][node2]['object']
+        existing_segment = self.graph.segment(node1, node2)
+        if existing_segment is not None:
+            return existing_segment
 
         self.graph.add_edge(node1, node2, object=segment)
+        self.touch_structure()
         return segment
 
+    # Столбцы таблиц для from_arrays; флаги неизвестных — 0 или 1
+    SUPPORT_COLUMNS = ('node', 'type', 'angle', 'force_x', 'force_y', 'torque', 'unknown_fx', 'unknown_fy', 'unknown_t')
+    FORCE_COLUMNS = ('segment', 'value', 'angle', 'node1_dist', 'length', 'unknown')
+    TORQUE_COLUMNS = ('segment', 'value', 'node1_dist', 'unknown')
+
+    @classmethod
+    def from_arrays(cls, nodes: np.ndarray, segments: np.ndarray, supports: np.ndarray | None = None,
+                    hinges: np.ndarray | None = None, forces: np.ndarray | None = None,
+                    torques: np.ndarray | None = None, tolerance: float | None = None) -> "Beam":
+        # Балка из таблиц: nodes — координаты (N, 2), segments — номера концов (E, 2),
+        # hinges — номера узлов с шарнирами, строки supports, forces и torques — аргументы
+        # Support, Force и Torque в порядке SUPPORT_COLUMNS, FORCE_COLUMNS и TORQUE_COLUMNS
+        # (вместо узла и сегмента — их номера в nodes и segments).
+        # Результат тот же, что у цепочки add_node/add_segment/add_force/add_torque,
+        # но все проверки выполняются над массивами до создания объектов
+        def table(values, columns: tuple, name: str) -> np.ndarray:
+            values = np.asarray(values if values is not None else np.empty((0, len(columns))), dtype=np.float64)
+            if values.ndim != 2 or values.shape[1] != len(columns):
+                raise IncorrectInputError(f"Таблица {name} должна иметь форму (N, {len(columns)})!")
+            if not np.all(np.isfinite(values)):
+                raise NotANumberError(f"В таблице {name} есть нечисловые значения!")
+            return values
+
+        def indices(values: np.ndarray, size: int, message: str) -> np.ndarray:
+            if np.any(values != np.floor(values)) or np.any(values < 0) or np.any(values >= size):
+                raise IncorrectInputError(message)
+            return values.astype(np.int64)
+
+        coords = table(nodes, ('x', 'y'), 'nodes')
+        ends = indices(table(segments, ('node1', 'node2'), 'segments'), len(coords), "Номер узла сегмента вне диапазона!")
+        supports = table(supports, Beam.SUPPORT_COLUMNS, 'supports')
+        forces = table(forces, Beam.FORCE_COLUMNS, 'forces')
+        torques = table(torques, Beam.TORQUE_COLUMNS, 'torques')
+        hinges = indices(np.asarray(hinges if hinges is not None else [], dtype=np.float64).ravel(), len(coords),
+                         "Номер узла шарнира вне диапазона!")
+
+        support_nodes = indices(supports[:, 0], len(coords), "Номер узла опоры вне диапазона!")
+        if len(np.unique(support_nodes)) != len(support_nodes):
+            raise IncorrectInputError("В узле может быть только одна опора!")
+        if not np.all(np.isin(supports[:, 1], [t.value for t in Support.Type])):
+            raise IncorrectInputError("Неизвестный тип опоры!")
+        force_segments = indices(forces[:, 0], len(ends), "Номер сегмента силы вне диапазона!")
+        torque_segments = indices(torques[:, 0], len(ends), "Номер сегмента момента вне диапазона!")
+        if np.any(forces[:, 1] < 0):
+            raise NegativeOrZeroValueError("Значение силы не может быть отрицательным!")
+        if np.any(forces[:, 3] < 0):
+            raise NegativeOrZeroValueError("Расстояние от края не может быть отрицательным!")
+        if np.any(forces[:, 4] <= 0):
+            raise NegativeOrZeroValueError("Длина действия силы должна быть положительной!")
+        if np.any(torques[:, 2] < 0):
+            raise NegativeOrZeroValueError("Расстояние не может быть отрицательным!")
+
+        beam = cls(tolerance=tolerance)
+
+        with use_registry(beam.registry):
+            # Совпадающие в пределах допуска узлы объединяются, как в add_node
+            index = beam._node_index
+            node_list, number = [], {}
+            merged = np.empty(len(coords), dtype=np.int64)
+            for i, (x, y) in enumerate(coords.tolist()):
+                node = index.find(x, y)
+                if node is None:
+                    node = Node(x, y)
+                    node._beams = (beam,)
+                    index.insert(node)
+                    number[node] = len(node_list)
+                    node_list.append(node)
+                merged[i] = number[node]
+            beam.graph.add_nodes(node_list)
+
+            # Повторные сегменты между теми же узлами сводятся к первому, как в add_segment
+            first, second = merged[ends[:, 0]], merged[ends[:, 1]]
+            if np.any(first == second):
+                raise DotBeamError("Балка не может начинаться и заканчиваться в одной точке!")
+            lo, hi = np.minimum(first, second), np.maximum(first, second)
+            _, unique, inverse = np.unique((lo << 32) | hi, return_index=True, return_inverse=True)
+            kept = np.sort(unique)
+            renumber = np.empty(len(ends), dtype=np.int64)
+            renumber[kept] = np.arange(len(kept))
+            owner = renumber[unique[inverse.ravel()]]
+
+            xy = np.array([(node.x, node.y) for node in node_list], dtype=np.float64).reshape(-1, 2)
+            lengths = np.hypot(*(xy[first[kept]] - xy[second[kept]]).T)
+            if np.any(forces[:, 3] > lengths[owner[force_segments]]):
+                raise HighDistanceError("Отступ не может быть больше длины сегмента!")
+            if np.any(torques[:, 2] > lengths[owner[torque_segments]]):
+                raise HighDistanceError("Отступ не может быть больше длины сегмента!")
+
+            for row in supports.tolist():
+                node = node_list[merged[int(row[0])]]
+                node.add_support(Support(Support.Type(int(row[1])), row[2], row[3], row[4], row[5],
+                                         bool(row[6]), bool(row[7]), bool(row[8])))
+            for i in hinges.tolist():
+                node_list[merged[i]].add_hinge()
+
+            segment_list = [BeamSegment(node_list[i], node_list[j]) for i, j in zip(first[kept].tolist(), second[kept].tolist())]
+            for e, row in zip(owner[force_segments].tolist(), forces.tolist()):
+                segment_list[e].forces.append(Force(row[1], row[2], row[3], row[4], bool(row[5])))
+            for e, row in zip(owner[torque_segments].tolist(), torques.tolist()):
+                segment_list[e].torques.append(Torque(row[1], row[2], bool(row[3])))
+            beam.graph.add_edges(first[kept], second[kept], segment_list)
+        beam.touch_structure()
+        return beam
+
     def get_segments(self):
-        return [data['object'] for _, _, data in self.graph.edges(data=True)]
+        return self.graph.segments()
 
     def get_nodes(self):
-        return list(self.graph.nodes)
+        return self.graph.node_list()
 
     def reassign_ids(self):
-        for cls in [Node, BeamSegment, Force, Torque, Support]:
-            cls._next_id = 1
-            cls._used_ids.clear()
-
-        for idx, node in enumerate(self.get_nodes(), start=1):
-            node.id = idx
-            if node.support:
-                node.support.id = Support._next_id
-                Support._used_ids.add(Support._next_id)
-                Support._next_id += 1
-
-                node.support.force.id = Force._next_id
-                Force._used_ids.add(Force._next_id)
-                Force._next_id += 1
-
-                node.support.torque.id = Torque._next_id
-                Torque._used_ids.add(Torque._next_id)
-                Torque._next_id += 1
-
-        for idx, segment in enumerate(self.get_segments(), start=1):
-            segment.id = idx
-            for force in segment.forces:
-                force.id = Force._next_id
-                Force._used_ids.add(Force._next_id)
-                Force._next_id += 1
-            for torque in segment.torques:
-                torque.id = Torque._next_id
-                Torque._used_ids.add(Torque._next_id)
-                Torque._next_id += 1
+        nodes = self.get_nodes()
+        segments = self.get_segments()
+        supports = [node.support for node in nodes if node.support]
+        hinges = list(dict.fromkeys(node.hinge for node in nodes if node.hinge))
+
+        registry = self.registry
+        with registry.lock:
+            registry.reset()
+
+            # Основная балка всегда получает номер 1, подбалки нумеруются с 2
+            registry.renumber(self)
+            if self._split is not None and self._split[0] == self.structure_revision:
+                registry.renumber(*self._split[1])
+
+            registry.renumber(*nodes)
+            for support in supports:
+                support.renumber_reactions(registry)
+            registry.renumber(*supports)
+            registry.renumber(*hinges)
+            registry.renumber(*segments)
+            registry.renumber(*(force for segment in segments for force in segment.forces))
+            registry.renumber(*(torque for segment in segments for torque in segment.torques))
 
     @staticmethod
     def format_readable_answers(answer_dict: dict[str, float]) -> dict[str, float]:
@@ -382,8 +771,7 @@ class Beam(IDNumerator):
         for segment in self.get_segments():
             sid = f'segment_{segment.id}'
             for force in segment.forces:
-                x = segment.node1.x + force.node1_dist * (segment.node2.x - segment.node1.x) / segment.length
-                y = segment.node1.y + force.node1_dist * (segment.node2.y - segment.node1.y) / segment.length
+                x, y = segment.point_at(force.node1_dist)
                 add_force_parts(f'{sid}_force_{force.id}', force, x, y)
             for torque in segment.torques:
                 t_dict[f'{sid}_torque_{torque.id}'] = '?' if torque.unknown else torque.value
@@ -410,24 +798,346 @@ class Beam(IDNumerator):
 
         return eqs, secondary_eqs, unknowns, all_symbols
 
-    def solve(self):
+    @staticmethod
+    def round_value(value: float) -> float:
+        value = round(float(value), 2)
+        return 0.0 if value == 0 else value
+
+    @staticmethod
+    def round_answers(raw_answer: dict[str, float]) -> dict[str, float]:
+        return {key: Beam.round_value(raw_answer[key]) for key in sorted(raw_answer)}
+
+    def check_structure(self):
         if len(self.graph.nodes) == 0:
             raise NoBeamError("Нет балки!")
         
         if all(node.support is None for node in self.get_nodes()):
             raise NoSupportsError("Вы не добавили опор!")
 
-        if not nx.is_connected(self.graph):
+        if not self.graph.is_connected():
             raise DividedBeamError("Балка состоит из несвязанных сегментов!")
 
+    def solve(self, method: str = 'auto'):
+        if method == 'auto':
+            segments_count = len(self.graph.edges)
+            if segments_count <= Beam.NUMERIC_THRESHOLD:
+                method = 'symbolic'
+            elif segments_count <= Beam.SPARSE_THRESHOLD:
+                method = 'numeric'
+            else:
+                method = 'sparse'
+
+        if method not in ('numeric', 'sparse', 'symbolic', 'stiffness'):
+            raise IncorrectInputError(f"Неизвестный метод решения: {method}")
+
+        cache = self.solution_cache
+        if cache is not None:
+            key = f'{method}:{self.content_hash()}'
+            answer = cache.get(key)
+            if answer is not None:
+                # Номера в подписях ответа — номера после перенумерации, как при решении
+                self.reassign_ids()
+                return answer
+
+        if method == 'symbolic':
+            self.check_structure()
+            self.reassign_ids()
+            subbeams = self.split_beam_by_hinges()
+            self.check_determinacy(subbeams)
+            answer = self.solve_symbolic(subbeams)
+        elif method == 'stiffness':
+            answer = Beam.format_readable_answers(Beam.round_answers(self.solve_stiffness().reactions))
+        else:
+            answer = self.solve_numeric(sparse=method == 'sparse')
+
+        if cache is not None:
+            cache.put(key, answer)
+        return answer
+
+    def content_hash(self) -> str:
+        # Хеш координат, опор, шарниров и нагрузок, не зависящий от номеров объектов.
+        # Порядок узлов и сегментов учитывается: от него зависит нумерация в ответе.
+        def canonical(value) -> str:
+            return str(value) if is_parameter(value) else (float(value) + 0.0).hex()
+
+        node_index = {}
+        hinge_index = {}
+        parts = []
+
+        for node in self.get_nodes():
+            node_index[node] = len(node_index)
+            parts.append(f'N{canonical(node.x)},{canonical(node.y)}')
+            if node.support:
+                support = node.support
+                force, torque = support.force, support.torque
+                parts.append(
+                    f'S{support.support_type.value},{canonical(support.angle)},'
+                    f'{canonical(force.value)},{canonical(force.angle)},{force.unknown_x:d}{force.unknown_y:d},'
+                    f'{canonical(torque.value)},{torque.unknown:d}'
+                )
+            if node.hinge:
+                parts.append(f'H{hinge_index.setdefault(node.hinge, len(hinge_index))}')
+
+        for segment in self.get_segments():
+            parts.append(f'B{node_index[segment.node1]},{node_index[segment.node2]}')
+            if segment.section is not None:
+                parts.append(f'E{canonical(segment.section.EA)},{canonical(segment.section.EI)}')
+            for force in segment.forces:
+                parts.append(
+                    f'F{canonical(force.value)},{canonical(force.angle)},{canonical(force.node1_dist)},'
+                    f'{canonical(force.length)},{force.unknown_x:d}{force.unknown_y:d}'
+                )
+            for torque in segment.torques:
+                parts.append(f'T{canonical(torque.value)},{canonical(torque.node1_dist)},{torque.unknown:d}')
+
+        return hashlib.sha256(';'.join(parts).encode()).hexdigest()
+
+    def classify(self) -> Determinacy:
+        self.check_structure()
         self.reassign_ids()
+        return classify_system(EquilibriumSystem(self.split_beam_by_hinges(), with_loads=False))
+
+    def check_determinacy(self, subbeams: list["Beam"]):
+        # Быстрая проверка по рангу матрицы равновесия до дорогого символьного решения.
+        # Неизвестные нагрузки на сегментах меняют набор столбцов — их оставляем sympy.
+        forces, torques = self.segment_loads()
+        if Beam._has_unknown_loads(forces, torques):
+            return
+        system = EquilibriumSystem(subbeams, with_loads=False)
+        determinacy = classify_system(system)
+        if determinacy.type == Determinacy.Type.MECHANISM and determinacy.degree == 0:
+            # Подвижная система решается, если нагрузки уравновешены на её возможных
+            # перемещениях, — проверяем совместность так же, как численное решение
+            try:
+                rhs = system.case_rhs(forces, torques)
+            except TypeError:
+                # В нагрузках параметры: совместность зависит от их значений, её проверит sympy
+                return
+            try:
+                system.factorize().solve(rhs)
+                return
+            except UnsolvableError:
+                pass
+        Beam.raise_for_determinacy(determinacy)
 
-        subbeams = self.split_beam_by_hinges()
+    @staticmethod
+    def raise_for_determinacy(determinacy: Determinacy):
+        def listing(items: list[str], limit: int = 10) -> str:
+            return ', '.join(items[:limit]) + (', …' if len(items) > limit else '')
+
+        if determinacy.type == Determinacy.Type.MECHANISM:
+            nodes = listing([str(node.id) for node in determinacy.free_mode])
+            message = (f"Система подвижна! Подвижные узлы: {nodes}" if nodes else
+                       "Невозможно найти решение либо система подвижна!")
+            if determinacy.degree > 0:
+                # Часть системы при этом может быть неопределимой
+                message += f". Степень статической неопределимости: {determinacy.degree}"
+            raise MechanismError(message)
+
+        if determinacy.type == Determinacy.Type.INDETERMINATE:
+            message = f"Слишком много неизвестных! Степень статической неопределимости: {determinacy.degree}"
+            if determinacy.redundant:
+                names = Beam.format_readable_answers({name: name for name in sorted(determinacy.redundant)})
+                message += f". Лишние реакции: {listing(list(names))}"
+            raise IndeterminateError(message)
+
+    def segment_loads(self) -> tuple[list[tuple[BeamSegment, Force]], list[tuple[BeamSegment, Torque]]]:
+        forces, torques = [], []
+        for segment in self.get_segments():
+            forces.extend((segment, force) for force in segment.forces)
+            torques.extend((segment, torque) for torque in segment.torques)
+        return forces, torques
+
+    def factorized_system(self, sparse: bool = False):
+        # Матрица системы зависит только от структуры балки, поэтому её разложение
+        # хранится до первого изменения узлов, сегментов, опор или шарниров.
+        # Вместе с ним хранятся подписи ответа: читаемое имя → номер столбца.
+        key = (self.structure_revision, sparse, len(self.graph.nodes), len(self.graph.edges))
+        if self._factorized is not None and self._factorized[0] == key:
+            return self._factorized[1:]
+
+        self._factorized = None
+        self.check_structure()
+        self.reassign_ids()
+        system = EquilibriumSystem(self.split_beam_by_hinges(), with_loads=False)
+        try:
+            factorization = system.factorize(sparse)
+        except (UnsolvableError, TooManyUnknownsError):
+            Beam.raise_for_determinacy(classify_system(system))
+            raise
+        labels = Beam.format_readable_answers({name: system.index[name] for name in sorted(system.columns)})
+        self._factorized = (key, system, factorization, labels)
+        return system, factorization, labels
+
+    @staticmethod
+    def _has_unknown_loads(forces: list[tuple[BeamSegment, Force]], torques: list[tuple[BeamSegment, Torque]]) -> bool:
+        return any(force.unknown_x or force.unknown_y for _, force in forces) or any(torque.unknown for _, torque in torques)
 
+    @staticmethod
+    def _solve_factorized(system: EquilibriumSystem, factorization, forces, torques) -> list[float]:
+        try:
+            return factorization.solve(system.case_rhs(forces, torques)).tolist()
+        except UnsolvableError:
+            # Нагрузки не уравновешены на возможных перемещениях — уточняем, какие узлы подвижны
+            Beam.raise_for_determinacy(classify_system(system))
+            raise
+
+    def solve_numeric(self, sparse: bool = False):
+        forces, torques = self.segment_loads()
+
+        if Beam._has_unknown_loads(forces, torques):
+            # Неизвестные нагрузки на сегментах добавляют столбцы — собираем систему целиком
+            return Beam.format_readable_answers(Beam.round_answers(self.raw_solution(sparse)))
+
+        system, factorization, labels = self.factorized_system(sparse)
+        solution = Beam._solve_factorized(system, factorization, forces, torques)
+        return {label: Beam.round_value(solution[col]) for label, col in labels.items()}
+
+    def raw_solution(self, sparse: bool = False) -> dict[str, float]:
+        # Неокруглённые значения неизвестных по внутренним именам столбцов
+        # (node_1_x, hinge_2_for_beam_3_force_y, ...) — для расчётов поверх реакций
+        forces, torques = self.segment_loads()
+        if Beam._has_unknown_loads(forces, torques):
+            self.check_structure()
+            self.reassign_ids()
+            return EquilibriumSystem(self.split_beam_by_hinges()).solve(sparse)
+
+        system, factorization, _ = self.factorized_system(sparse)
+        return dict(zip(system.columns, Beam._solve_factorized(system, factorization, forces, torques)))
+
+    def internal_forces(self, points: int = 21, step: float | None = None, sparse: bool | None = None) -> InternalForces:
+        # Эпюры N, Q, M по всем сегментам: points точек на сегмент или шаг step по длине
+        if sparse is None:
+            sparse = len(self.graph.edges) > Beam.SPARSE_THRESHOLD
+        return compute_internal_forces(self, self.raw_solution(sparse), points, step)
+
+    def influence_lines(self, segments: list[BeamSegment] | None = None, points: int = 101,
+                        step: float | None = None, angle: float = 270, sparse: bool | None = None) -> InfluenceLines:
+        # Линии влияния всех неизвестных от единичной силы под углом angle, проходящей
+        # по сегментам segments (по умолчанию по всем в порядке добавления)
+        if segments is None:
+            segments = self.get_segments()
+        existing = set(self.get_segments())
+        for segment in segments:
+            if segment not in existing:
+                raise NonExistentError(f"Сегмент балки {segment.id} не существует!")
+        if sparse is None:
+            sparse = len(self.graph.edges) > Beam.SPARSE_THRESHOLD
+
+        system, factorization, labels = self.factorized_system(sparse)
+        unit = Force(1, angle, 0)
+        return compute_influence_lines(system, factorization, labels, list(segments), points, step,
+                                       (unit.part_x, unit.part_y))
+
+    def sensitivity(self, sparse: bool | None = None, reactions: list[str] | None = None) -> Sensitivity:
+        # Производные неизвестных по нагрузкам и координатам узлов, см. Sensitivity;
+        # reactions — подписи или имена нужных неизвестных, по умолчанию все
+        forces, torques = self.segment_loads()
+        if Beam._has_unknown_loads(forces, torques):
+            raise IncorrectInputError("Для расчёта чувствительности все нагрузки должны быть известны!")
+        if sparse is None:
+            sparse = len(self.graph.edges) > Beam.SPARSE_THRESHOLD
+
+        system, factorization, labels = self.factorized_system(sparse)
+        solution = np.array(Beam._solve_factorized(system, factorization, forces, torques))
+        return compute_sensitivity(system, factorization, labels, solution, forces, torques, self.get_nodes(),
+                                   reactions)
+
+    def sweep(self, changes: dict[tuple[Node, str], np.ndarray]) -> Sweep:
+        # Реакции при переборе координат узлов и углов подвижных опор без перестроения балки:
+        # beam.sweep({(node, 'x'): np.linspace(4, 8, 50)})['Вертикальная реакция в узле 2']
+        forces, torques = self.segment_loads()
+        if Beam._has_unknown_loads(forces, torques):
+            raise IncorrectInputError("Для перебора все нагрузки должны быть известны!")
+        self.check_structure()
+        self.reassign_ids()
+        system = EquilibriumSystem(self.split_beam_by_hinges(), with_loads=False)
+        return compute_sweep(system, forces, torques, self.get_nodes(), changes, Beam.format_readable_answers)
+
+    def monte_carlo(self, variations: dict, samples: int, seed: int | None = None,
+                    workers: int | None = None) -> ReactionStatistics:
+        # Распределения реакций при случайных нагрузках, см. MonteCarlo
+        return MonteCarlo(self, variations).run(samples, seed, workers)
+
+    def solve_stiffness(self, default_section: Section | None = None) -> StiffnessSolution:
+        # Метод перемещений: решает и статически неопределимые балки. Сегменты без
+        # своего сечения получают default_section (по умолчанию Section())
+        forces, torques = self.segment_loads()
+        if Beam._has_unknown_loads(forces, torques):
+            raise IncorrectInputError("В методе перемещений нагрузки на сегментах должны быть известны!")
+        self.check_structure()
+        self.reassign_ids()
+        return compute_stiffness(self, self.split_beam_by_hinges(), default_section or Section())
+
+    def solve_cases(self, cases: list[dict[BeamSegment, list[Force | Torque]]], sparse: bool | None = None):
+        # Каждый вариант нагружения задаёт силы и моменты по сегментам; нагрузки,
+        # хранящиеся в самих сегментах, не учитываются. Матрица системы собирается
+        # и раскладывается один раз, все правые части решаются одним вызовом.
+        segments = set(self.get_segments())
+        cases_loads = []
+        for case in cases:
+            forces, torques = [], []
+            for segment, loads in case.items():
+                if segment not in segments:
+                    raise NonExistentError(f"Сегмент балки {segment.id} не существует!")
+                for load in loads:
+                    if load.node1_dist > segment.length:
+                        raise HighDistanceError("Отступ не может быть больше длины сегмента!")
+                    if isinstance(load, Torque):
+                        if load.unknown:
+                            raise IncorrectInputError("Нагрузка варианта не может быть неизвестной!")
+                        torques.append((segment, load))
+                    else:
+                        if load.unknown_x or load.unknown_y:
+                            raise IncorrectInputError("Нагрузка варианта не может быть неизвестной!")
+                        forces.append((segment, load))
+            cases_loads.append((forces, torques))
+
+        if sparse is None:
+            sparse = len(self.graph.edges) > Beam.SPARSE_THRESHOLD
+
+        system, factorization, labels = self.factorized_system(sparse)
+        if cases_loads:
+            reactions = factorization.solve(system.cases_rhs(cases_loads))
+        else:
+            reactions = np.empty((len(system.columns), 0))
+
+        answers = []
+        for case_reactions in reactions.T.tolist():
+            answers.append({label: Beam.round_value(case_reactions[col]) for label, col in labels.items()})
+        return system.columns, reactions, answers
+
+    def solve_symbolic(self, subbeams: list["Beam"]):
         for b in subbeams:
             print(b.pretty_print())
         print()
 
+        solution = self.symbolic_solution(subbeams)
+
+        try:
+            raw_answer = {name: float(value) for name, value in solution.items()}
+            return Beam.format_readable_answers(Beam.round_answers(raw_answer))
+        except Exception as e:
+            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+    def solve_parametric(self) -> ParametricSolution:
+        # Нагрузки могут содержать параметры (см. parameter): система решается
+        # символьно один раз, формулы реакций компилируются в векторное ядро NumPy
+        self.check_structure()
+        self.reassign_ids()
+
+        subbeams = self.split_beam_by_hinges()
+        self.check_determinacy(subbeams)
+        solution = self.symbolic_solution(subbeams)
+
+        unknown_symbols = {sp.Symbol(name) for name in solution}
+        if any(value.free_symbols & unknown_symbols for value in solution.values()):
+            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+
+        names = Beam.format_readable_answers({name: name for name in sorted(solution)})
+        return ParametricSolution({readable: solution[name] for readable, name in names.items()})
+
+    def symbolic_solution(self, subbeams: list["Beam"]) -> dict[str, sp.Expr]:
         eqs = []
         secondary_eqs = []
         unknowns_set = set()
@@ -463,14 +1173,10 @@ class Beam(IDNumerator):
         # print()
         solution = sp.solve(eqs + secondary_eqs, sp.symbols(all_symbols))
 
-        if len(solution) < 1:
+        if len(solution) < 1 or not isinstance(solution, dict):
             raise UnsolvableError("Невозможно найти решение либо система подвижна!")
 
-        try:
-            raw_answer = {str(k): round(float(v), 2) for k, v in solution.items() if str(k) in unknowns}
-            return Beam.format_readable_answers(raw_answer)
-        except Exception as e:
-            raise UnsolvableError("Невозможно найти решение либо система подвижна!")
+        return {str(k): v for k, v in solution.items() if str(k) in unknowns}
 
     def __repr__(self):
         return f"Beam(segments={self.get_segments()})"
@@ -486,41 +1192,42 @@ class Beam(IDNumerator):
             lines.append(segment.pretty_print(indent + 2))
         return '\n'.join(lines)
     
-    def split_beam_by_hinges(self) -> list["Beam"]:
-        hinge_nodes = [n for n in self.graph.nodes if n.hinge is not None]
-        g_wo_hinges = self.graph.copy()
-        g_wo_hinges.remove_nodes_from(hinge_nodes)
-        components = list(nx.connected_components(g_wo_hinges))
-
-        subbeams = []
-        node_to_subbeam = {}
+    def bodies(self) -> np.ndarray:
+        # Номер тела каждого узла (-1 для узлов с шарниром). Множества тел ведутся
+        # при добавлении сегментов и перестраиваются, только если менялись шарниры
+        if self._hinge_revision != self.hinge_revision:
+            self.graph.sync_cuts()
+            self._hinge_revision = self.hinge_revision
+        return self.graph.body_labels()
 
-        for nodes in components:
-            extended_nodes = set(nodes)
-
-            for node in nodes:
-                for neighbor in self.graph.neighbors(node):
-                    if neighbor.hinge is not None:
-                        extended_nodes.add(neighbor)
-
-            subgraph = self.graph.subgraph(extended_nodes)
-            beam = Beam()
-            for u, v, data in subgraph.edges(data=True):
-                beam.add_segment(data['object'])
-
-            for node in subgraph.nodes:
-                node_to_subbeam[node] = beam
-
-            subbeams.append(beam)
-
-        for hinge_node in hinge_nodes:
-            hinge = hinge_node.hinge
-            if not hinge:
-                continue
-
-            for neighbor in self.graph.neighbors(hinge_node):
-                beam = node_to_subbeam.get(neighbor)
-                if beam:
-                    hinge.assign_body(beam)
-
-        return subbeams
\ No newline at end of file
+    def split_beam_by_hinges(self) -> list["Beam"]:
+        # Пока структура не менялась, подбалки и тела шарниров остаются прежними
+        if self._split is not None and self._split[0] == self.structure_revision:
+            return list(self._split[1])
+
+        nodes = self.get_nodes()
+        labels = self.bodies()
+        hinge_positions = np.flatnonzero(labels < 0).tolist()
+        # Тела шарниров пересчитываются при каждом разбиении
+        for position in hinge_positions:
+            nodes[position].hinge.bodies.clear()
+
+        subbeams = [Beam(registry=self.registry) for _ in range(int(labels.max()) + 1 if len(labels) else 0)]
+
+        # Каждый сегмент принадлежит телу своего узла без шарнира. Узлы уже объединены
+        # в исходном графе, поэтому рёбра переносятся без повторных проверок add_segment
+        owners = labels.tolist()
+        for (i, j), segment in zip(self.graph.ordered_edges().tolist(), self.graph.segments()):
+            owner = owners[i] if owners[i] >= 0 else owners[j]
+            if owner >= 0:
+                subbeams[owner].graph.add_edge(nodes[i], nodes[j], object=segment)
+
+        indptr, neighbors, _ = self.graph.csr()
+        for position in hinge_positions:
+            hinge = nodes[position].hinge
+            for owner in labels[neighbors[indptr[position]:indptr[position + 1]]].tolist():
+                if owner >= 0:
+                    hinge.assign_body(subbeams[owner])
+
+        self._split = (self.structure_revision, subbeams)
+        return list(subbeams)
\ No newline at end of file
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import numpy as np
+
+from errors import IncorrectInputError, NonExistentError
+from lazy import lazy_import
+from solver import RCOND_LIMIT
+
+sps = lazy_import('scipy.sparse')
+spla = lazy_import('scipy.sparse.linalg')
+
+FIELDS = ('x', 'y', 'angle')
+# До этого числа неизвестных точки перебора решаются пачками плотных матриц
+DENSE_LIMIT = 300
+# Память под одну пачку плотных матриц, байт
+CHUNK_BYTES = 1 << 26
+
+
+class Sweep:
+    # Неизвестные системы во всех точках перебора: values[i] — массив формы shape
+    # для неизвестного names[i]; shape — общая форма переданных массивов параметров.
+    # В точках, где система вырождается (например, опоры становятся параллельными), — nan.
+    def __init__(self, names: list[str], labels: dict[str, int], shape: tuple, values: np.ndarray):
+        self.names = names
+        self.labels = labels
+        self.shape = shape
+        self.values = values
+        self._rows = {name: i for i, name in enumerate(names)}
+
+    def row(self, name: str) -> int:
+        # Номер строки по читаемой подписи или по внутреннему имени неизвестного
+        if name in self.labels:
+            return self.labels[name]
+        if name in self._rows:
+            return self._rows[name]
+        raise NonExistentError(f"Неизвестная {name} не существует!")
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.values[self.row(name)]
+
+
+def compute_sweep(system, forces: list, torques: list, nodes: list, changes: dict, readable) -> Sweep:
+    # changes: {(узел, 'x' | 'y' | 'angle'): массив значений}; массивы согласуются по правилам
+    # broadcasting NumPy. Матрица системы зависит от координат только в строках моментов
+    # (плечи неизвестных в узлах), поэтому каждая точка — это общий разреженный шаблон
+    # с собственным вектором значений; все векторы собираются сразу, массивами (число ненулей, P).
+    # Угол меняется только у подвижной опоры: её реакция — одна неизвестная величина R
+    # по нормали (-sin α, cos α) к направлению качения, в ответ идут её проекции.
+    position = {node: i for i, node in enumerate(nodes)}
+    fields = []
+    for (node, field), values in changes.items():
+        if node not in position:
+            raise NonExistentError(f"Узел {node.id} не существует!")
+        if field not in FIELDS:
+            raise IncorrectInputError(f"Параметр {field} нельзя перебирать!")
+        if field == 'angle' and (node.support is None or node.support.support_type.name != 'ROLLER'):
+            raise IncorrectInputError("Угол в переборе можно менять только у подвижной опоры!")
+        fields.append((node, field))
+    if not fields:
+        raise IncorrectInputError("Не задано ни одного параметра для перебора!")
+    arrays = np.broadcast_arrays(*(np.asarray(changes[key], dtype=np.float64) for key in fields))
+    shape = arrays[0].shape
+    n_points = int(np.prod(shape, dtype=np.int64))
+
+    x0 = np.array([node.x for node in nodes], dtype=np.float64)
+    y0 = np.array([node.y for node in nodes], dtype=np.float64)
+    X = np.repeat(x0[:, None], n_points, axis=1)
+    Y = np.repeat(y0[:, None], n_points, axis=1)
+    angles = {}
+    for (node, field), values in zip(fields, arrays):
+        if field == 'x':
+            X[position[node]] = values.ravel()
+        elif field == 'y':
+            Y[position[node]] = values.ravel()
+        else:
+            angles[node] = np.radians(values.ravel())
+
+    # Столбцы: неизвестные исходной системы без столбцов перебираемых катков и по одному R на каток
+    n_rows, n_cols = system.shape
+    rollers = list(angles)
+    removed = {col for row, node, col_x, col_y in system.node_columns if node in angles for col in (col_x, col_y) if col >= 0}
+    kept = [col for col in range(n_cols) if col not in removed]
+    new_index = np.full(n_cols, -1, dtype=np.int64)
+    new_index[kept] = np.arange(len(kept))
+    roller_column = {node: len(kept) + k for k, node in enumerate(rollers)}
+    size = len(kept) + len(rollers)
+    if size != n_rows:
+        raise IncorrectInputError("Перебор возможен только для статически определимой системы!")
+
+    base = system.matrix(sparse=True).tocoo()
+    keep = new_index[base.col] >= 0
+    entry_rows = [base.row[keep]]
+    entry_cols = [new_index[base.col[keep]]]
+    entry_vals = [np.repeat(base.data[keep][:, None], n_points, axis=1)]
+
+    def add(row: int, col: int, values: np.ndarray):
+        entry_rows.append(np.array([row]))
+        entry_cols.append(np.array([col]))
+        entry_vals.append(values[None, :])
+
+    rhs = np.repeat(system.rhs[:, None], n_points, axis=1)
+    for row, node, col_x, col_y in system.node_columns:
+        i = position[node]
+        dx, dy = X[i] - x0[i], Y[i] - y0[i]
+        if node in angles:
+            alpha = angles[node]
+            col = roller_column[node]
+            add(row, col, -np.sin(alpha))
+            add(row + 1, col, np.cos(alpha))
+            add(row + 2, col, Y[i] * np.sin(alpha) + X[i] * np.cos(alpha))
+            continue
+        # В исходной матрице плечи посчитаны для исходных координат — добавляются приращения
+        if col_x >= 0:
+            add(row + 2, new_index[col_x], -dy)
+        if col_y >= 0:
+            add(row + 2, new_index[col_y], dx)
+        support = node.support
+        if support is not None:
+            if not support.force.unknown_x:
+                rhs[row + 2] += support.force.part_x * dy
+            if not support.force.unknown_y:
+                rhs[row + 2] -= support.force.part_y * dx
+
+    # Нагрузки сегментов: точка приложения движется вместе с концами сегмента
+    if forces:
+        rows = np.array([system.segment_rows[segment] for segment, _ in forces], dtype=np.intp)
+        first = np.array([position[segment.node1] for segment, _ in forces], dtype=np.intp)
+        second = np.array([position[segment.node2] for segment, _ in forces], dtype=np.intp)
+        dist = np.array([force.node1_dist for _, force in forces], dtype=np.float64)[:, None]
+        parts = np.array([(force.part_x, force.part_y) for _, force in forces], dtype=np.float64)
+        length = np.hypot(X[second] - X[first], Y[second] - Y[first])
+        px = X[first] + dist * (X[second] - X[first]) / length
+        py = Y[first] + dist * (Y[second] - Y[first]) / length
+        np.add.at(rhs, rows, -parts[:, :1])
+        np.add.at(rhs, rows + 1, -parts[:, 1:])
+        np.add.at(rhs, rows + 2, parts[:, :1] * py - parts[:, 1:] * px)
+    if torques:
+        rows = np.array([system.segment_rows[segment] for segment, _ in torques], dtype=np.intp)
+        np.add.at(rhs, rows + 2, -np.array([[torque.value] for _, torque in torques], dtype=np.float64))
+
+    # Общий шаблон: повторяющиеся пары (строка, столбец) складываются, ключи идут в порядке CSR
+    keys = np.concatenate(entry_rows) * size + np.concatenate(entry_cols)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    entries = np.concatenate(entry_vals)
+    gather = sps.csr_matrix((np.ones(len(inverse)), (inverse, np.arange(len(inverse)))), shape=(len(keys), len(inverse)))
+    values = gather @ entries
+    pattern_rows, pattern_cols = keys // size, keys % size
+
+    solution = np.full((size, n_points), np.nan)
+    if size <= DENSE_LIMIT:
+        chunk = max(1, CHUNK_BYTES // (8 * size * size))
+        for start in range(0, n_points, chunk):
+            part = slice(start, min(start + chunk, n_points))
+            matrices = np.zeros((part.stop - part.start, size, size))
+            matrices[:, pattern_rows, pattern_cols] = values[:, part].T
+            regular = 1 / np.linalg.cond(matrices) > RCOND_LIMIT
+            if np.any(regular):
+                solved = np.linalg.solve(matrices[regular], rhs[:, part].T[regular][..., None])[..., 0]
+                solution[:, np.flatnonzero(regular) + start] = solved.T
+    else:
+        indptr = np.searchsorted(pattern_rows, np.arange(size + 1))
+        for p in range(n_points):
+            matrix = sps.csc_matrix(sps.csr_matrix((values[:, p], pattern_cols, indptr), shape=(size, size)))
+            try:
+                lu = spla.splu(matrix)
+            except RuntimeError:
+                continue
+            diagonal = np.abs(lu.U.diagonal())
+            if diagonal.min() > RCOND_LIMIT * diagonal.max():
+                solution[:, p] = lu.solve(rhs[:, p])
+
+    names = [system.columns[col] for col in kept]
+    result = [solution[:len(kept)]]
+    for node in rollers:
+        magnitude = solution[roller_column[node]]
+        alpha = angles[node]
+        names.extend([f'node_{node.id}_x', f'node_{node.id}_y'])
+        result.extend([-magnitude * np.sin(alpha), magnitude * np.cos(alpha)])
+    values = np.vstack(result).reshape((len(names),) + shape)
+    labels = readable({name: i for i, name in enumerate(names)})
+    return Sweep(names, labels, shape, values)
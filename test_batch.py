@@ -0,0 +1,73 @@
+import json
+import subprocess
+import sys
+import pytest
+from batch import main, solve_file, expand_paths
+from serialization import save_beam_to_file
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+@pytest.fixture
+def models(tmp_path):
+    save_beam_to_file(build_c3_beam(), str(tmp_path / "c3.bm"))
+    save_beam_to_file(build_gerber_beam(40), str(tmp_path / "gerber.bm"))
+    (tmp_path / "broken.bm").write_text("{", encoding="utf-8")
+    return tmp_path
+
+
+# Бесконечная координата: OverflowError при поиске узла в пространственном индексе
+OVERFLOW_MODEL = ('{"nodes": [{"id": 1, "x": Infinity, "y": 0, "support": null, "hinge_id": null}], '
+                  '"segments": [], "hinges": []}')
+
+
+def test_solve_file_matches_direct_solve(models):
+    result = solve_file(str(models / "c3.bm"), 'numeric')
+    assert result['status'] == 'ok'
+    assert result['answer'] == build_c3_beam().solve('numeric')
+
+
+def test_solve_file_reports_errors(models):
+    result = solve_file(str(models / "broken.bm"))
+    assert result['status'] == 'error'
+    assert result['error'] == 'JSONDecodeError'
+
+
+def test_unexpected_errors_do_not_stop_the_run(models, capsys):
+    (models / "overflow.bm").write_text(OVERFLOW_MODEL, encoding="utf-8")
+    result = solve_file(str(models / "overflow.bm"))
+    assert result['status'] == 'error'
+    assert result['error'] == 'OverflowError'
+    assert result['message']
+
+    # Остальные файлы всё равно решены
+    assert main([str(models / "*.bm"), "-j", "2"]) == 1
+    results = {json.loads(line)['file']: json.loads(line)['status'] for line in capsys.readouterr().out.splitlines()}
+    assert results[str(models / "overflow.bm")] == 'error'
+    assert results[str(models / "c3.bm")] == results[str(models / "gerber.bm")] == 'ok'
+
+
+def test_expand_paths(models):
+    files = expand_paths([str(models / "*.bm"), str(models / "c3.bm")])
+    assert sorted(files) == sorted(str(models / name) for name in ("broken.bm", "c3.bm", "gerber.bm"))
+
+
+def test_main_streams_json_lines(models, capsys):
+    assert main([str(models / "*.bm"), "-j", "2"]) == 1
+    results = {json.loads(line)['file']: json.loads(line) for line in capsys.readouterr().out.splitlines()}
+    assert len(results) == 3
+    assert results[str(models / "gerber.bm")]['status'] == 'ok'
+    assert results[str(models / "broken.bm")]['status'] == 'error'
+
+
+def test_main_writes_csv(models):
+    output = models / "out.csv"
+    assert main([str(models / "c3.bm"), "-f", "csv", "-o", str(output)]) == 0
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert lines[0].startswith("file,status,load_time")
+    assert len(lines) == 1 + len(build_c3_beam().solve('numeric'))
+
+
+def test_does_not_import_qt():
+    code = "import sys, batch; print(any(name.startswith('PyQt') for name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
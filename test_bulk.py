@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from serialization import beam_to_dict
+from structures import *
+from test_solver import build_c3_beam, build_long_beam
+
+
+def build_c3_arrays() -> Beam:
+    return Beam.from_arrays(
+        nodes=[(1, 1), (1, 4), (4, 4), (4, 3), (6, 3), (9, 3)],
+        segments=[(i, i + 1) for i in range(5)],
+        supports=[(0, Support.Type.FIXED.value, 0, 0, 0, 0, 1, 1, 1), (4, Support.Type.ROLLER.value, 0, 0, 0, 0, 0, 1, 0)],
+        hinges=[2],
+        forces=[(1, 1600, 270, 1.5, 3, 0), (4, 9000, 330, 3, 1, 0)],
+        torques=[(3, -16000, 1, 0)],
+    )
+
+
+def test_same_model_as_element_calls():
+    beam, expected = build_c3_arrays(), build_c3_beam()
+    # Номера сравниваются после перенумерации: элементы обеих балок в их реестрах
+    beam.reassign_ids()
+    expected.reassign_ids()
+    assert beam_to_dict(beam) == beam_to_dict(expected)
+    assert beam.solve() == expected.solve()
+
+
+def test_long_beam():
+    n = 2000
+    nodes = np.column_stack([np.arange(n + 1), np.zeros(n + 1)])
+    segments = np.column_stack([np.arange(n), np.arange(1, n + 1)])
+    forces = np.column_stack([np.arange(n), np.full(n, 10), np.full(n, 270), np.full(n, 0.5), np.ones(n), np.zeros(n)])
+    supports = [(0, Support.Type.PINNED.value, 0, 0, 0, 0, 1, 1, 0), (n, Support.Type.ROLLER.value, 0, 0, 0, 0, 0, 1, 0)]
+    beam = Beam.from_arrays(nodes, segments, supports, forces=forces)
+    assert beam.raw_solution() == pytest.approx(build_long_beam(n).raw_solution())
+    # Граф после пакетной сборки принимает обычные вызовы
+    node = beam.add_node(Node(n, 0))
+    assert node is beam.get_nodes()[-1]
+    beam.add_segment(BeamSegment(node, Node(n + 1, 0)))
+    assert len(beam.get_segments()) == n + 1
+
+
+def test_coincident_nodes_and_repeated_segments():
+    # Узлы 1 и 3 совпадают, сегменты 0 и 2 соединяют одни и те же узлы
+    beam = Beam.from_arrays(
+        nodes=[(0, 0), (2, 0), (4, 0), (2, 1e-12)],
+        segments=[(0, 1), (1, 2), (3, 0)],
+        forces=[(2, 5, 270, 1, 1, 0)],
+    )
+    assert len(beam.get_nodes()) == 3
+    segments = beam.get_segments()
+    assert len(segments) == 2
+    assert [force.value for force in segments[0].forces] == [5]
+    assert beam.graph.has_edge(*beam.get_nodes()[:2])
+
+
+def test_validation():
+    nodes, segments = [(0, 0), (4, 0)], [(0, 1)]
+    with pytest.raises(HighDistanceError):
+        Beam.from_arrays(nodes, segments, forces=[(0, 1, 270, 5, 1, 0)])
+    with pytest.raises(HighDistanceError):
+        Beam.from_arrays(nodes, segments, torques=[(0, 1, 4.5, 0)])
+    with pytest.raises(NegativeOrZeroValueError):
+        Beam.from_arrays(nodes, segments, forces=[(0, -1, 270, 1, 1, 0)])
+    with pytest.raises(NegativeOrZeroValueError):
+        Beam.from_arrays(nodes, segments, forces=[(0, 1, 270, 1, 0, 0)])
+    with pytest.raises(DotBeamError):
+        Beam.from_arrays([(0, 0), (0, 0)], segments)
+    with pytest.raises(NotANumberError):
+        Beam.from_arrays([(0, 0), (np.nan, 0)], segments)
+    with pytest.raises(IncorrectInputError):
+        Beam.from_arrays(nodes, [(0, 2)])
+    with pytest.raises(IncorrectInputError):
+        Beam.from_arrays(nodes, [(0, 1, 2)])
+    with pytest.raises(IncorrectInputError):
+        Beam.from_arrays(nodes, segments, forces=[(1, 1, 270, 1, 1, 0)])
+    with pytest.raises(IncorrectInputError):
+        Beam.from_arrays(nodes, segments, supports=[(0, 3, 0, 0, 0, 0, 1, 1, 0)])
+    with pytest.raises(IncorrectInputError):
+        Beam.from_arrays(nodes, segments, supports=[(0, 1, 0, 0, 0, 0, 1, 1, 0)] * 2)
@@ -0,0 +1,90 @@
+import pytest
+from cache import SolutionCache, SolutionStore
+from structures import *
+from test_solver import build_c3_beam, count_calls
+
+
+@pytest.fixture
+def cache():
+    previous = Beam.solution_cache
+    Beam.solution_cache = SolutionCache(max_size=2)
+    yield Beam.solution_cache
+    Beam.solution_cache = previous
+
+
+def test_cache_is_opt_in(monkeypatch):
+    # Без кэша решение не хеширует балку; кэш можно включить для одной балки
+    hashes = count_calls(monkeypatch, Beam, 'content_hash')
+    build_c3_beam().solve('numeric')
+    assert hashes == []
+
+    beam = build_c3_beam()
+    beam.solution_cache = SolutionCache()
+    answer = beam.solve('numeric')
+    assert beam.solve('numeric') == answer
+    assert beam.solution_cache.stats()['hits'] == 1
+    assert Beam.solution_cache is None
+
+
+def test_content_hash_ignores_ids():
+    first = build_c3_beam()
+    Force(1, 0, 0)
+    Node(0, 0)
+    second = build_c3_beam()
+    assert first.content_hash() == second.content_hash()
+
+    second.get_segments()[4].forces[0].value += 1
+    assert first.content_hash() != second.content_hash()
+
+
+def test_identical_models_hit_cache(cache):
+    answer = build_c3_beam().solve('numeric')
+    assert build_c3_beam().solve('numeric') == answer
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction(cache):
+    beams = [build_c3_beam() for _ in range(3)]
+    for k, beam in enumerate(beams):
+        beam.get_segments()[3].torques[0].value = k
+        beam.solve('numeric')
+    assert cache.stats()['evictions'] == 1
+
+    beams[0].solve('numeric')
+    assert cache.stats()['misses'] == 4
+
+
+def test_shared_store(cache, tmp_path):
+    filename = str(tmp_path / 'solutions.sqlite')
+    cache.store = SolutionStore(filename)
+    answer = build_c3_beam().solve('numeric')
+
+    Beam.solution_cache = SolutionCache(store=SolutionStore(filename))
+    assert build_c3_beam().solve('numeric') == answer
+    assert Beam.solution_cache.stats()['store_hits'] == 1
+
+
+def test_cache_hit_renumbers(cache):
+    def build(right_first: bool) -> Beam:
+        beam = Beam()
+        right, left = Node(4, 0), Node(0, 0)
+        if not right_first:
+            left, right = Node(0, 0), Node(4, 0)
+        left.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+        right.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+        segment = BeamSegment(left, right)
+        segment.add_force(Force(10, 270, 2, 1))
+        beam.add_segment(segment)
+        return beam
+
+    first = build(right_first=False)
+    answer = first.solve('numeric')
+    second = build(right_first=True)
+    assert [node.id for node in second.get_nodes()] != [node.id for node in first.get_nodes()]
+    assert second.solve('numeric') == answer
+    assert cache.stats()['hits'] == 1
+    # Подписи ответа указывают на те же узлы, что и у решённой балки
+    assert [node.id for node in second.get_nodes()] == [node.id for node in first.get_nodes()]
+    assert [support.id for support in (node.support for node in second.get_nodes())] == \
+           [support.id for support in (node.support for node in first.get_nodes())]
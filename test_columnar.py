@@ -0,0 +1,88 @@
+import json
+import numpy as np
+import pytest
+import columnar
+from columnar import ColumnarModel, columnar_to_json, json_to_columnar, load_beam_from_columnar, save_beam_to_columnar
+from profiles import LoadProfile
+from serialization import beam_to_dict, save_beam_to_file
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+def build_mixed_beam() -> Beam:
+    # Все виды данных формата: опоры, шарнир, сечение, сосредоточенные и распределённые силы, моменты
+    beam = build_gerber_beam(4)
+    segments = beam.get_segments()
+    segments[0].section = Section(2e9, 3e7)
+    segments[1].add_force(DistributedForce(LoadProfile.trapezoidal(0.25, 0.75, 2, 4), 270))
+    segments[2].add_force(DistributedForce(LoadProfile.piecewise_linear([(0, 0), (0.5, 2), (1, 0)]), 300))
+    segments[2].add_torque(Torque(7, 0.5, False))
+    return beam
+
+
+def as_dict(data: dict) -> dict:
+    # Порядок шарниров в beam_to_dict зависит от обхода множества
+    return {**data, 'hinges': sorted(data['hinges'], key=lambda hinge: hinge['id'])}
+
+
+def loaded(filename: str) -> Beam:
+    beam = Beam()
+    load_beam_from_columnar(filename, beam)
+    return beam
+
+
+@pytest.mark.parametrize('compression', [None, 'zlib', 'lzma'])
+def test_round_trip(tmp_path, compression):
+    for beam in (build_c3_beam(), build_mixed_beam()):
+        filename = str(tmp_path / 'beam.bmc')
+        save_beam_to_columnar(beam, filename, compression)
+        copy = loaded(filename)
+        assert as_dict(beam_to_dict(copy)) == as_dict(beam_to_dict(beam))
+        assert copy.raw_solution() == pytest.approx(beam.raw_solution())
+
+
+def test_columns_are_memory_mapped(tmp_path):
+    filename = str(tmp_path / 'beam.bmc')
+    beam = build_gerber_beam(50)
+    save_beam_to_columnar(beam, filename)
+    with ColumnarModel(filename) as model:
+        assert model.count('node') == len(beam.get_nodes())
+        assert model.count('torque') == 0
+        x = model['node_x']
+        # Несжатый столбец — представление над файлом, а не копия
+        assert not x.flags.owndata and not x.flags.writeable
+        assert x.tolist() == [node.x for node in beam.get_nodes()]
+        assert model.columns['node_x']['offset'] % columnar.ALIGNMENT == 0
+
+
+def test_compression_shrinks_file(tmp_path):
+    beam = build_gerber_beam(500)
+    plain, packed = tmp_path / 'plain.bmc', tmp_path / 'packed.bmc'
+    save_beam_to_columnar(beam, str(plain))
+    save_beam_to_columnar(beam, str(packed), 'zlib')
+    assert packed.stat().st_size < plain.stat().st_size
+    with ColumnarModel(str(packed)) as model:
+        assert model['segment_node2'].tolist() == list(range(1, 501))
+
+
+def test_conversion_with_json(tmp_path):
+    beam = build_mixed_beam()
+    source, binary, target = tmp_path / 'beam.bm', tmp_path / 'beam.bmc', tmp_path / 'copy.bm'
+    save_beam_to_file(beam, str(source))
+    json_to_columnar(str(source), str(binary), 'lzma')
+    columnar_to_json(str(binary), str(target))
+    assert as_dict(json.loads(target.read_text(encoding='utf-8'))) == as_dict(json.loads(source.read_text(encoding='utf-8')))
+
+
+def test_invalid_files(tmp_path):
+    filename = tmp_path / 'beam.bmc'
+    filename.write_bytes(b'{"nodes": []}')
+    with pytest.raises(IncorrectInputError):
+        ColumnarModel(str(filename))
+    with pytest.raises(IncorrectInputError):
+        save_beam_to_columnar(build_c3_beam(), str(filename), 'zip')
+
+    beam = build_c3_beam()
+    beam.get_segments()[0].add_force(Force(parameter('P'), 270, 1, 1, False))
+    with pytest.raises(IncorrectInputError):
+        save_beam_to_columnar(beam, str(filename))
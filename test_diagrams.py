@@ -0,0 +1,106 @@
+import math
+import numpy as np
+import pytest
+from structures import *
+from solver import DenseFactorization, SparseFactorization
+from test_solver import build_c3_beam, build_gerber_beam, build_long_beam, count_calls
+
+
+# Простая балка пролётом span на шарнирной и катковой опорах
+def build_simple_beam(span: float = 4) -> tuple[Beam, BeamSegment]:
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(span, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    return beam, beam.add_segment(BeamSegment(node1, node2))
+
+
+def test_point_force_jump():
+    beam, segment = build_simple_beam()
+    segment.add_force(Force(10, 270, 1, 1, False))
+    diagram = beam.internal_forces(points=5)
+
+    # Под силой точка повторяется: Q до и после скачка
+    assert diagram.s.tolist() == [0, 1, 1, 2, 3, 4]
+    assert np.allclose(diagram.Q, [7.5, 7.5, -2.5, -2.5, -2.5, -2.5])
+    assert np.allclose(diagram.M, [0, 7.5, 7.5, 5, 2.5, 0])
+    assert np.allclose(diagram.N, 0)
+
+    extremes = diagram.extremes()
+    assert extremes['M']['max'].value == pytest.approx(7.5)
+    assert extremes['M']['max'].x == pytest.approx(1)
+
+
+def test_uniform_load_extreme_between_points():
+    beam, segment = build_simple_beam()
+    segment.add_force(Force(3, 270, 2, 4, False))
+    # Точки сетки не попадают в середину пролёта, но максимум M находится точно
+    diagram = beam.internal_forces(points=4)
+    assert 2 not in diagram.s
+
+    moment = diagram.extremes()['M']['max']
+    assert moment.value == pytest.approx(3 * 4 ** 2 / 8)
+    assert moment.s == pytest.approx(2)
+    assert diagram.Q[0] == pytest.approx(6)
+    assert diagram.Q[-1] == pytest.approx(-6)
+
+
+def test_partial_load_and_torque_by_step():
+    beam, segment = build_simple_beam()
+    segment.add_force(Force(2, 270, 1, 2, False))
+    segment.add_torque(Torque(4, 3, False))
+    diagram = beam.internal_forces(step=0.5)
+
+    part = diagram.of(segment)
+    assert part['s'][0] == 0 and part['s'][-1] == 4
+    # Сосредоточенный момент даёт скачок M на его величину
+    jump = np.flatnonzero(part['s'] == 3)
+    assert len(jump) == 2
+    assert part['M'][jump[0]] - part['M'][jump[1]] == pytest.approx(4)
+    assert part['M'][-1] == pytest.approx(0)
+
+
+def test_hinge_and_free_end():
+    beam = build_c3_beam()
+    diagram = beam.internal_forces()
+    segments = beam.get_segments()
+
+    # В шарнире (конец второго сегмента) момент равен нулю
+    assert diagram.of(segments[1])['M'][-1] == pytest.approx(0, abs=1e-6)
+    assert diagram.of(segments[2])['M'][0] == pytest.approx(0, abs=1e-6)
+    # На свободном конце после приложенной силы усилий нет
+    free_end = diagram.of(segments[4])
+    assert free_end['N'][-1] == pytest.approx(9000 * math.cos(math.radians(30)))
+    assert free_end['M'][-1] == pytest.approx(0, abs=1e-6)
+
+
+def test_gerber_moments_vanish_at_hinges():
+    beam = build_gerber_beam(20)
+    diagram = beam.internal_forces(points=3)
+    for segment in beam.get_segments():
+        part = diagram.of(segment)
+        for node, index in ((segment.node1, 0), (segment.node2, -1)):
+            if node.hinge:
+                assert part['M'][index] == pytest.approx(0, abs=1e-6)
+
+
+def test_closed_contour_is_rejected():
+    beam = Beam()
+    nodes = [beam.add_node(Node(x, y)) for x, y in ((0, 0), (2, 0), (2, 2), (0, 2))]
+    nodes[0].add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    for i in range(4):
+        beam.add_segment(BeamSegment(nodes[i], nodes[(i + 1) % 4]))
+    with pytest.raises(IndeterminateError):
+        beam.internal_forces()
+
+
+def test_throughput(monkeypatch):
+    beam = build_long_beam(1000)
+    sparse = count_calls(monkeypatch, SparseFactorization, '__init__')
+    dense = count_calls(monkeypatch, DenseFactorization, '__init__')
+    # Повторные эпюры той же балки не решают систему заново
+    for _ in range(3):
+        diagram = beam.internal_forces(points=1000)
+    assert len(sparse) + len(dense) == 1
+    assert len(diagram) >= 10 ** 6
+    assert diagram.extremes()['M']['max'].value == pytest.approx(10 * 1000 ** 2 / 8)
@@ -0,0 +1,90 @@
+import numpy as np
+from graph import StructureGraph
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam, build_long_beam
+
+
+def test_traversal_order():
+    a, b, c, d = (Node(i, 0) for i in range(4))
+    graph = StructureGraph()
+    graph.add_edge(a, b, object='ab')
+    graph.add_edge(c, a, object='ca')
+    graph.add_edge(d, b, object='db')
+    graph.add_edge(c, d, object='cd')
+
+    assert list(graph.nodes) == [a, b, c, d]
+    # По меньшему номеру конца, затем по порядку добавления
+    assert list(graph.edges) == [(a, b), (a, c), (b, d), (c, d)]
+    assert graph.segments() == ['ab', 'ca', 'db', 'cd']
+    assert list(graph.neighbors(b)) == [a, d]
+    assert graph[c] == {a: {'object': 'ca'}, d: {'object': 'cd'}}
+
+
+def test_edge_lookup_and_replace():
+    nodes = [Node(i, 0) for i in range(3000)]
+    graph = StructureGraph()
+    for i in range(len(nodes) - 1):
+        graph.add_edge(nodes[i], nodes[i + 1], object=i)
+    assert graph.has_edge(nodes[11], nodes[10])
+    assert not graph.has_edge(nodes[0], nodes[2])
+    graph.add_edge(nodes[1], nodes[0], object='new')
+    assert graph.segment(nodes[0], nodes[1]) == 'new'
+    assert graph.number_of_edges() == len(nodes) - 1
+
+
+def test_components_and_csr():
+    graph = build_gerber_beam(6).graph
+    hinged = np.array([node.hinge is not None for node in graph.nodes])
+    assert graph.components(exclude=hinged).tolist() == [0, -1, 1, -1, 2, -1, 3]
+    assert graph.is_connected()
+
+    indptr, neighbors, edges = graph.csr()
+    assert indptr.tolist() == [0, 1, 3, 5, 7, 9, 11, 12]
+    assert neighbors[indptr[3]:indptr[4]].tolist() == [2, 4]
+
+
+def test_split_beam_by_hinges():
+    subbeams = build_c3_beam().split_beam_by_hinges()
+    assert [len(beam.get_segments()) for beam in subbeams] == [2, 3]
+    assert all(len(node.hinge.bodies) == 2 for beam in subbeams for node in beam.get_nodes() if node.hinge)
+
+
+def test_bodies_follow_hinge_changes():
+    beam = build_long_beam(4)
+    assert beam.bodies().tolist() == [0, 0, 0, 0, 0]
+    beam.get_nodes()[2].add_hinge()
+    assert beam.bodies().tolist() == [0, 0, -1, 1, 1]
+    assert len(beam.split_beam_by_hinges()) == 2
+    beam.add_segment(BeamSegment(beam.get_nodes()[1], Node(2, 1)))
+    beam.add_segment(BeamSegment(Node(2, 1), beam.get_nodes()[3]))
+    assert beam.bodies().tolist() == [0, 0, -1, 0, 0, 0]
+    beam.get_nodes()[2].hinge = None
+    assert beam.bodies().tolist() == [0] * 6
+    assert beam.graph.is_connected()
+
+
+def test_split_is_reused_until_structure_changes(monkeypatch):
+    monkeypatch.setattr(Beam, 'solution_cache', None)
+    beam = build_c3_beam()
+    first = beam.split_beam_by_hinges()
+    assert beam.split_beam_by_hinges() == first
+    assert beam.solve('symbolic') == beam.solve('symbolic') == beam.solve('numeric')
+    beam.add_segment(BeamSegment(beam.get_nodes()[5], Node(10, 3)))
+    assert beam.split_beam_by_hinges() != first
+
+
+def test_bulk_insertion():
+    nodes = [Node(i, 0) for i in range(2000)]
+    pairs = [(i, i + 1) for i in range(0, 1999, 2)] + [(i + 1, i) for i in range(1, 1999, 2)]
+    graph = StructureGraph()
+    graph.add_nodes(nodes)
+    graph.add_edges(np.array([i for i, _ in pairs]), np.array([j for _, j in pairs]), pairs)
+
+    # Тот же порядок обхода, что и при добавлении по одному ребру
+    assert graph.segments() == sorted(pairs, key=min)
+    assert graph.segment(nodes[5], nodes[6]) == (6, 5)
+    assert not graph.has_edge(nodes[0], nodes[2])
+    assert graph.is_connected()
+    graph.add_edge(nodes[1], nodes[0], object='new')
+    assert graph.segment(nodes[0], nodes[1]) == 'new'
+    assert graph.number_of_edges() == len(pairs)
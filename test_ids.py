@@ -0,0 +1,101 @@
+import threading
+import pytest
+from ids import IDAllocator, IDRegistry, use_registry, current_registry
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+def test_allocator_skips_claimed_ids():
+    allocator = IDAllocator()
+    allocator.claim(2)
+    assert [allocator.allocate() for _ in range(3)] == [1, 3, 4]
+    allocator.release(1)
+    assert allocator.allocate() == 5
+    allocator.claim(10 ** 9)
+    allocator.claim(-1)
+    assert 10 ** 9 in allocator and -1 in allocator and 6 not in allocator
+    assert len(allocator) == 6
+
+
+def test_registry_rejects_taken_id():
+    with use_registry(IDRegistry()):
+        node = Node(0, 0, custom_id=5)
+        with pytest.raises(ValueError):
+            Node(1, 0, custom_id=5)
+        node.id = 7
+        assert Node(1, 0, custom_id=5).id == 5
+
+
+def test_each_beam_numbers_from_one():
+    first, second = build_c3_beam(), build_c3_beam()
+    assert first.solve('numeric') == second.solve('numeric')
+    assert [node.id for node in first.get_nodes()] == [node.id for node in second.get_nodes()] == [1, 2, 3, 4, 5, 6]
+    assert first.registry is not second.registry
+    # Перенумерованные элементы переходят в реестр своей балки
+    assert all(node._registry is first.registry for node in first.get_nodes())
+
+
+def test_activation_is_explicit():
+    with use_registry(IDRegistry()) as outer:
+        beam = Beam()
+        assert current_registry() is outer
+        beam.activate()
+        assert current_registry() is beam.registry
+        assert Node(0, 0).id == 1
+
+
+def test_id_change_uses_owning_registry():
+    beam = Beam()
+    with use_registry(beam.registry):
+        node = Node(0, 0)
+    with use_registry(IDRegistry()):
+        node.id = 5
+        assert Node(1, 0, custom_id=5).id == 5
+    with use_registry(beam.registry), pytest.raises(ValueError):
+        Node(1, 0, custom_id=5)
+
+
+def test_revisions_are_per_beam():
+    first, second = build_c3_beam(), build_c3_beam()
+    second.raw_solution()
+    factorized, revision = second._factorized, second.structure_revision
+    first.get_nodes()[1].x += 1
+    first.get_nodes()[2].hinge = None
+    first.get_segments()[0].node2 = first.get_nodes()[1]
+    assert second.structure_revision == revision
+    second.raw_solution()
+    assert second._factorized is factorized
+
+    second.get_nodes()[5].x += 1
+    assert second.structure_revision != revision
+    second.raw_solution()
+    assert second._factorized is not factorized
+
+
+def test_threads_have_own_registries():
+    registries = []
+    thread = threading.Thread(target=lambda: registries.append(current_registry()))
+    thread.start()
+    thread.join()
+    assert registries[0] is not current_registry()
+
+
+def test_concurrent_build_and_solve(monkeypatch):
+    monkeypatch.setattr(Beam, 'solution_cache', None)
+    expected = build_gerber_beam(40).solve('numeric')
+    results, errors = [], []
+
+    def work():
+        try:
+            for _ in range(5):
+                results.append(build_gerber_beam(40).solve('numeric'))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(results) == 40 and all(result == expected for result in results)
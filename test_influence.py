@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from structures import *
+from test_solver import build_gerber_beam, build_long_beam, count_calls
+
+
+def test_simple_beam_lines_are_linear():
+    beam = build_long_beam(4)
+    lines = beam.influence_lines(points=11)
+    path = lines.path
+    assert len(lines) == 44
+    assert np.allclose(lines.line('Вертикальная реакция в узле 1'), 1 - path / 4)
+    assert np.allclose(lines.line('node_5_y'), path / 4)
+    assert np.allclose(lines.line('Горизонтальная реакция в узле 1'), 0)
+
+
+def test_lines_match_single_solves():
+    beam = build_gerber_beam(6)
+    segments = beam.get_segments()
+    lines = beam.influence_lines(step=0.25)
+    for segment in segments:
+        part = lines.of(segment)
+        for k in (0, 3, len(part['s']) - 1):
+            case = {segment: [Force(1, 270, float(part['s'][k]), 1, False)]}
+            _, reactions, _ = beam.solve_cases([case])
+            assert np.allclose(part['values'][:, k], reactions[:, 0])
+
+
+def test_envelope_of_two_axle_train():
+    beam = build_long_beam(10)
+    lines = beam.influence_lines(points=5)
+    train = AxleTrain([(0, 10), (2, 20)])
+
+    reaction = lines.envelope(train)['Вертикальная реакция в узле 1']
+    # Вторая ось над опорой, первая — в двух метрах от неё
+    assert reaction['max'].value == pytest.approx(20 + 10 * (1 - 2 / 10))
+    assert reaction['max'].lead == pytest.approx(2)
+    assert reaction['min'].value == pytest.approx(0)
+
+    reaction = lines.envelope(train.reversed())['Вертикальная реакция в узле 1']
+    assert reaction['max'].value == pytest.approx(10 + 20 * (1 - 2 / 10))
+
+
+def test_chunks_sized_from_memory(monkeypatch):
+    import influence
+    beam = build_gerber_beam(6)
+    expected = beam.influence_lines(points=11).values
+    # Пачка в одно положение груза при любом числе уравнений
+    monkeypatch.setattr(influence, 'CHUNK_BYTES', 1)
+    assert np.allclose(beam.influence_lines(points=11).values, expected)
+
+
+def test_envelope_requires_contiguous_path():
+    beam = build_long_beam(4)
+    segments = beam.get_segments()
+    train = AxleTrain([(0, 1)])
+    beam.influence_lines(segments[1:3], points=5).envelope(train)
+    with pytest.raises(IncorrectInputError):
+        beam.influence_lines([segments[0], segments[2]], points=5).envelope(train)
+    with pytest.raises(IncorrectInputError):
+        beam.influence_lines([segments[1], segments[0]], points=5).envelope(train)
+
+
+def test_invalid_input():
+    beam = build_long_beam(2)
+    with pytest.raises(NegativeOrZeroValueError):
+        AxleTrain([(0, 10), (1, -5)])
+    with pytest.raises(IncorrectInputError):
+        beam.influence_lines(points=1)
+    with pytest.raises(NonExistentError):
+        beam.influence_lines().line('Момент в узле 7')
+
+
+def test_sweep_is_vectorized(monkeypatch):
+    beam = build_long_beam(400)
+    factorizations = count_calls(monkeypatch, SparseFactorization, '__init__')
+    solves = count_calls(monkeypatch, SparseFactorization, 'solve')
+    lines = beam.influence_lines(points=101)
+    assert len(lines) == 40400
+    # Одно разложение и одна пачка на все положения груза
+    assert len(factorizations) == len(solves) == 1
+    envelope = lines.envelope(AxleTrain([(0, 1), (1, 1), (5, 2)]))
+    assert envelope['Вертикальная реакция в узле 401']['max'].value == pytest.approx(1 + (1 - 1 / 400) + 2 * (1 - 5 / 400))
@@ -0,0 +1,149 @@
+import glob
+import pytest
+from journal import EditJournal
+from serialization import beam_to_dict, load_beam_from_file, save_beam_to_file
+from structures import *
+from test_columnar import as_dict
+
+
+def edit_session(beam: Beam, journal: EditJournal, n: int = 4):
+    # Те же шаги, что в DialogManager: сегменты по координатам, затем опоры, шарнир и нагрузки
+    for i in range(n):
+        node1 = beam.find_node(i, 0) or Node(i, 0)
+        node2 = beam.find_node(i + 1, 0) or Node(i + 1, 0)
+        segment = BeamSegment(node1, node2)
+        if beam.add_segment(segment) is segment:
+            journal.segment(beam, segment)
+    nodes, segments = beam.get_nodes(), beam.get_segments()
+
+    nodes[0].add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    journal.support(beam, nodes[0])
+    nodes[-1].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    journal.support(beam, nodes[-1])
+    nodes[2].add_hinge()
+    nodes[2].support = None
+    journal.hinge(beam, nodes[2])
+    for segment in segments:
+        force = Force(10, 300, 0.5, 1, False)
+        segment.add_force(force)
+        journal.force(beam, segment, force)
+    torque = Torque(-4, 0.25, False)
+    segments[1].add_torque(torque)
+    journal.torque(beam, segments[1], torque)
+
+
+def same_model(first: Beam, second: Beam) -> bool:
+    # Номера сравниваются после перенумерации, как их видит пользователь после решения
+    first.reassign_ids()
+    second.reassign_ids()
+    return as_dict(beam_to_dict(first)) == as_dict(beam_to_dict(second))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'autosave')
+
+
+def test_replay_after_restart(path):
+    journal = EditJournal(path)
+    assert not journal.has_session()
+    beam = Beam()
+    edit_session(beam, journal)
+    journal.flush()
+    # Снимка ещё нет — только журнал
+    assert glob.glob(path + '.*.bm') == []
+
+    restored = EditJournal(path).restore()
+    assert same_model(restored, beam)
+    assert restored.solve() == beam.solve()
+    journal.close()
+
+
+def test_compaction_and_continued_session(path):
+    journal = EditJournal(path, compact_every=5)
+    beam = Beam()
+    edit_session(beam, journal, n=6)
+    journal.flush()
+    snapshots = glob.glob(path + '.*.bm')
+    assert len(snapshots) == 1
+    with open(path + '.journal', encoding='utf-8') as f:
+        assert len(f.readlines()) < 5
+
+    # Новый сеанс продолжает нумерацию и дописывает правки к восстановленной балке
+    second = EditJournal(path, compact_every=5)
+    restored = second.restore()
+    segment = restored.get_segments()[0]
+    torque = Torque(3, 0.5, False)
+    segment.add_torque(torque)
+    second.torque(restored, segment, torque)
+    second.close()
+    again = EditJournal(path).restore()
+    assert same_model(again, restored)
+    journal.close()
+
+
+def test_crash_leftovers(path):
+    journal = EditJournal(path)
+    beam = Beam()
+    edit_session(beam, journal)
+    journal.compact(beam)
+    journal.flush()
+    snapshot = glob.glob(path + '.*.bm')[0]
+    journal.close()
+
+    # Журнал, не очищенный после записи снимка, и оборванная последняя строка
+    seq = int(snapshot[len(path) + 1:-len('.bm')])
+    with open(path + '.journal', 'w', encoding='utf-8') as f:
+        f.write(f'{{"seq": {seq - 1}, "op": "hinge", "node": [1, 0]}}\n{{"seq": {seq + 1}, "op": "tor')
+    restored = EditJournal(path).restore()
+    assert same_model(restored, beam)
+
+
+def test_discard_and_loaded_model(path, tmp_path):
+    journal = EditJournal(path)
+    edit_session(Beam(), journal)
+    journal.discard()
+    assert not journal.has_session()
+
+    # Загруженная из файла балка становится снимком, сегменты с общими узлами сохраняются
+    beam = Beam()
+    edit_session(beam, EditJournal(str(tmp_path / 'other')))
+    filename = str(tmp_path / 'beam.bm')
+    save_beam_to_file(beam, filename)
+    loaded = Beam()
+    load_beam_from_file(filename, loaded)
+    journal.compact(loaded)
+    journal.flush()
+    assert journal.has_session()
+    assert same_model(journal.restore(), beam)
+    journal.close()
+
+
+def test_edits_after_renumbering(path):
+    # solve перенумеровывает сегменты в порядке графа; правки после него
+    # должны попасть на те же сегменты, что и в окне
+    journal = EditJournal(path)
+    beam = Beam()
+    for x1, x2 in ((0, 1), (5, 6), (1, 5)):
+        segment = BeamSegment(beam.find_node(x1, 0) or Node(x1, 0), beam.find_node(x2, 0) or Node(x2, 0))
+        beam.add_segment(segment)
+        journal.segment(beam, segment)
+    node = beam.find_node(0, 0)
+    node.add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    journal.support(beam, node)
+    beam.solve()
+
+    segment = next(segment for segment in beam.get_segments() if segment.id == 2)
+    assert (segment.node1.x, segment.node2.x) == (1, 5)
+    force = Force(10, 270, 1, 1, False)
+    segment.add_force(force)
+    journal.force(beam, segment, force)
+    node = beam.find_node(5, 0)
+    node.add_hinge()
+    journal.hinge(beam, node)
+    journal.close()
+
+    restored = EditJournal(path).restore()
+    loaded = {(s.node1.x, s.node2.x): len(s.forces) for s in restored.get_segments()}
+    assert loaded == {(0, 1): 0, (5, 6): 0, (1, 5): 1}
+    assert same_model(restored, beam)
@@ -0,0 +1,102 @@
+import math
+import numpy as np
+import pytest
+from montecarlo import BATCH, CHUNK, ReactionStatistics
+from structures import *
+from test_solver import build_c3_beam, build_long_beam, count_calls
+
+
+def test_statistics_merge_and_quantiles():
+    rng = np.random.default_rng(1)
+    samples = rng.normal(3, 2, (2, 200000))
+    low, high = np.array([-20.0, -20.0]), np.array([20.0, 20.0])
+    whole = ReactionStatistics(['a', 'b'], low, high)
+    whole.add(samples)
+    parts = ReactionStatistics(['a', 'b'], low, high)
+    for chunk in np.array_split(samples, 7, axis=1):
+        part = ReactionStatistics(['a', 'b'], low, high)
+        part.add(chunk)
+        parts.merge(part)
+
+    assert np.allclose(parts.mean, samples.mean(axis=1))
+    assert np.allclose(parts.std, samples.std(axis=1, ddof=1))
+    assert np.array_equal(parts.histogram, whole.histogram)
+    assert np.allclose(parts.quantile(0.5), np.median(samples, axis=1), atol=0.02)
+    assert np.allclose(parts.quantile(0.95), np.quantile(samples, 0.95, axis=1), atol=0.02)
+    assert np.allclose(parts.quantile(0), samples.min(axis=1))
+
+
+def test_value_scatter_is_linear():
+    # Реакции линейны по величине силы: разброс переносится точно
+    beam = build_long_beam(4)
+    forces = [force for segment in beam.get_segments() for force in segment.forces]
+    result = beam.monte_carlo({forces[0]: {'value': Deviation.normal(2)}}, 50000, seed=7, workers=1)
+    summary = result.summary()
+    reaction = summary['Вертикальная реакция в узле 1']
+    # Сила у первого сегмента (x = 0.5) даёт на левую опору 7/8 своей величины
+    assert reaction['mean'] == pytest.approx(20, abs=0.05)
+    assert reaction['std'] == pytest.approx(2 * 7 / 8, rel=0.02)
+    assert reaction['quantiles'][0.5] == pytest.approx(20, abs=0.05)
+    assert summary['Горизонтальная реакция в узле 1']['std'] == pytest.approx(0, abs=1e-9)
+
+
+def test_position_and_angle_scatter_keep_equilibrium():
+    beam = build_long_beam(2)
+    force = beam.get_segments()[0].forces[0]
+    torque = Torque(4, 0.5, False)
+    beam.get_segments()[1].add_torque(torque)
+    variations = {force: {'node1_dist': Deviation.uniform(0.5), 'angle': Deviation.uniform(30)},
+                  torque: {'value': Deviation.normal(1)}}
+    result = beam.monte_carlo(variations, 20000, seed=3, workers=1).summary()
+    # Вертикальные реакции в сумме уравновешивают обе силы
+    total = result['Вертикальная реакция в узле 1']['mean'] + result['Вертикальная реакция в узле 3']['mean']
+    assert total == pytest.approx(10 + 10 * np.sin(np.radians(30)) / np.radians(30), rel=0.01)
+
+
+def test_seed_reproducible_across_workers():
+    beam = build_c3_beam()
+    force = beam.get_segments()[4].forces[0]
+    variations = {force: {'value': Deviation.normal(500), 'angle': Deviation.normal(5)}}
+    single = MonteCarlo(beam, variations).run(300000, seed=11, workers=1)
+    pooled = MonteCarlo(beam, variations).run(300000, seed=11, workers=2)
+    assert single.count == pooled.count == 300000
+    assert np.allclose(single.mean, pooled.mean)
+    assert np.array_equal(single.histogram, pooled.histogram)
+
+
+def test_stream_yields_growing_counts():
+    beam = build_c3_beam()
+    force = beam.get_segments()[1].forces[0]
+    counts = [statistics.count for statistics in
+              MonteCarlo(beam, {force: {'value': Deviation.uniform(100)}}).stream(300000, seed=1, workers=1)]
+    assert counts == sorted(counts) and counts[-1] == 300000 and len(counts) > 1
+
+
+def test_invalid_variations():
+    beam = build_c3_beam()
+    force = beam.get_segments()[1].forces[0]
+    with pytest.raises(NonExistentError):
+        MonteCarlo(beam, {Force(1, 0, 0): {'value': Deviation.normal(1)}})
+    with pytest.raises(IncorrectInputError):
+        MonteCarlo(beam, {force: {'length': Deviation.normal(1)}})
+    with pytest.raises(NegativeOrZeroValueError):
+        Deviation.normal(-1)
+
+
+def test_million_samples(monkeypatch):
+    beam = build_c3_beam()
+    segments = beam.get_segments()
+    variations = {
+        segments[1].forces[0]: {'value': Deviation.normal(160), 'node1_dist': Deviation.uniform(0.2)},
+        segments[3].torques[0]: {'value': Deviation.normal(1600)},
+        segments[4].forces[0]: {'value': Deviation.normal(900), 'angle': Deviation.uniform(10)},
+    }
+    factorizations = count_calls(monkeypatch, DenseFactorization, '__init__')
+    solves = count_calls(monkeypatch, DenseFactorization, 'solve')
+    result = beam.monte_carlo(variations, 10 ** 6, seed=5, workers=1)
+    assert result.count == 10 ** 6
+    # Одно разложение; пробная выборка и пачки по BATCH выборок внутри задач по CHUNK
+    batches = sum(math.ceil(min(CHUNK, 10 ** 6 - first) / BATCH) for first in range(0, 10 ** 6, CHUNK))
+    assert len(factorizations) == 1
+    assert len(solves) == 1 + batches
+    assert result.summary()['Вертикальная реакция в узле 5']['mean'] == pytest.approx(15352.89, rel=0.01)
@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pytest
+import profiles
+from profiles import LoadProfile
+from serialization import beam_to_dict, load_beam_from_file, save_beam_to_file
+from structures import *
+
+
+def build_simple_beam(span: float = 6) -> tuple[Beam, BeamSegment]:
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(span, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    return beam, beam.add_segment(BeamSegment(node1, node2))
+
+
+def test_linear_profiles():
+    assert LoadProfile.trapezoidal(1, 3, 2, 4).resultant() == pytest.approx((6, 1 + 2 * (2 + 2 * 4) / (3 * (2 + 4))))
+    assert LoadProfile.triangular(0, 6, 3).resultant() == pytest.approx((9, 4))
+    assert LoadProfile.triangular(0, 6, 3, peak_at=2).resultant() == pytest.approx((9, (0 + 2 + 6) / 3))
+
+    profile = LoadProfile.piecewise_linear([(0, 0), (1, 2), (3, 2), (4, 0)])
+    assert profile.resultant() == pytest.approx((6, 2))
+    assert profile.intensity([0.5, 2, 3.5]).tolist() == pytest.approx([1, 2, 1])
+
+    with pytest.raises(NegativeOrZeroValueError):
+        LoadProfile.trapezoidal(0, 1, -1, 2)
+    with pytest.raises(IncorrectInputError):
+        LoadProfile.piecewise_linear([(0, 1), (0, 2)])
+
+
+def test_polynomial_and_function_profiles():
+    # q(s) = 1 + 0.5·(s - 1)² на [1, 3]
+    total, centroid = LoadProfile.polynomial(1, 3, [1, 0, 0.5]).resultant()
+    assert total == pytest.approx(2 + 8 / 6)
+    assert centroid == pytest.approx(1 + (2 + 2) / total)
+
+    profile = LoadProfile.function(lambda s: 2 + np.sin(s), 1, 5)
+    total = 8 - math.cos(5) + math.cos(1)
+    moment = 24 + math.sin(5) - 5 * math.cos(5) - math.sin(1) + math.cos(1)
+    assert profile.resultant() == pytest.approx((total, moment / total))
+    # Функция без поддержки массивов вызывается поточечно
+    assert LoadProfile.function(lambda s: 2 + math.sin(s), 1, 5).resultant() == pytest.approx(profile.resultant())
+
+
+def test_resultant_is_cached():
+    profiles._integrate.cache_clear()
+    profile = LoadProfile.trapezoidal(0, 2, 1, 3)
+    for _ in range(1000):
+        DistributedForce(LoadProfile.trapezoidal(0, 2, 1, 3), 270)
+    assert profiles._integrate.cache_info().misses == 1
+    assert DistributedForce(profile, 270).profile == profile
+
+
+def test_uniform_profile_matches_force():
+    beam, segment = build_simple_beam()
+    segment.add_force(Force(2, 270, 3, 4, False))
+    expected = beam.solve('numeric')
+
+    segment.forces = [DistributedForce(LoadProfile.uniform(1, 5, 2), 270)]
+    assert beam.solve('numeric') == expected
+    assert beam.solve('symbolic') == expected
+
+
+def test_triangular_load_reactions_and_diagram():
+    beam, segment = build_simple_beam()
+    segment.add_force(DistributedForce(LoadProfile.triangular(0, 6, 3), 270))
+    answer = beam.solve('symbolic')
+    assert answer['Вертикальная реакция в узле 1'] == 3
+    assert answer['Вертикальная реакция в узле 2'] == 6
+
+    diagram = beam.internal_forces(points=201)
+    moment = diagram.extremes()['M']['max']
+    assert moment.value == pytest.approx(3 * 36 / (9 * math.sqrt(3)), rel=1e-4)
+    assert moment.s == pytest.approx(6 / math.sqrt(3), rel=1e-2)
+    assert diagram.M[-1] == pytest.approx(0, abs=1e-9)
+
+
+def test_add_force_checks_profile_end():
+    _, segment = build_simple_beam()
+    with pytest.raises(HighDistanceError):
+        segment.add_force(DistributedForce(LoadProfile.uniform(5, 7, 1), 270))
+
+
+def test_profile_round_trip(tmp_path):
+    beam, segment = build_simple_beam()
+    segment.add_force(DistributedForce(LoadProfile.piecewise_linear([(0, 0), (2, 3), (6, 1)]), 300))
+    filename = tmp_path / "beam.bm"
+    save_beam_to_file(beam, str(filename))
+
+    loaded = Beam()
+    load_beam_from_file(str(filename), loaded)
+    force = loaded.get_segments()[0].forces[0]
+    assert isinstance(force, DistributedForce)
+    assert force.profile == segment.forces[0].profile
+    assert beam_to_dict(loaded) == beam_to_dict(beam)
+    assert loaded.solve('numeric') == beam.solve('numeric')
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+def perturbed_solution(beam: Beam, parameter: str, delta: float) -> dict[str, float]:
+    # Меняет параметр вида node_N_coord_x или segment_S_force_F_angle, решает и возвращает обратно
+    nodes = {f'node_{node.id}': node for node in beam.get_nodes()}
+    loads = {}
+    for segment in beam.get_segments():
+        loads.update({f'segment_{segment.id}_force_{force.id}': force for force in segment.forces})
+        loads.update({f'segment_{segment.id}_torque_{torque.id}': torque for torque in segment.torques})
+
+    if '_coord_' in parameter:
+        owner, field = nodes[parameter.split('_coord_')[0]], parameter[-1]
+    else:
+        prefix = next(name for name in loads if parameter.startswith(name + '_'))
+        owner, field = loads[prefix], parameter[len(prefix) + 1:]
+    original = getattr(owner, field)
+    setattr(owner, field, original + delta)
+    try:
+        return beam.raw_solution()
+    finally:
+        setattr(owner, field, original)
+
+
+def assert_matches_differences(beam: Beam, h: float = 1e-5):
+    sensitivity = beam.sensitivity()
+    assert sensitivity.matrix.shape == (len(sensitivity.names), len(sensitivity.parameters))
+    for j, parameter in enumerate(sensitivity.parameters):
+        plus, minus = perturbed_solution(beam, parameter, h), perturbed_solution(beam, parameter, -h)
+        expected = [(plus[name] - minus[name]) / (2 * h) for name in sensitivity.names]
+        scale = max(1.0, np.abs(sensitivity.values).max())
+        assert sensitivity.matrix[:, j] == pytest.approx(expected, abs=1e-6 * scale), parameter
+
+
+def test_c3_matches_finite_differences():
+    assert_matches_differences(build_c3_beam())
+
+
+def test_gerber_matches_finite_differences():
+    beam = build_gerber_beam(6)
+    beam.get_segments()[2].add_force(Force(3, 300, 0.25, 0.5, False))
+    assert_matches_differences(beam)
+
+
+def test_simple_beam_values():
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(4, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    segment = beam.add_segment(BeamSegment(node1, node2))
+    force = Force(10, 270, 1, 1, False)
+    segment.add_force(force)
+    torque = Torque(6, 2, False)
+    segment.add_torque(torque)
+
+    sensitivity = beam.sensitivity()
+    name = f'segment_{segment.id}_force_{force.id}'
+    # R2 = (10·d - 6) / L при d = 1, L = 4: по величине — d/L, по положению — 10/L, по пролёту — -(10·d - 6)/L²
+    assert sensitivity['Вертикальная реакция в узле 2', f'{name}_value'] == pytest.approx(0.25)
+    assert sensitivity['Вертикальная реакция в узле 2', f'{name}_node1_dist'] == pytest.approx(2.5)
+    assert sensitivity['Вертикальная реакция в узле 2', f'node_{node2.id}_coord_x'] == pytest.approx(-0.25)
+    assert sensitivity['Вертикальная реакция в узле 2', f'segment_{segment.id}_torque_{torque.id}_value'] == pytest.approx(-0.25)
+    assert sensitivity.of(f'node_{node1.id}_x')[f'{name}_angle'] == pytest.approx(-10 * np.pi / 180)
+
+    with pytest.raises(NonExistentError):
+        sensitivity['Вертикальная реакция в узле 2', 'node_9_coord_x']
+
+
+def test_requested_reactions_in_blocks(monkeypatch):
+    import sensitivity
+    beam = build_gerber_beam(6)
+    full = beam.sensitivity()
+    label = next(iter(full.labels))
+    name = full.names[-1]
+
+    # Пачки по одному столбцу дают то же, что и одна пачка
+    monkeypatch.setattr(sensitivity, 'CHUNK_BYTES', 1)
+    for sparse in (False, True):
+        assert beam.sensitivity(sparse).matrix == pytest.approx(full.matrix)
+        # Сопряжённая задача только для запрошенных неизвестных
+        part = beam.sensitivity(sparse, reactions=[label, name])
+        assert part.names == [full.names[full.row(label)], name]
+        assert part.of(label) == pytest.approx(full.of(label))
+        assert part.of(name) == pytest.approx(full.of(name))
+        assert part.values == pytest.approx(full.values[[full.row(label), full.row(name)]])
+
+    with pytest.raises(NonExistentError):
+        beam.sensitivity(reactions=['node_999_x'])
@@ -0,0 +1,63 @@
+import json
+import pytest
+import serialization
+from serialization import beam_to_dict, load_beam_from_file, save_beam_to_file
+from structures import *
+from test_columnar import as_dict, build_mixed_beam
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+def loaded(filename: str) -> Beam:
+    beam = Beam()
+    load_beam_from_file(filename, beam)
+    return beam
+
+
+def test_writer_matches_json_dump(tmp_path):
+    filename = tmp_path / 'beam.bm'
+    for beam in (build_c3_beam(), build_mixed_beam(), Beam()):
+        save_beam_to_file(beam, str(filename))
+        assert filename.read_text(encoding='utf-8') == json.dumps(beam_to_dict(beam), indent=4)
+
+
+@pytest.mark.parametrize('chunk', [1, 7, 4096])
+def test_streaming_round_trip(tmp_path, monkeypatch, chunk):
+    # Маленькие порции заставляют записи и числа обрываться на границах
+    monkeypatch.setattr(serialization, 'CHUNK', chunk)
+    filename = str(tmp_path / 'beam.bm')
+    beam = build_mixed_beam()
+    save_beam_to_file(beam, filename)
+    copy = loaded(filename)
+    assert as_dict(beam_to_dict(copy)) == as_dict(beam_to_dict(beam))
+    assert copy.raw_solution() == pytest.approx(beam.raw_solution())
+
+
+def test_hinges_collected_in_one_pass():
+    beam = build_gerber_beam(6)
+    hinges = beam_to_dict(beam)['hinges']
+    expected = {}
+    for node in beam.get_nodes():
+        if node.hinge:
+            expected.setdefault(node.hinge.id, []).append(node.id)
+    assert {hinge['id']: hinge['node_ids'] for hinge in hinges} == expected
+
+
+def test_key_order_and_compact_files(tmp_path):
+    # Файл без отступов, сегменты и шарниры раньше узлов, лишний ключ
+    beam = build_gerber_beam(4)
+    data = beam_to_dict(beam)
+    filename = tmp_path / 'beam.bm'
+    reordered = {'hinges': data['hinges'], 'segments': data['segments'], 'version': [1, {'a': 2}], 'nodes': data['nodes']}
+    filename.write_text(json.dumps(reordered, separators=(',', ':')), encoding='utf-8')
+    assert as_dict(beam_to_dict(loaded(str(filename)))) == as_dict(data)
+
+
+def test_broken_files(tmp_path):
+    filename = tmp_path / 'beam.bm'
+    for text in ('{', '{"nodes": [}', '{"nodes": [], "segments": []} x'):
+        filename.write_text(text, encoding='utf-8')
+        with pytest.raises(ValueError):
+            loaded(str(filename))
+    filename.write_text('{"nodes": []}', encoding='utf-8')
+    with pytest.raises(KeyError):
+        loaded(str(filename))
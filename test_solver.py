@@ -0,0 +1,365 @@
+import math
+import numpy as np
+import pytest
+import scipy.sparse
+from structures import *
+
+
+# Яблонский С3 5 вариант — две балки, соединённые шарниром
+def build_c3_beam() -> Beam:
+    beam = Beam()
+    nodes = [
+        beam.add_node(Node(1, 1)),
+        beam.add_node(Node(1, 4)),
+        beam.add_node(Node(4, 4)),
+        beam.add_node(Node(4, 3)),
+        beam.add_node(Node(6, 3)),
+        beam.add_node(Node(9, 3)),
+    ]
+    nodes[0].add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    nodes[2].add_hinge()
+    nodes[4].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+
+    segments = [beam.add_segment(BeamSegment(nodes[i], nodes[i + 1])) for i in range(5)]
+    segments[1].add_force(Force(1600, 270, 1.5, 3, False))
+    segments[3].add_torque(Torque(-16000, 1, False))
+    segments[4].add_force(Force(9000, 330, 3, 1, False))
+    return beam
+
+
+# Простая балка на двух опорах из n сегментов с вертикальными силами
+def build_long_beam(n: int) -> Beam:
+    beam = Beam()
+    nodes = [beam.add_node(Node(i, 0)) for i in range(n + 1)]
+    nodes[0].add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    nodes[-1].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    for i in range(n):
+        segment = beam.add_segment(BeamSegment(nodes[i], nodes[i + 1]))
+        segment.add_force(Force(10, 270, 0.5, 1, False))
+    return beam
+
+
+# Число вызовов метода класса: вместо времени тесты проверяют, сколько раз решалась система
+def count_calls(monkeypatch, cls, name: str) -> list:
+    calls = []
+    original = getattr(cls, name)
+
+    def counted(*args, **kwargs):
+        calls.append(name)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cls, name, counted)
+    return calls
+
+
+def test_numeric_matches_symbolic():
+    beam = build_c3_beam()
+    assert beam.solve('numeric') == beam.solve('symbolic')
+
+
+def test_repeated_solve_is_stable():
+    beam = build_c3_beam()
+    first = beam.solve('numeric')
+    assert beam.solve('numeric') == first
+    assert first['Вертикальная реакция в узле 5'] == 15352.89
+
+
+def test_auto_uses_numeric_for_large_beams():
+    n = Beam.NUMERIC_THRESHOLD * 5
+    answer = build_long_beam(n).solve()
+    assert answer['Вертикальная реакция в узле 1'] == pytest.approx(5 * n)
+    assert answer[f'Вертикальная реакция в узле {n + 1}'] == pytest.approx(5 * n)
+
+
+def test_numeric_mechanism_is_unsolvable():
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(2, 0))
+    node1.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    beam.add_segment(BeamSegment(node1, node2)).add_force(Force(10, 45, 1, 1, False))
+    with pytest.raises(UnsolvableError):
+        beam.solve('numeric')
+
+
+def test_unknown_method():
+    with pytest.raises(IncorrectInputError):
+        build_c3_beam().solve('magic')
+
+
+# Балка Гербера: жёсткая заделка слева, далее чередуются шарниры и подвижные опоры
+def build_gerber_beam(n: int) -> Beam:
+    beam = Beam()
+    nodes = [beam.add_node(Node(i, 0)) for i in range(n + 1)]
+    nodes[0].add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    for i in range(1, n + 1):
+        if i % 2 == 0:
+            nodes[i].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+        elif i < n:
+            nodes[i].add_hinge()
+    for i in range(n):
+        segment = beam.add_segment(BeamSegment(nodes[i], nodes[i + 1]))
+        segment.add_force(Force(10, 260, 0.5, 1, False))
+    return beam
+
+
+def test_sparse_matches_dense():
+    beam = build_gerber_beam(40)
+    assert beam.solve('sparse') == beam.solve('numeric')
+
+
+def test_transposed_solve_matches_solve():
+    # λᵀ·b = eᵀ·solve(b) для квадратной и переопределённой совместной систем
+    rng = np.random.default_rng(1)
+    for n_rows in (6, 9):
+        matrix = rng.normal(size=(n_rows, 6))
+        rhs = matrix @ rng.normal(size=(6, 3))
+        unit = np.eye(6)[:, [1, 4]]
+        for factorization in (DenseFactorization(matrix), SparseFactorization(scipy.sparse.csr_matrix(matrix))):
+            adjoint = factorization.solve_transposed(unit)
+            assert adjoint.T @ rhs == pytest.approx(unit.T @ factorization.solve(rhs))
+
+
+def test_sparse_mechanism_is_unsolvable():
+    beam = build_gerber_beam(40)
+    beam.get_nodes()[4].support = None
+    with pytest.raises(UnsolvableError):
+        beam.solve('sparse')
+
+
+def test_solve_cases_matches_single_solves():
+    beam = build_c3_beam()
+    expected = beam.solve('numeric')
+
+    segments = beam.get_segments()
+    base = {segment: segment.forces + segment.torques for segment in segments if segment.forces or segment.torques}
+    doubled = {
+        segment: [Force(f.value * 2, f.angle, f.node1_dist, f.length) for f in segment.forces]
+                 + [Torque(t.value * 2, t.node1_dist) for t in segment.torques]
+        for segment in base
+    }
+
+    columns, reactions, answers = beam.solve_cases([base, doubled, {}])
+    assert reactions.shape == (len(columns), 3)
+    assert answers[0] == expected
+    assert reactions[:, 1] == pytest.approx(2 * reactions[:, 0])
+    assert not reactions[:, 2].any()
+
+
+def test_solve_cases_rejects_far_load():
+    beam = build_c3_beam()
+    segment = beam.get_segments()[0]
+    with pytest.raises(HighDistanceError):
+        beam.solve_cases([{segment: [Force(10, 90, segment.length + 1)]}])
+
+
+def test_parametric_matches_numeric():
+    beam = build_c3_beam()
+    expected = beam.solve('numeric')
+
+    segment = beam.get_segments()[4]
+    segment.forces = [Force(parameter('F'), parameter('alpha'), 3, 1, False)]
+    solution = beam.solve_parametric()
+    assert solution.parameter_names == ['F', 'alpha']
+
+    values = solution.evaluate(F=[9000, 0], alpha=330)
+    for name, value in expected.items():
+        assert values[name][0] == pytest.approx(value, abs=0.01)
+        assert values[name].shape == (2,)
+
+
+def test_parametric_requires_all_parameters():
+    beam = build_c3_beam()
+    beam.get_segments()[3].torques = [Torque(parameter('M'), 1, False)]
+    with pytest.raises(IncorrectInputError):
+        beam.solve_parametric().evaluate()
+
+
+def test_resolve_reuses_factorization_for_load_changes():
+    beam = build_c3_beam()
+    beam.solve('numeric')
+    cached = beam.factorized_system()
+
+    beam.get_segments()[4].forces[0].value = 0
+    beam.get_segments()[3].torques[0].value = 0
+    answer = beam.solve('numeric')
+    assert beam.factorized_system() is not cached
+    assert beam.factorized_system()[1] is cached[1]
+    assert answer['Вертикальная реакция в узле 1'] == 4800
+
+
+def test_structure_change_invalidates_factorization():
+    beam = build_c3_beam()
+    beam.solve('numeric')
+    factorization = beam.factorized_system()[1]
+
+    beam.get_nodes()[2].hinge = None
+    with pytest.raises(TooManyUnknownsError):
+        beam.solve('numeric')
+    beam.get_nodes()[2].add_hinge()
+    assert beam.factorized_system()[1] is not factorization
+
+
+def test_support_change_invalidates_factorization():
+    beam = build_c3_beam()
+    beam.raw_solution()
+    support = beam.get_nodes()[4].support
+
+    # Известный момент опоры входит в правую часть системы
+    support.torque.value = 500
+    expected = build_c3_beam()
+    expected.get_nodes()[4].support.torque.value = 500
+    assert beam.raw_solution() == pytest.approx(expected.raw_solution())
+
+    # Флаги неизвестных меняют столбцы
+    support.force.unknown_x = True
+    with pytest.raises(IndeterminateError):
+        beam.raw_solution()
+    support.force.unknown_x = False
+    beam.raw_solution()
+
+    # Новая опора того же узла тоже сбрасывает кэш
+    beam.get_nodes()[4].support = Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False)
+    with pytest.raises(IndeterminateError):
+        beam.raw_solution()
+
+
+def test_classify_determinate():
+    determinacy = build_c3_beam().classify()
+    assert determinacy.type == Determinacy.Type.DETERMINATE
+    assert determinacy.degree == determinacy.freedom == 0
+
+
+def test_indeterminate_reports_degree():
+    beam = build_c3_beam()
+    beam.get_nodes()[2].hinge = None
+    determinacy = beam.classify()
+    assert determinacy.type == Determinacy.Type.INDETERMINATE
+    assert determinacy.degree == 1
+    with pytest.raises(IndeterminateError, match="неопределимости: 1"):
+        beam.solve('symbolic')
+
+
+def test_mechanism_reports_free_nodes():
+    beam = build_gerber_beam(40)
+    beam.get_nodes()[4].support = None
+    determinacy = beam.classify()
+    assert determinacy.type == Determinacy.Type.MECHANISM
+    moving = {node.id for node in determinacy.free_mode}
+    assert 5 in moving and 1 not in moving
+    with pytest.raises(MechanismError, match="Подвижные узлы"):
+        beam.solve('numeric')
+    with pytest.raises(MechanismError):
+        beam.solve('sparse')
+
+
+def build_partial_mechanism(n: int) -> Beam:
+    # Левая половина — неразрезная балка на многих опорах, правая висит на шарнире
+    beam = Beam()
+    nodes = [beam.add_node(Node(i, 0)) for i in range(n + 1)]
+    nodes[0].add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    for node in nodes[1:n // 2:10]:
+        node.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    for i in range(n):
+        beam.add_segment(BeamSegment(nodes[i], nodes[i + 1]))
+    nodes[n // 2].add_hinge()
+    return beam
+
+
+def test_partial_mechanism_reports_both_degrees():
+    beam = build_partial_mechanism(60)
+    determinacy = beam.classify()
+    assert determinacy.type == Determinacy.Type.MECHANISM
+    assert (determinacy.degree, determinacy.freedom) == (2, 1)
+    assert {node.id for node in determinacy.free_mode} == set(range(32, 62))
+    with pytest.raises(MechanismError, match="неопределимости: 2"):
+        beam.solve('numeric')
+
+
+def test_sparse_classification_matches_dense(monkeypatch):
+    import solver
+    beams = [build_c3_beam(), build_gerber_beam(40), build_partial_mechanism(60)]
+    beams[1].get_nodes()[4].support = None
+    beams[0].get_nodes()[2].hinge = None
+    expected = [beam.classify() for beam in beams]
+    monkeypatch.setattr(solver, 'CLASSIFY_DENSE_LIMIT', 0)
+    for beam, dense in zip(beams, expected):
+        sparse = beam.classify()
+        assert (sparse.degree, sparse.freedom) == (dense.degree, dense.freedom)
+        assert sorted(sparse.redundant) == sorted(dense.redundant)
+        assert set(sparse.free_mode) == set(dense.free_mode)
+
+
+def test_large_partial_mechanism():
+    # Больше CLASSIFY_DENSE_LIMIT неизвестных — разреженная классификация
+    determinacy = build_partial_mechanism(10 ** 5).classify()
+    assert (determinacy.degree, determinacy.freedom) == (4999, 1)
+    assert len(determinacy.free_mode) == 49999
+    assert len(determinacy.redundant) == 5001
+
+
+def test_balanced_mechanism_is_solved_by_both_engines():
+    # Горизонтальное перемещение не закреплено, но вертикальная нагрузка его не вызывает
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(4, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, False, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    force = Force(10, 270, 2, 1, False)
+    beam.add_segment(BeamSegment(node1, node2)).add_force(force)
+    expected = {'Вертикальная реакция в узле 1': 5.0, 'Вертикальная реакция в узле 2': 5.0}
+    assert beam.solve('symbolic') == beam.solve('numeric') == expected
+
+    force.angle = 300
+    with pytest.raises(MechanismError):
+        beam.solve('symbolic')
+    with pytest.raises(MechanismError):
+        beam.solve('numeric')
+
+
+def test_add_node_merges_float_noise():
+    beam = Beam()
+    node = beam.add_node(Node(0.1 + 0.2, 3 * math.sin(math.radians(30))))
+    assert beam.add_node(Node(0.3, 1.5)) is node
+    assert beam.add_node(Node(0.3 + 1e-6, 1.5)) is not node
+    assert Beam(tolerance=1e-3).add_node(Node(0.3, 1.5)) is not node
+
+
+def test_add_node_tolerance_and_moved_nodes():
+    beam = Beam(tolerance=0.01)
+    node = beam.add_node(Node(1, 1))
+    assert beam.add_node(Node(1.005, 0.995)) is node
+    node.x = 5
+    assert beam.add_node(Node(1, 1)) is not node
+    assert beam.add_node(Node(5.001, 1)) is node
+    with pytest.raises(DotBeamError):
+        beam.add_segment(BeamSegment(Node(0, 0), Node(0.001, 0)))
+
+
+def test_model_objects_have_no_dict():
+    node = Node(0, 0)
+    node.add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    node.add_hinge()
+    segment = BeamSegment(node, Node(1, 0))
+    segment.add_force(Force(1, 90, 0.5))
+    segment.add_torque(Torque(1, 0.5))
+    for obj in (node, node.support, node.support.force, node.support.torque, node.hinge, segment):
+        assert not hasattr(obj, '__dict__')
+
+
+def test_support_reactions_are_inline():
+    # Реакции опоры — слоты Support; force и torque лишь показывают их и меняют
+    support = Support(Support.Type.ROLLER, 90, 3, 4, 2, False, True, False)
+    assert support.force.value == pytest.approx(5)
+    assert (support.force.part_x, support.force.part_y) == pytest.approx((-4, 3))
+    assert (support.force.unknown_x, support.force.unknown_y) == (True, False)
+    support.torque.value = 7
+    assert support.torque_value == 7
+
+    beam = build_c3_beam()
+    supports = [node.support for node in beam.get_nodes() if node.support]
+    beam.reassign_ids()
+    assert [support.force.id for support in supports] == [1, 2]
+    assert [support.torque.id for support in supports] == [1, 2]
+    supports[0].force.id = 10
+    assert supports[0].force.id == 10
+    with pytest.raises(ValueError):
+        supports[1].force.id = 10
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from startup import measure, format_report
+
+
+def loaded_after(code: str) -> set[str]:
+    probe = f"import sys\n{code}\nprint(' '.join(name for name in ('sympy', 'networkx', 'scipy') if name in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_import_does_not_load_heavy_libraries():
+    assert loaded_after("import structures, serialization, batch") == set()
+
+
+def test_numeric_solve_does_not_load_sympy():
+    code = "from test_solver import build_long_beam\nbuild_long_beam(50).solve('numeric')"
+    assert 'sympy' not in loaded_after(code)
+
+
+def test_startup_report():
+    result = measure('structures', repeat=1)
+    assert result['elapsed_ms'] > 0
+    assert 'sympy' not in result['loaded']
+    assert result['target'] in format_report([result])
+
+
+def test_window_target_starts():
+    result = measure('window', repeat=1)
+    assert result['elapsed_ms'] > 0
+    assert 'sympy' not in result['loaded']
@@ -0,0 +1,162 @@
+import math
+import pytest
+import scipy.sparse.linalg
+from profiles import LoadProfile
+from serialization import beam_to_dict, load_beam_from_file, save_beam_to_file
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam, build_long_beam
+
+
+def assert_same_reactions(beam: Beam):
+    expected = beam.raw_solution()
+    actual = beam.solve_stiffness().reactions
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        assert actual[name] == pytest.approx(value, rel=1e-6, abs=1e-6)
+
+
+def test_determinate_beams_match_equilibrium():
+    assert_same_reactions(build_c3_beam())
+    assert_same_reactions(build_gerber_beam(20))
+    assert_same_reactions(build_long_beam(50))
+    assert build_c3_beam().solve('stiffness') == build_c3_beam().solve('numeric')
+
+
+def test_propped_cantilever():
+    # Заделка слева, каток справа, равномерная нагрузка q на пролёте L
+    q, L = 3, 4
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(L, 0))
+    node1.add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    beam.add_segment(BeamSegment(node1, node2)).add_force(Force(q, 270, L / 2, L, False))
+
+    with pytest.raises(IndeterminateError):
+        beam.solve('numeric')
+    reactions = beam.solve_stiffness().reactions
+    assert reactions[f'node_{node2.id}_y'] == pytest.approx(3 * q * L / 8)
+    assert reactions[f'node_{node1.id}_y'] == pytest.approx(5 * q * L / 8)
+    assert reactions[f'node_{node1.id}_torque'] == pytest.approx(q * L ** 2 / 8)
+
+
+def test_two_span_continuous_beam():
+    q, L = 2, 5
+    beam = Beam()
+    nodes = [beam.add_node(Node(i * L, 0)) for i in range(3)]
+    nodes[0].add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    for node in nodes[1:]:
+        node.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    for i in range(2):
+        beam.add_segment(BeamSegment(nodes[i], nodes[i + 1])).add_force(
+            DistributedForce(LoadProfile.uniform(0, L, q), 270))
+
+    answer = beam.solve('stiffness')
+    assert answer['Вертикальная реакция в узле 2'] == pytest.approx(1.25 * q * L, abs=0.01)
+    assert answer['Вертикальная реакция в узле 1'] == pytest.approx(0.375 * q * L, abs=0.01)
+
+
+def test_hinge_over_support():
+    # Заделка, каток с шарниром, каток: момент через шарнир не передаётся,
+    # и нагрузка правого пролёта не доходит до левого
+    beam = Beam()
+    nodes = [beam.add_node(Node(x, 0)) for x in (0, 4, 8)]
+    nodes[0].add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    nodes[1].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    nodes[1].add_hinge()
+    nodes[2].add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    beam.add_segment(BeamSegment(nodes[0], nodes[1]))
+    beam.add_segment(BeamSegment(nodes[1], nodes[2])).add_force(Force(10, 270, 2, 1, False))
+
+    solution = beam.solve_stiffness()
+    reactions = solution.reactions
+    assert reactions[f'node_{nodes[1].id}_y'] == pytest.approx(5)
+    assert reactions[f'node_{nodes[2].id}_y'] == pytest.approx(5)
+    assert reactions[f'node_{nodes[0].id}_y'] == pytest.approx(0, abs=1e-9)
+    assert reactions[f'node_{nodes[0].id}_torque'] == pytest.approx(0, abs=1e-9)
+    # Левый пролёт не поворачивается, правый поворачивается над опорой
+    left, right = (solution.hinge_rotations[(nodes[1], body)] for body in nodes[1].hinge.bodies)
+    assert left == pytest.approx(0, abs=1e-12)
+    assert abs(right) > 1e-9
+
+
+def test_cantilever_tip_deflection():
+    P, L = 5, 3
+    section = Section(EA=2e8, EI=4e6)
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(L, 0))
+    node1.add_support(Support(Support.Type.FIXED, 0, 0, 0, 0, True, True, True))
+    beam.add_segment(BeamSegment(node1, node2, section=section)).add_force(Force(P, 270, L, 1, False))
+
+    u, v, theta = beam.solve_stiffness().displacement(node2)
+    assert v == pytest.approx(-P * L ** 3 / (3 * section.EI))
+    assert theta == pytest.approx(-P * L ** 2 / (2 * section.EI))
+    assert u == pytest.approx(0, abs=1e-15)
+
+
+def test_inclined_roller_reacts_along_normal():
+    # Каток на плоскости под 30°: реакция перпендикулярна плоскости качения
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(4, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 30, 0, 0, 0, False, True, False))
+    beam.add_segment(BeamSegment(node1, node2)).add_force(Force(10, 270, 2, 1, False))
+
+    solution = beam.solve_stiffness()
+    rx, ry = solution.reactions[f'node_{node2.id}_x'], solution.reactions[f'node_{node2.id}_y']
+    assert ry == pytest.approx(5)
+    assert rx * math.cos(math.radians(30)) + ry * math.sin(math.radians(30)) == pytest.approx(0, abs=1e-9)
+    u, v, _ = solution.displacement(node2)
+    assert u * math.sin(math.radians(30)) - v * math.cos(math.radians(30)) == pytest.approx(0, abs=1e-15)
+
+
+def test_mechanism_and_unknown_loads():
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(2, 0))
+    node1.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    segment = beam.add_segment(BeamSegment(node1, node2))
+    with pytest.raises(MechanismError):
+        beam.solve_stiffness()
+
+    segment.add_force(Force(0, 0, 1, 1, True))
+    with pytest.raises(IncorrectInputError):
+        beam.solve_stiffness()
+
+
+def test_section_round_trip(tmp_path):
+    beam = build_long_beam(3)
+    beam.get_segments()[1].section = Section(5e8, 2e6)
+    filename = tmp_path / "beam.bm"
+    save_beam_to_file(beam, str(filename))
+
+    loaded = Beam()
+    load_beam_from_file(str(filename), loaded)
+    assert loaded.get_segments()[1].section == Section(5e8, 2e6)
+    assert loaded.get_segments()[0].section is None
+    assert beam_to_dict(loaded) == beam_to_dict(beam)
+
+
+def test_large_continuous_beam(monkeypatch):
+    # 10^5 элементов на опорах через каждые десять — неопределимая система
+    n = 10 ** 5
+    beam = Beam()
+    nodes = [beam.add_node(Node(i, 0)) for i in range(n + 1)]
+    nodes[0].add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    for node in nodes[10::10]:
+        node.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    for i in range(n):
+        beam.add_segment(BeamSegment(nodes[i], nodes[i + 1])).add_force(Force(1, 270, 0.5, 1, False))
+
+    # Одно разреженное разложение; ненулевых элементов — линейно от числа узлов
+    matrices = []
+    splu = scipy.sparse.linalg.splu
+
+    def counted(matrix, *args, **kwargs):
+        matrices.append(matrix)
+        return splu(matrix, *args, **kwargs)
+
+    monkeypatch.setattr(scipy.sparse.linalg, 'splu', counted)
+    reactions = beam.solve_stiffness().reactions
+    assert len(matrices) == 1
+    assert matrices[0].nnz < 10 * 3 * (n + 1)
+    assert sum(value for name, value in reactions.items() if name.endswith('_y')) == pytest.approx(n)
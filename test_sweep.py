@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+import sweep
+from structures import *
+from test_solver import build_c3_beam, build_gerber_beam
+
+
+def solutions_by_moving(beam: Beam, node: Node, field: str, values) -> dict[str, list[float]]:
+    # Эталон: меняем координату узла и решаем заново
+    original = getattr(node, field)
+    result = {}
+    try:
+        for value in values:
+            setattr(node, field, float(value))
+            for name, solution in beam.raw_solution().items():
+                result.setdefault(name, []).append(solution)
+    finally:
+        setattr(node, field, original)
+    return result
+
+
+def test_coordinate_sweep_matches_resolving():
+    beam = build_c3_beam()
+    node = beam.get_nodes()[4]
+    values = np.linspace(5, 8, 7)
+    result = beam.sweep({(node, 'x'): values})
+    for name, expected in solutions_by_moving(beam, node, 'x', values).items():
+        assert result[name] == pytest.approx(expected)
+    assert result['Вертикальная реакция в узле 5'].shape == (7,)
+
+
+def test_grid_of_two_coordinates():
+    beam = build_c3_beam()
+    nodes = beam.get_nodes()
+    xs, ys = np.linspace(5, 7, 4), np.linspace(2, 3, 3)
+    result = beam.sweep({(nodes[4], 'x'): xs[:, None], (nodes[3], 'y'): ys[None, :]})
+    assert result.shape == (4, 3)
+
+    nodes[4].x, nodes[3].y = float(xs[2]), float(ys[1])
+    expected = beam.raw_solution()
+    for name, value in expected.items():
+        assert result[name][2, 1] == pytest.approx(value)
+
+
+def test_roller_angle_sweep():
+    # Шарнирная опора слева, каток справа; реакция катка перпендикулярна плоскости качения
+    beam = Beam()
+    node1, node2 = beam.add_node(Node(0, 0)), beam.add_node(Node(4, 0))
+    node1.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    node2.add_support(Support(Support.Type.ROLLER, 0, 0, 0, 0, False, True, False))
+    beam.add_segment(BeamSegment(node1, node2)).add_force(Force(10, 270, 1, 1, False))
+
+    angles = np.array([0, 30, 60, 90])
+    result = beam.sweep({(node2, 'angle'): angles})
+    radians = np.radians(angles[:3])
+    assert result['Вертикальная реакция в узле 2'][:3] == pytest.approx([2.5] * 3)
+    assert result['Горизонтальная реакция в узле 2'][:3] == pytest.approx(-2.5 * np.tan(radians))
+    assert result['Горизонтальная реакция в узле 1'][:3] == pytest.approx(2.5 * np.tan(radians))
+    # Каток качается вертикально — балка подвижна
+    assert np.isnan(result['Вертикальная реакция в узле 2'][3])
+
+    stiffness = Beam()
+    a, b = stiffness.add_node(Node(0, 0)), stiffness.add_node(Node(4, 0))
+    a.add_support(Support(Support.Type.PINNED, 0, 0, 0, 0, True, True, False))
+    b.add_support(Support(Support.Type.ROLLER, 30, 0, 0, 0, False, True, False))
+    stiffness.add_segment(BeamSegment(a, b)).add_force(Force(10, 270, 1, 1, False))
+    reactions = stiffness.solve_stiffness().reactions
+    assert result[f'node_{node2.id}_x'][1] == pytest.approx(reactions[f'node_{b.id}_x'])
+
+
+def test_large_system_uses_sparse_path():
+    beam = build_gerber_beam(150)
+    node = beam.get_nodes()[-1]
+    assert len(beam.raw_solution()) > sweep.DENSE_LIMIT
+    values = [150, 150.5, 151]
+    result = beam.sweep({(node, 'x'): values})
+    for name, expected in solutions_by_moving(beam, node, 'x', values).items():
+        assert result[name] == pytest.approx(expected, abs=1e-6)
+
+
+def test_invalid_parameters():
+    beam = build_c3_beam()
+    nodes = beam.get_nodes()
+    with pytest.raises(IncorrectInputError):
+        beam.sweep({(nodes[0], 'angle'): [0, 10]})
+    with pytest.raises(IncorrectInputError):
+        beam.sweep({(nodes[0], 'z'): [0, 10]})
+    with pytest.raises(NonExistentError):
+        beam.sweep({(Node(0, 0), 'x'): [0, 1]})
@@ -0,0 +1,75 @@
+from array import array
+import numpy as np
+
+
+class UnionFind:
+    # Система непересекающихся множеств на массивах: объединение по размеру,
+    # сокращение путей вдвое при поиске. Элементы — номера 0..n-1.
+    __slots__ = ('_parent', '_size', 'count')
+
+    def __init__(self, n: int = 0):
+        self._parent = array('q', range(n))
+        self._size = array('q', [1]) * n
+        self.count = n
+
+    @classmethod
+    def from_labels(cls, labels: np.ndarray) -> "UnionFind":
+        # Множества по готовой разметке; элементы с меткой -1 остаются одиночными
+        labels = np.asarray(labels, dtype=np.int64)
+        n = len(labels)
+        parent = np.arange(n, dtype=np.int64)
+        size = np.ones(n, dtype=np.int64)
+        grouped = np.flatnonzero(labels >= 0)
+        if grouped.size:
+            unique, first = np.unique(labels[grouped], return_index=True)
+            representative = np.empty(unique.max() + 1, dtype=np.int64)
+            representative[unique] = grouped[first]
+            parent[grouped] = representative[labels[grouped]]
+            size[grouped] = 0
+            size[representative[unique]] = np.bincount(labels[grouped])[unique]
+
+        uf = cls()
+        uf._parent = array('q', parent.tobytes())
+        uf._size = array('q', size.tobytes())
+        uf.count = n - grouped.size + (len(unique) if grouped.size else 0)
+        return uf
+
+    def __len__(self):
+        return len(self._parent)
+
+    def add(self) -> int:
+        element = len(self._parent)
+        self._parent.append(element)
+        self._size.append(1)
+        self.count += 1
+        return element
+
+    def find(self, element: int) -> int:
+        parent = self._parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, a: int, b: int) -> bool:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self._size[a] < self._size[b]:
+            a, b = b, a
+        self._parent[b] = a
+        self._size[a] += self._size[b]
+        self.count -= 1
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def roots(self) -> np.ndarray:
+        # Корни всех элементов сразу: удвоение указателей на NumPy
+        parent = np.frombuffer(self._parent, dtype=np.int64).copy() if len(self._parent) else np.empty(0, np.int64)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                return parent
+            parent = grandparent